@@ -3,10 +3,27 @@ Create an Api object that can communicate with the
 Spectrum Scale Management API
 """
 import json
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from typing import Union
 import requests
 import urllib3
-from ._utils import jsonprepreq
+from ._utils import jsonprepreq, mergepage, nextpage, PagedResponse
+from ._cache import ResponseCache
+from ._retry import TokenBucket, RETRYSTATUS, backoff, retryable, retryafter
+
+# Set in the threads of a _fanout, so a fan-out nested in one runs serially
+_FANOUTWORKER = threading.local()
+
+
+def _markfanoutworker():
+    """
+    @brief Mark the current thread as a _fanout worker
+    """
+    _FANOUTWORKER.active = True
+
 
 class Api:
     """
@@ -23,6 +40,7 @@ class Api:
         get_fileset,
         fileset,
         filesets,
+        iter_filesets,
         list_filesets,
         preppost_fileset
     )
@@ -30,6 +48,7 @@ class Api:
         get_acl,
         acl,
         acls,
+        iter_acls,
         list_acls,
         prepput_acl
     )
@@ -37,12 +56,17 @@ class Api:
         get_quota,
         quota,
         quotas,
-        preppost_quota
+        iter_quotas,
+        preppost_quota,
+        reconcile_quotas,
+        prepbulk_quota,
+        bulk_quota
     )
     from ._job import (
         get_jobs,
         job,
         jobs,
+        iter_jobs,
         list_jobs
     )
 
@@ -57,22 +81,52 @@ class Api:
             verify_method: Union[bool, str]=True,
             verify_warnings: bool=True,
             version: str='v2',
-            dryrun: bool=False
+            dryrun: bool=False,
+            max_inflight: int=1,
+            pool_connections: int=10,
+            pool_maxsize: Union[int, None]=None,
+            pool_block: bool=False,
+            keepalive: bool=True,
+            max_retries: Union[int, urllib3.util.Retry]=0,
+            cache: bool=False,
+            cache_ttl: Union[int, dict, None]=None,
+            cache_size: int=1024,
+            rate_limit: Union[float, None]=None,
+            rate_burst: int=1,
+            retries: int=0,
+            retry_backoff: float=0.5,
+            retry_backoff_max: float=60.0,
+            retry_nonidempotent: bool=False
     ):
         """
         @brief      Initiator of the pyspectrumscale.Api class
 
-        @param      self             The object
-        @param      host             The spectrum scale management server
-        @param      username         The username used to connect to the spectrum scale management server
-        @param      password         The password used to authenticate the username
-        @param      port             The port used to connect to the spectrum scale management server
-        @param      protocol         The protocol used to connect to the spectrum scale management server
-        @param      verify_ssl       If true the connection will verifiy SSL
-        @param      verify_method    If true this specifies the method used to verify SSL
-        @param      verify_warnings  If false SSL verification warnings will be suppress
-        @param      version          The Spectrum Scale Management API version
-        @param      dryrun           If true, the API will not write changes to Spectrum Scale or GPFS
+        @param      self                The object
+        @param      host                The spectrum scale management server
+        @param      username            The username used to connect to the spectrum scale management server
+        @param      password            The password used to authenticate the username
+        @param      port                The port used to connect to the spectrum scale management server
+        @param      protocol            The protocol used to connect to the spectrum scale management server
+        @param      verify_ssl          If true the connection will verifiy SSL
+        @param      verify_method       If true this specifies the method used to verify SSL
+        @param      verify_warnings     If false SSL verification warnings will be suppress
+        @param      version             The Spectrum Scale Management API version
+        @param      dryrun              If true, the API will not write changes to Spectrum Scale or GPFS
+        @param      max_inflight        The maximum number of concurrent read requests, 1 runs all requests serially
+        @param      pool_connections    The number of connection pools to cache
+        @param      pool_maxsize        The maximum number of connections kept in a pool, default None, which is at least max_inflight
+        @param      pool_block          If true, requests wait for a free connection rather than opening one beyond pool_maxsize
+        @param      keepalive           If false, connections are closed after each request
+        @param      max_retries         The number of retries, or a urllib3 Retry, for failed connections
+        @param      cache               If true, responses to GET requests are cached
+        @param      cache_ttl           The cache time to live in seconds, jobs are never cached unless named, or a dict of endpoint names to seconds
+        @param      cache_size          The maximum number of cached responses
+        @param      rate_limit          The most requests sent per second, default None, which does not limit the rate
+        @param      rate_burst          The number of requests that can be sent at once before rate_limit applies
+        @param      retries             The number of times a request answered with 429 or 503, or whose connection failed, is sent again
+        @param      retry_backoff       The wait before the first retry in seconds, doubled for each retry, unless the server sends Retry-After
+        @param      retry_backoff_max   The longest backoff between retries in seconds
+        @param      retry_nonidempotent If true, POST requests are retried after a 503 or failed connection, when the server may have acted on them
         """
 
         self._host = host
@@ -85,6 +139,38 @@ class Api:
         self._verify_warnings = verify_warnings
         self._version = version
         self._dryrun = dryrun
+        self._max_inflight = max(1, max_inflight)
+        # The calls of _fanout run at once, an ApiPool raises it to the whole pool
+        self._max_fanout = self._max_inflight
+        self._pool_connections = pool_connections
+        self._pool_maxsize = pool_maxsize
+        if self._pool_maxsize is None:
+            self._pool_maxsize = max(10, self._max_inflight)
+        self._pool_block = pool_block
+        self._keepalive = keepalive
+        self._max_retries = max_retries
+
+        self._cache = None
+        if cache:
+            self._cache = ResponseCache(
+                ttl=cache_ttl,
+                maxsize=cache_size
+            )
+
+        # Bounds the number of GET requests in flight across all threads
+        self._inflight = threading.BoundedSemaphore(self._max_inflight)
+
+        # Spaces the requests of all threads, and holds them all back when the server asks to wait
+        self._ratelimit = TokenBucket(
+            rate=rate_limit,
+            burst=rate_burst
+        )
+        self._retries = max(0, retries)
+        self._retry_backoff = retry_backoff
+        self._retry_backoff_max = retry_backoff_max
+        self._retry_nonidempotent = retry_nonidempotent
+        self._retrylock = threading.Lock()
+        self._retrycounts = Counter()
 
         self.warnings = []
 
@@ -117,6 +203,21 @@ class Api:
         self._session.url = self._baseurl
         self._session.verify = self._verify_ssl
 
+        # Size the connection pool so concurrent requests reuse connections
+        adapter = requests.adapters.HTTPAdapter(
+            pool_connections=self._pool_connections,
+            pool_maxsize=self._pool_maxsize,
+            max_retries=self._max_retries,
+            pool_block=self._pool_block
+        )
+        self._session.mount('https://', adapter)
+        self._session.mount('http://', adapter)
+
+        if not self._keepalive:
+            self._session.headers.update(
+                {'connection': 'close'}
+            )
+
         self._session.headers.update(
             {'accept': 'application/json'}
         )
@@ -128,52 +229,260 @@ class Api:
             self._password
         )
 
+    def _getpages(
+        self,
+        commandurl: type=str,
+        params: Union[None, dict]=None
+    ):
+        """
+        @brief This iterates over the pages of a GET request, following the paging lastId cursor
+
+        @param self This object
+        @param commandurl the URL for the request
+        @param params a dictionary of parameters
+
+        @return a generator of (requests.Response, dict) tuples, one for each page,
+                the dict is the parsed JSON content or None if it could not be parsed
+        """
+        route = None
+        while commandurl is not None:
+            response, route = self._getpage(commandurl, params, route)
+
+            try:
+                page = response.json()
+            except ValueError:
+                page = None
+
+            yield response, page
+
+            commandurl = None
+            if response.ok:
+                commandurl, params = nextpage(
+                    self._baseaddress,
+                    page,
+                    params
+                )
+
+    def _getpage(
+        self,
+        commandurl: type=str,
+        params: Union[None, dict]=None,
+        route=None
+    ):
+        """
+        @brief This sends the GET request for one page of _getpages, a subclass can
+               override it to choose the server the page is read from
+
+        @param self This object
+        @param commandurl the URL for the request
+        @param params a dictionary of parameters
+        @param route the route returned for the previous page, None for the first page
+
+        @return a tuple of the requests.Response and the route the page was read by
+        """
+        with self._inflight:
+            response = self._withretry(
+                'GET',
+                lambda: self._session.get(
+                    url=commandurl,
+                    params=params
+                )
+            )
+
+        return response, None
+
+    def _withretry(
+        self,
+        method: type=str,
+        call: type=callable,
+        retrystatus: list=RETRYSTATUS,
+        retryerrors: bool=True
+    ):
+        """
+        @brief This sends a request within the rate limit, and sends it again if the
+               server asks to slow down or the connection fails, as long as the method
+               is safe to send again
+
+        @param self This object
+        @param method the HTTP method of the request
+        @param call a function that sends the request and returns a requests.Response
+        @param retrystatus the status codes that are retried
+        @param retryerrors if false, failed connections are raised without a retry
+
+        @return a requests.Response object, the last one if the retries ran out
+        """
+        attempt = 0
+        while True:
+            wait = self._ratelimit.reserve()
+            if wait > 0:
+                time.sleep(wait)
+
+            try:
+                response = call()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if (
+                        not retryerrors or
+                        attempt >= self._retries or
+                        not retryable(method, None, self._retry_nonidempotent)
+                ):
+                    raise
+
+                self._countretry('errors', attempt)
+                time.sleep(backoff(attempt, self._retry_backoff, self._retry_backoff_max))
+            else:
+                with self._retrylock:
+                    self._retrycounts['requests'] += 1
+
+                if (
+                        response.status_code not in retrystatus or
+                        attempt >= self._retries or
+                        not retryable(method, response.status_code, self._retry_nonidempotent)
+                ):
+                    return response
+
+                self._countretry('throttled', attempt)
+                wait = retryafter(response)
+                if wait is None:
+                    wait = backoff(attempt, self._retry_backoff, self._retry_backoff_max)
+
+                # Every thread waits, as they are all sending to the same server
+                self._ratelimit.pause(wait)
+
+            attempt += 1
+
+    def _countretry(
+        self,
+        reason: type=str,
+        attempt: type=int
+    ):
+        """
+        @brief This counts a retry
+
+        @param self This object
+        @param reason 'throttled' for a 429 or 503 response, 'errors' for a failed connection
+        @param attempt the number of the retry, starting at 0
+        """
+        with self._retrylock:
+            self._retrycounts[reason] += 1
+            self._retrycounts['retries'] += 1
+            if attempt == 0:
+                self._retrycounts['retried'] += 1
+
     def _get(
         self,
         commandurl: type=str,
         params: Union[None, dict]=None
     ):
         """
-        @brief This exposes a raw get method for the session
+        @brief This exposes a raw get method for the session, paged responses
+               are followed and merged into a single response
+
+        @param self This object
+        @param commandurl the URL for the request
+        @param params a dictionary of parameters
+
+        @return a requests.Response object, if the JSON content was parsed
+                it is a PagedResponse holding the merged content of all pages
         """
-        response = self._session.get(
-            url=commandurl,
+        if self._cache is not None:
+            content = self._cache.get(commandurl, params)
+            if content is not None:
+                response = requests.Response()
+                response.status_code = 200
+                response.reason = 'OK'
+                response.url = commandurl
+                return PagedResponse(response, content)
+
+        response = None
+        content = None
+
+        for response, page in self._getpages(
+            commandurl=commandurl,
             params=params
-        )
+        ):
+            # Failed or non-JSON pages are returned as they are
+            if not response.ok or not isinstance(page, dict):
+                return response
 
-        # Do something about paged responses here
-        while 'paging' in response.json():
-            commandurl = (
-                self._baseaddress +
-                response.json()['paging']['baseUrl']
-            )
+            if content is None:
+                content = page
+            else:
+                mergepage(content, page)
 
-            params = {
-                'lastId': response.json()['paging']['lastId']
-            }
+        # The last page carries no cursor, so neither should the merged content
+        content.pop('paging', None)
 
-            if 'fields' in response.json()['paging']:
-                params['fields'] = response.json()['paging']['fields']
+        if self._cache is not None:
+            self._cache.put(commandurl, params, content)
 
-            nextresponse = self._get(
-                commandurl=commandurl,
-                params=params
-            )
+        return PagedResponse(response, content)
 
-            mockjson = {}
-            for key in nextresponse.json():
-                if key in ['paging', 'status']:
-                    mockjson[key] = nextresponse.json()[key]
-                else:
-                    if key in response.json():
-                        mockjson[key] = nextresponse.json()[key] + response.json()[key]
-                    else:
-                        mockjson[key] = nextresponse.json()[key]
+    def _iterget(
+        self,
+        commandurl: type=str,
+        params: Union[None, dict]=None,
+        collection: type=str
+    ):
+        """
+        @brief This iterates over the records of a collection in a paged GET request,
+               records are yielded page by page as they arrive
 
-            response = nextresponse
-            response._content = bytes(json.dumps(mockjson, indent=2, sort_keys=True), encoding='utf-8')
+        @param self This object
+        @param commandurl the URL for the request
+        @param params a dictionary of parameters
+        @param collection the key of the collection in the JSON content, e.g. 'quotas'
 
-        return response
+        @return a generator of the records in the collection, a failed or non-JSON page
+                raises a requests.exceptions.RequestException, so a stream that ends is complete
+        """
+        for response, page in self._getpages(
+            commandurl=commandurl,
+            params=params
+        ):
+            response.raise_for_status()
+            if not isinstance(page, dict):
+                raise requests.exceptions.RequestException(
+                    "Page of %s is not JSON" % response.url,
+                    response=response
+                )
+
+            for record in page.get(collection, []):
+                yield record
+
+    def _fanout(
+        self,
+        function: type=callable,
+        arguments: type=list,
+        workers: Union[int, None]=None
+    ):
+        """
+        @brief This calls a function once for each argument, concurrently on a
+               thread pool if max_inflight, summed over the servers of an ApiPool,
+               is greater than 1, a fan-out called from a worker of another runs
+               serially in that worker, so nesting never multiplies the threads
+
+        @param self This object
+        @param function the function to call with each argument
+        @param arguments a list of arguments
+        @param workers the number of calls run at once, default None, which is the max_inflight of all servers
+
+        @return a list of the results in the same order as the arguments
+        """
+        arguments = list(arguments)
+        if workers is None:
+            workers = self._max_fanout
+
+        if getattr(_FANOUTWORKER, 'active', False):
+            workers = 1
+
+        if workers > 1 and len(arguments) > 1:
+            with ThreadPoolExecutor(
+                max_workers=min(workers, len(arguments)),
+                initializer=_markfanoutworker
+            ) as executor:
+                return list(executor.map(function, arguments))
+
+        return [function(argument) for argument in arguments]
 
     def _post(
         self,
@@ -183,9 +492,12 @@ class Api:
         """
         @brief This exposes a raw post method for the internal session
         """
-        return self._session.post(
-            url=commandurl,
-            data=json.dumps(data)
+        return self._withretry(
+            'POST',
+            lambda: self._session.post(
+                url=commandurl,
+                data=json.dumps(data)
+            )
         )
 
     def _put(
@@ -196,9 +508,12 @@ class Api:
         """
         @brief This exposes a raw put method for the internal session
         """
-        return self._session.put(
-            url=commandurl,
-            data=json.dumps(data)
+        return self._withretry(
+            'PUT',
+            lambda: self._session.put(
+                url=commandurl,
+                data=json.dumps(data)
+            )
         )
 
     def _prepget(
@@ -282,6 +597,76 @@ class Api:
         self.warnings = []
         return warnings
 
+    def connectionstats(self):
+        """
+        @brief      Returns the connection reuse counts of the session's connection pools
+
+        @param      self  The object
+
+        @return     a dict with the number of connections created by the pools,
+                    requests sent, and requests sent on a reused pooled connection
+        """
+        stats = {
+            'connections': 0,
+            'requests': 0,
+            'reused': 0
+        }
+
+        for adapter in set(self._session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                stats['connections'] += pool.num_connections
+                stats['requests'] += pool.num_requests
+
+        stats['reused'] = max(0, stats['requests'] - stats['connections'])
+
+        return stats
+
+    def cachestats(self):
+        """
+        @brief      Returns the response cache counters
+
+        @param      self  The object
+
+        @return     a dict of cache counters, or None if the cache is disabled
+        """
+        stats = None
+        if self._cache is not None:
+            stats = self._cache.stats()
+
+        return stats
+
+    def retrystats(self):
+        """
+        @brief      Returns the retry counters
+
+        @param      self  The object
+
+        @return     a dict with the number of responses received, the requests 'retried' at least once,
+                    the 'retries' sent, and how many followed a 429 or 503, 'throttled', or a failed connection, 'errors'
+        """
+        with self._retrylock:
+            stats = {
+                'requests': 0,
+                'retried': 0,
+                'retries': 0,
+                'throttled': 0,
+                'errors': 0
+            }
+            stats.update(self._retrycounts)
+
+        return stats
+
+    def clearcache(self):
+        """
+        @brief      Drop all cached responses
+
+        @param      self  The object
+        """
+        if self._cache is not None:
+            self._cache.clear()
+
     def info(self):
         """
         @brief      Returns the response from the info command
@@ -318,6 +703,11 @@ class Api:
             response = jsonprepreq(preprequest)
             response['dryrun'] = True
         else:
-            response = self._session.send(preprequest)
+            response = self._withretry(
+                preprequest.method,
+                lambda: self._session.send(preprequest)
+            )
+            if self._cache is not None:
+                self._cache.invalidate(preprequest.url)
 
         return response
@@ -3,32 +3,40 @@ Methods for pyspectrumscale.Api that deal with access control lists (ACLs)
 
 WARNING: There are no 'all acls' queries in the Spectrum Scale API
 This means that all bulk operations require a query per path
-to retrieve their acl (two queries for a fileset).
+to retrieve their acl (two queries for a single fileset).
 
-Requesting all acls from a filesystem or all filesystems can take many minutes
+Bulk operations on a whole filesystem list the filesets once and reuse
+their paths, so they need one query per fileset plus one. The acl queries
+are sent concurrently if the Api was created with max_inflight > 1.
 """
 import sys
+from collections import OrderedDict
 from typing import Union
-from ._utils import truncsafepath
+from ._utils import fieldsparam, truncsafepath
 
 
-def get_acl(
+def _aclquery(
         self,
         filesystem: Union[str, None],
         path: Union[str, None],
-        allfields: bool=False
+        allfields: bool=False,
+        fields: Union[str, list, None]=None
 ):
     """
-    @brief      List all filesystems or return a specific filesystem
+    @brief      Build the URL and parameters to query the acl of a path
 
     @param      self        The object
-    @param      filesystem  The filesystem name, default None, which returns all filesystems
+    @param      filesystem  The filesystem name
+    @param      path        The path
+    @param      allfields   If true, all fields are requested
+    @param      fields      A field name, or list of field names, to return, overrides allfields
 
-    @return     The request response as a Response.requests object
+    @return     a tuple of the command URL and a dict of parameters
     """
     params = {}
-    if allfields is not None:
-        params['fields'] = ':all:'
+    fields = fieldsparam(allfields, fields)
+    if fields is not None:
+        params['fields'] = fields
 
     commandurl = "%s/filesystems/%s/acl/%s" % (
         self._baseurl,
@@ -36,12 +44,106 @@ def get_acl(
         truncsafepath(path)
     )
 
+    return commandurl, params
+
+
+def get_acl(
+        self,
+        filesystem: Union[str, None],
+        path: Union[str, None],
+        allfields: bool=False,
+        fields: Union[str, list, None]=None
+):
+    """
+    @brief      List all filesystems or return a specific filesystem
+
+    @param      self        The object
+    @param      filesystem  The filesystem name, default None, which returns all filesystems
+    @param      path        The path
+    @param      allfields   If true, all fields are returned
+    @param      fields      A field name, or list of field names, to return, e.g. ['entries'], overrides allfields
+
+    @return     The request response as a Response.requests object
+    """
+    commandurl, params = _aclquery(
+        self,
+        filesystem=filesystem,
+        path=path,
+        allfields=allfields,
+        fields=fields
+    )
+
     return self._get(
         commandurl,
         params=params
     )
 
 
+def _mergeacls(
+        index: type=OrderedDict,
+        aclresponse: Union[dict, list, None]=None
+):
+    """
+    @brief      Merge an acl, or list of acls, into a path keyed index of acls,
+                keeping the first acl seen for each path
+
+    @param      index        An OrderedDict of acls keyed by path, updated in place
+    @param      aclresponse  An acl dict, a list of acl dicts, or None
+
+    @return     the updated index
+    """
+    if aclresponse is None:
+        return index
+
+    if not isinstance(aclresponse, list):
+        aclresponse = [aclresponse]
+
+    for acl in aclresponse:
+        if acl['path'] not in index:
+            index[acl['path']] = acl
+
+    return index
+
+
+def _filesetacls(
+        self,
+        filesystem: str,
+        allfields: bool=False
+):
+    """
+    @brief      Get the acls of all filesets in a filesystem. The filesets are
+                listed once with all fields and their paths are reused, so this
+                needs one query per fileset plus one, sent concurrently if the
+                Api has max_inflight > 1
+
+    @param      self        The object
+    @param      filesystem  The filesystem
+    @param      allfields   If true, all acl fields are requested
+
+    @return     a list of (fileset, acl) tuples in fileset order, the acl is None
+                if it could not be retrieved
+    """
+    filesets = []
+
+    fsresponse = self.get_fileset(
+        filesystem=filesystem,
+        allfields=True
+    )
+    if fsresponse.ok:
+        filesets = fsresponse.json()['filesets']
+
+    acls = self._fanout(
+        lambda fs: self.acl(
+            filesystem=filesystem,
+            path=fs['config']['path'],
+            allfields=allfields
+        ),
+        filesets
+    )
+
+    return list(zip(filesets, acls))
+
+
 def acl(
         self,
         filesystem: Union[str, None],
@@ -81,16 +183,13 @@ def acl(
                 acl = response.json()['acl']
                 # tag the acl with the path
                 acl['path'] = path
-    else:
+    elif fileset is None:
         acl = []
-        for fileset in self.list_filesets(
-            filesystem=filesystem
-        ):
-            aclresponse = self.acl(
+        for fs, aclresponse in _filesetacls(
+                self,
                 filesystem=filesystem,
-                fileset=fileset,
                 allfields=allfields
-            )
+        ):
             if aclresponse is not None:
                 acl.append(aclresponse)
 
@@ -127,13 +226,16 @@ def acls(
             allfields=allfields
         )
     elif isinstance(filesystems, list):
-        for fs in filesystems:
-            aclresponse = self.acls(
+        aclresponses = self._fanout(
+            lambda fs: self.acls(
                 filesystems=fs,
                 filesets=filesets,
                 paths=paths,
                 allfields=allfields
-            )
+            ),
+            filesystems
+        )
+        for aclresponse in aclresponses:
             if isinstance(aclresponse, list):
                 acls += aclresponse
             else:
@@ -141,123 +243,61 @@ def acls(
                     acls.append(aclresponse)
     else:
         # The trick here is to parse paths and filesets without duplicating the acls
-        # So do filesets first, then paths, but check we don't already have that acl
+        # So do filesets first, then paths, indexed by path so the first acl seen is kept
+        index = OrderedDict()
+
         if filesets is not None:
             if isinstance(filesets, list):
-                for fs in filesets:
-                    fsresponse = self.acl(
+                fsresponses = self._fanout(
+                    lambda fs: self.acl(
                         filesystem=filesystems,
                         fileset=fs,
                         allfields=allfields
-                    )
-                    if isinstance(fsresponse, list):
-                        for acl in fsresponse:
-                            matches = next(
-                                (item for item in acls if item['path'] == acl['path']),
-                                None
-                            )
-                            if matches is None:
-                                acls.append(acl)
-                    else:
-                        if fsresponse is not None:
-                            matches = next(
-                                (item for item in acls if item['path'] == fsresponse['path']),
-                                None
-                            )
-                            if matches is None:
-                                acls.append(fsresponse)
-            else:
-                fsresponse = self.acl(
-                    filesystem=filesystems,
-                    fileset=filesets,
-                    allfields=allfields
+                    ),
+                    filesets
                 )
-                if isinstance(fsresponse, list):
-                    for acl in fsresponse:
-                        matches = next(
-                            (item for item in acls if item['path'] == acl['path']),
-                            None
-                        )
-                        if matches is None:
-                            acls.append(acl)
-                else:
-                    if fsresponse is not None:
-                        matches = next(
-                            (item for item in acls if item['path'] == fsresponse['path']),
-                            None
-                        )
-                        if matches is None:
-                            acls.append(fsresponse)
+            else:
+                fsresponses = [
+                    self.acl(
+                        filesystem=filesystems,
+                        fileset=filesets,
+                        allfields=allfields
+                    )
+                ]
+            for fsresponse in fsresponses:
+                _mergeacls(index, fsresponse)
+
         if paths is not None:
             if isinstance(paths, list):
-                for path in filesets:
-                    pathresponse = self.acl(
+                pathresponses = self._fanout(
+                    lambda path: self.acl(
                         filesystem=filesystems,
                         path=path,
                         allfields=allfields
-                    )
-                    if isinstance(pathresponse, list):
-                        for acl in pathresponse:
-                            matches = next(
-                                (item for item in acls if item['path'] == acl['path']),
-                                None
-                            )
-                            if matches is None:
-                                acls.append(acl)
-                    else:
-                        if pathresponse is not None:
-                            matches = next(
-                                (item for item in acls if item['path'] == pathresponse['path']),
-                                None
-                            )
-                            if matches is None:
-                                acls.append(pathresponse)
+                    ),
+                    paths
+                )
             else:
-                pathresponse = self.acl(
+                pathresponses = [
+                    self.acl(
+                        filesystem=filesystems,
+                        path=paths,
+                        allfields=allfields
+                    )
+                ]
+            for pathresponse in pathresponses:
+                _mergeacls(index, pathresponse)
+
+        if not paths and not filesets:
+            _mergeacls(
+                index,
+                self.acl(
                     filesystem=filesystems,
-                    path=paths,
                     allfields=allfields
                 )
-                if isinstance(pathresponse, list):
-                    for acl in pathresponse:
-                        matches = next(
-                            (item for item in acls if item['path'] == acl['path']),
-                            None
-                        )
-                        if matches is None:
-                            acls.append(acl)
-                else:
-                    if pathresponse is not None:
-                        matches = next(
-                            (item for item in acls if item['path'] == pathresponse['path']),
-                            None
-                        )
-                        if matches is None:
-                            acls.append(pathresponse)
-
-        if not paths and not filesets:
-            fsresponse = self.acls(
-                filesystems=filesystems,
-                filesets=self.list_filesets(filesystems),
-                allfields=allfields
             )
-            if isinstance(fsresponse, list):
-                for acl in fsresponse:
-                    matches = next(
-                        (item for item in acls if item['path'] == acl['path']),
-                        None
-                    )
-                    if matches is None:
-                        acls.append(acl)
-            else:
-                if fsresponse is not None:
-                    matches = next(
-                        (item for item in acls if item['path'] == fsresponse['path']),
-                        None
-                    )
-                    if matches is None:
-                        acls.append(fsresponse)
 
+        acls = list(index.values())
 
     if not acls:
         acls = None
@@ -268,6 +308,73 @@ def acls(
     return acls
 
 
+def iter_acls(
+        self,
+        filesystems: Union[str, list, None]=None,
+        filesets: Union[str, list, None]=None,
+        paths: Union[str, list, None]=None,
+        allfields: bool=False
+):
+    """
+    @brief      This method yields matching acls one at a time, as the filesets
+                are returned page by page by the API. Each acl is tagged with its
+                path and is only yielded once per filesystem.
+
+    @param      self         The object
+    @param      filesystems  The filesystem, or list of filesystems, default None, which queries all filesystems
+    @param      filesets     The fileset, or list of filesets
+    @param      paths        The path, or list of paths
+    @param      allfields    If true, all fields are requested
+
+    @return     a generator of acl dicts
+    """
+
+    if filesystems is None:
+        filesystems = self.list_filesystems()
+    elif not isinstance(filesystems, list):
+        filesystems = [filesystems]
+
+    if filesets is not None and not isinstance(filesets, list):
+        filesets = [filesets]
+
+    if paths is not None and not isinstance(paths, list):
+        paths = [paths]
+
+    for filesystem in filesystems:
+        seen = set()
+
+        pathlists = [paths or []]
+
+        # Fileset paths come first, without filesets or paths
+        # the paths of all filesets are used
+        if filesets or not paths:
+            pathlists.insert(
+                0,
+                (
+                    fs['config']['path']
+                    for fs in self.iter_filesets(
+                        filesystems=filesystem,
+                        filesets=filesets,
+                        allfields=True
+                    )
+                )
+            )
+
+        for pathlist in pathlists:
+            for path in pathlist:
+                if path in seen:
+                    continue
+                seen.add(path)
+
+                acl = self.acl(
+                    filesystem=filesystem,
+                    path=path,
+                    allfields=allfields
+                )
+                if acl is not None:
+                    yield acl
+
+
 def list_acls(
         self,
         filesystem: Union[str, None]
@@ -281,34 +388,18 @@ def list_acls(
     @return     { description_of_the_return_value }
     """
 
-    filesets = self.fileset(
-        filesystem=filesystem,
-        allfields=True
-    )
-
     acls = {}
 
-    if isinstance(filesets, list):
-        for fileset in filesets:
-            summary = {
-                'path': fileset['config']['path']
-            }
-            summary['acl'] = self.acl(
-                filesystem=filesystem,
-                path=fileset['config']['path'],
-                allfields=True
-            )
-            acls[fileset['filesetName']] = summary
-    elif filesets is not None:
-        summary = {
-            'path': filesets['config']['path']
-        }
-        summary['acl'] = self.acl(
+    for fileset, acl in _filesetacls(
+            self,
             filesystem=filesystem,
-            path=filesets['config']['path'],
             allfields=True
-        )
-        acls[filesets['filesetName']] = summary
+    ):
+        summary = {
+            'path': fileset['config']['path']
+        }
+        summary['acl'] = acl
+        acls[fileset['filesetName']] = summary
 
     return acls
 
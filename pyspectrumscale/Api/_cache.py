@@ -0,0 +1,247 @@
+"""
+A read-through cache of parsed responses for pyspectrumscale.Api
+
+Entries are keyed by URL and parameters, expire after a time to live
+that can be set per endpoint, and the least recently used entries are
+evicted when the cache is full. Writes sent through Api.send() invalidate
+the cached entries of the resource they change.
+"""
+import copy
+import threading
+import time
+import urllib.parse
+from collections import OrderedDict
+from typing import Union
+
+# The endpoints of the Spectrum Scale Management API that are cached
+ENDPOINTS = [
+    'info',
+    'config',
+    'filesystems',
+    'filesets',
+    'acl',
+    'quotas',
+    'jobs'
+]
+
+# Time to live in seconds, 'default' applies to endpoints without their own,
+# job status changes while we watch it, so it is not cached by default
+DEFAULTTTL = {
+    'default': 60,
+    'jobs': 0
+}
+
+
+def resource(
+        commandurl: type=str
+):
+    """
+    @brief      Find the filesystem and endpoint a request URL refers to, by the
+                position of the segments, as a fileset or path can be named like
+                an endpoint, e.g. /filesystems/gpfs0/filesets/jobs is a fileset
+
+    @param      commandurl  The URL of the request
+
+    @return     a tuple of the filesystem name, or None, and the endpoint, or None
+    """
+    filesystem = None
+    endpoint = None
+
+    segments = urllib.parse.urlparse(commandurl).path.split('/')
+    if 'scalemgmt' not in segments:
+        return filesystem, endpoint
+
+    # The segments after /scalemgmt/<version>
+    segments = segments[segments.index('scalemgmt') + 2:]
+
+    if segments and segments[0] in ENDPOINTS:
+        endpoint = segments[0]
+
+    if endpoint == 'filesystems' and len(segments) > 1:
+        filesystem = segments[1]
+        # /filesystems/<filesystem>/<endpoint>
+        if len(segments) > 2 and segments[2] in ENDPOINTS:
+            endpoint = segments[2]
+        # /filesystems/<filesystem>/filesets/<fileset>/<endpoint>
+        if endpoint == 'filesets' and len(segments) > 4 and segments[4] in ENDPOINTS:
+            endpoint = segments[4]
+
+    return filesystem, endpoint
+
+
+class ResponseCache:
+    """
+    A size bounded cache of parsed JSON responses with a time to live
+    """
+
+    def __init__(
+            self,
+            ttl: Union[int, dict, None]=None,
+            maxsize: int=1024
+    ):
+        """
+        @brief      Initiator of the ResponseCache class
+
+        @param      self     The object
+        @param      ttl      The time to live in seconds, for endpoints without their own in DEFAULTTTL,
+                             or a dict of endpoint names, and 'default', to time to live
+        @param      maxsize  The maximum number of cached responses
+        """
+        self._ttl = dict(DEFAULTTTL)
+        if isinstance(ttl, dict):
+            self._ttl.update(ttl)
+        elif ttl is not None:
+            # A single time to live does not start caching job status
+            self._ttl['default'] = ttl
+
+        self._maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def key(
+            commandurl: type=str,
+            params: Union[None, dict]=None
+    ):
+        """
+        @brief      The cache key of a request
+
+        @param      commandurl  The URL of the request
+        @param      params      The parameters of the request
+
+        @return     a hashable key
+        """
+        return (
+            commandurl,
+            tuple(sorted((params or {}).items()))
+        )
+
+    def ttl(
+            self,
+            commandurl: type=str
+    ):
+        """
+        @brief      The time to live for the endpoint of a request URL
+
+        @param      self        The object
+        @param      commandurl  The URL of the request
+
+        @return     the time to live in seconds
+        """
+        endpoint = resource(commandurl)[1]
+        return self._ttl.get(endpoint, self._ttl.get('default', 0))
+
+    def get(
+            self,
+            commandurl: type=str,
+            params: Union[None, dict]=None
+    ):
+        """
+        @brief      Get a cached response
+
+        @param      self        The object
+        @param      commandurl  The URL of the request
+        @param      params      The parameters of the request
+
+        @return     a copy of the cached JSON content, or None on a miss
+        """
+        key = self.key(commandurl, params)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+
+        # Callers may change the content, so they get their own copy
+        return copy.deepcopy(entry[1])
+
+    def put(
+            self,
+            commandurl: type=str,
+            params: Union[None, dict]=None,
+            content: type=dict
+    ):
+        """
+        @brief      Cache a response, unless its endpoint has no time to live
+
+        @param      self        The object
+        @param      commandurl  The URL of the request
+        @param      params      The parameters of the request
+        @param      content     The JSON content of the response
+        """
+        ttl = self.ttl(commandurl)
+        if not ttl or self._maxsize < 1:
+            return
+
+        key = self.key(commandurl, params)
+        entry = (time.monotonic() + ttl, copy.deepcopy(content))
+
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(
+            self,
+            commandurl: type=str
+    ):
+        """
+        @brief      Drop the cached responses of the resource a write request changes,
+                    that is all responses from the same endpoint of the same filesystem,
+                    and all responses for URLs below the request URL
+
+        @param      self        The object
+        @param      commandurl  The URL of the write request
+        """
+        filesystem, endpoint = resource(commandurl)
+
+        with self._lock:
+            for key in list(self._entries):
+                if (
+                        key[0].startswith(commandurl) or
+                        resource(key[0]) == (filesystem, endpoint)
+                ):
+                    del self._entries[key]
+                    self.invalidations += 1
+
+    def clear(self):
+        """
+        @brief      Drop all cached responses
+
+        @param      self  The object
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """
+        @brief      The cache counters
+
+        @param      self  The object
+
+        @return     a dict of the hit, miss, eviction and invalidation counts,
+                    and the number of cached responses
+        """
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'entries': len(self._entries)
+            }
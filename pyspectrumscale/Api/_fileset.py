@@ -3,26 +3,32 @@ Methods for pyspectrumscale.Api that deal with filesets
 """
 from typing import Union
 import json
+from ._utils import fieldsparam
 
 
-def get_fileset(
+def _filesetquery(
         self,
         filesystem: Union[str, None],
         fileset: Union[str, None]=None,
-        allfields: Union[bool, None]=None
+        allfields: Union[bool, None]=None,
+        fields: Union[str, list, None]=None
 ):
     """
-    @brief      List all filesets or return a specific fileset from a filesystem
+    @brief      Build the URL and parameters to query filesets
 
     @param      self        The object
-    @param      filesystem  The filesystem name, default None, which returns all filesystems
+    @param      filesystem  The filesystem name
+    @param      fileset     The fileset name, default None, which queries all filesets
+    @param      allfields   If true, all fields are requested
+    @param      fields      A field name, or list of field names, to return, overrides allfields
 
-    @return     The request response as a Response.requests object
+    @return     a tuple of the command URL and a dict of parameters
     """
 
     params = {}
-    if allfields is not None:
-        params['fields'] = ':all:'
+    fields = fieldsparam(allfields, fields)
+    if fields is not None:
+        params['fields'] = fields
 
     if fileset is not None:
         commandurl = "%s/filesystems/%s/filesets/%s" % (
@@ -36,6 +42,36 @@ def get_fileset(
             filesystem
         )
 
+    return commandurl, params
+
+
+def get_fileset(
+        self,
+        filesystem: Union[str, None],
+        fileset: Union[str, None]=None,
+        allfields: Union[bool, None]=None,
+        fields: Union[str, list, None]=None
+):
+    """
+    @brief      List all filesets or return a specific fileset from a filesystem
+
+    @param      self        The object
+    @param      filesystem  The filesystem name, default None, which returns all filesystems
+    @param      fileset     The fileset name, default None, which returns all filesets
+    @param      allfields   If true, all fields are returned
+    @param      fields      A field name, or list of field names, to return, e.g. ['filesetName', 'config.path'], overrides allfields
+
+    @return     The request response as a Response.requests object
+    """
+
+    commandurl, params = _filesetquery(
+        self,
+        filesystem=filesystem,
+        fileset=fileset,
+        allfields=allfields,
+        fields=fields
+    )
+
     return self._get(
         commandurl,
         params=params
@@ -82,15 +118,20 @@ def fileset(
         if acl or quota or owner:
             updatedfs = []
 
-            for fs in response:
-                if acl:
-                    fsacl = self.acl(
+            fsacls = [None] * len(response)
+            if acl:
+                fsacls = self._fanout(
+                    lambda fs: self.acl(
                         filesystem=fs['filesystemName'],
                         path=fs['config']['path'],
                         allfields=allfields
-                    )
-                    if fsacl:
-                        fs['config']['acl'] = fsacl
+                    ),
+                    response
+                )
+
+            for fs, fsacl in zip(response, fsacls):
+                if fsacl:
+                    fs['config']['acl'] = fsacl
 
                 updatedfs.append(fs)
 
@@ -132,8 +173,8 @@ def filesets(
             allfields=allfields
         )
     elif isinstance(filesystems, list):
-        for fs in filesystems:
-            fsresponse = self.filesets(
+        fsresponses = self._fanout(
+            lambda fs: self.filesets(
                 filesystems=fs,
                 filesets=filesets,
                 allfields=allfields,
@@ -141,7 +182,10 @@ def filesets(
                 owner=owner,
                 quota=quota,
                 everything=everything
-            )
+            ),
+            filesystems
+        )
+        for fsresponse in fsresponses:
             if isinstance(fsresponse, list):
                 response += fsresponse
             else:
@@ -149,8 +193,8 @@ def filesets(
                     response.append(fsresponse)
     else:
         if isinstance(filesets, list):
-            for fs in filesets:
-                fsresponse = self.fileset(
+            fsresponses = self._fanout(
+                lambda fs: self.fileset(
                     filesystem=filesystems,
                     fileset=fs,
                     allfields=allfields,
@@ -158,7 +202,10 @@ def filesets(
                     owner=owner,
                     quota=quota,
                     everything=everything
-                )
+                ),
+                filesets
+            )
+            for fsresponse in fsresponses:
                 if isinstance(fsresponse, list):
                     response += fsresponse
                 else:
@@ -190,6 +237,69 @@ def filesets(
     return response
 
 
+def iter_filesets(
+        self,
+        filesystems: Union[str, list, None]=None,
+        filesets: Union[str, list, None]=None,
+        allfields: Union[bool, None]=None,
+        acl: bool=False,
+        fields: Union[str, list, None]=None
+):
+    """
+    @brief      This method yields matching filesets one at a time, page by page as
+                they are returned by the API, without holding the full list in memory
+
+    @param      self         The object
+    @param      filesystems  The filesystem, or list of filesystems, default None, which queries all filesystems
+    @param      filesets     The fileset, or list of filesets, default None, which queries all filesets
+    @param      allfields    If true, all fields are requested
+    @param      acl          If true, the ACL of each fileset is added to its config, and filesystemName and config.path to fields
+    @param      fields       A field name, or list of field names, to return, overrides allfields
+
+    @return     a generator of fileset dicts
+    """
+
+    if filesystems is None:
+        filesystems = self.list_filesystems()
+    elif not isinstance(filesystems, list):
+        filesystems = [filesystems]
+
+    if not isinstance(filesets, list):
+        filesets = [filesets]
+
+    # The ACL of a fileset is found by its filesystem and path
+    if acl and fields:
+        if isinstance(fields, str):
+            fields = fields.split(',')
+        fields = list(fields) + ['filesystemName', 'config.path']
+
+    for filesystem in filesystems:
+        for fileset in filesets:
+            commandurl, params = _filesetquery(
+                self,
+                filesystem=filesystem,
+                fileset=fileset,
+                allfields=allfields,
+                fields=fields
+            )
+
+            for fs in self._iterget(
+                commandurl,
+                params=params,
+                collection='filesets'
+            ):
+                if acl:
+                    fsacl = self.acl(
+                        filesystem=fs['filesystemName'],
+                        path=fs['config']['path'],
+                        allfields=allfields
+                    )
+                    if fsacl:
+                        fs['config']['acl'] = fsacl
+
+                yield fs
+
+
 def list_filesets(
         self,
         filesystem: Union[str, None],
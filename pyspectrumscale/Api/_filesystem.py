@@ -2,20 +2,27 @@
 pyspectrumscale.api methods for filesystems
 """
 from typing import Union
+from ._utils import fieldsparam
 
 
-def get_filesystem(
+def _filesystemquery(
         self,
-        filesystem: Union[str, None]=None
+        filesystem: Union[str, None]=None,
+        fields: Union[str, list, None]=None
 ):
     """
-    @brief      List all filesystems or return a specific filesystem
+    @brief      Build the URL and parameters to query filesystems
 
     @param      self        The object
-    @param      filesystem  The filesystem name, default None, which returns all filesystems
+    @param      filesystem  The filesystem name, default None, which queries all filesystems
+    @param      fields      A field name, or list of field names, to return
 
-    @return     The request response as a Response.requests object
+    @return     a tuple of the command URL and a dict of parameters
     """
+    params = {}
+    if fields:
+        params['fields'] = fieldsparam(fields=fields)
+
     if filesystem:
         commandurl = "%s/filesystems/%s" % (
             self._baseurl,
@@ -24,7 +31,33 @@ def get_filesystem(
     else:
         commandurl = "%s/filesystems" % self._baseurl
 
-    return self._get(commandurl)
+    return commandurl, params
+
+
+def get_filesystem(
+        self,
+        filesystem: Union[str, None]=None,
+        fields: Union[str, list, None]=None
+):
+    """
+    @brief      List all filesystems or return a specific filesystem
+
+    @param      self        The object
+    @param      filesystem  The filesystem name, default None, which returns all filesystems
+    @param      fields      A field name, or list of field names, to return, default None, which returns the default fields
+
+    @return     The request response as a Response.requests object
+    """
+    commandurl, params = _filesystemquery(
+        self,
+        filesystem=filesystem,
+        fields=fields
+    )
+
+    return self._get(
+        commandurl,
+        params=params
+    )
 
 
 def list_filesystems(
@@ -93,9 +126,10 @@ def filesystems(
     if filesystems is None:
         fslist = self.filesystems(self.list_filesystems())
     elif isinstance(filesystems, list):
-        for fs in filesystems:
-            if fs:
-                fslist.append(self.filesystem(fs))
+        fslist = self._fanout(
+            self.filesystem,
+            [fs for fs in filesystems if fs]
+        )
     else:
         fslist.append(self.filesystem(filesystems))
 
@@ -2,21 +2,32 @@
 Methods for pyspectrumscale.Api that deal with jobs running on the Scale server
 """
 from typing import Union
+from ._utils import fieldsparam
 
 
-def get_jobs(
+def _jobquery(
         self,
-        jobid: Union[str, None]=None
+        jobid: Union[str, None]=None,
+        fields: Union[str, list, None]=None,
+        filter: Union[None, str]=None
 ):
     """
-    @brief      Gets the job.
+    @brief      Build the URL and parameters to query jobs
 
     @param      self   The object
-    @param      jobid  The jobid
+    @param      jobid  The jobid, default None, which queries all jobs
+    @param      fields A field name, or list of field names, to return
+    @param      filter A filter string for the jobs query, e.g. 'jobId>=1000'
 
-    @return     The job.
+    @return     a tuple of the command URL and a dict of parameters
     """
 
+    params = {}
+    if fields:
+        params['fields'] = fieldsparam(fields=fields)
+    if filter is not None:
+        params['filter'] = filter
+
     if jobid is not None:
         commandurl = "%s/jobs/%s" % (
             self._baseurl,
@@ -27,7 +38,37 @@ def get_jobs(
             self._baseurl
         )
 
-    return self._get(commandurl)
+    return commandurl, params
+
+
+def get_jobs(
+        self,
+        jobid: Union[str, None]=None,
+        fields: Union[str, list, None]=None,
+        filter: Union[None, str]=None
+):
+    """
+    @brief      Gets the job.
+
+    @param      self   The object
+    @param      jobid  The jobid
+    @param      fields A field name, or list of field names, to return, default None, which returns the default fields
+    @param      filter A filter string for the jobs query, e.g. 'jobId>=1000'
+
+    @return     The job.
+    """
+
+    commandurl, params = _jobquery(
+        self,
+        jobid=jobid,
+        fields=fields,
+        filter=filter
+    )
+
+    return self._get(
+        commandurl,
+        params=params
+    )
 
 
 def job(
@@ -84,6 +125,42 @@ def jobs(
     return response
 
 
+def iter_jobs(
+        self,
+        jobids: Union[str, list, None]=None,
+        fields: Union[str, list, None]=None,
+        filter: Union[None, str]=None
+):
+    """
+    @brief      This method yields matching jobs one at a time, page by page as
+                they are returned by the API, without holding the full list in memory
+
+    @param      self    The object
+    @param      jobids  The jobid, or list of jobids, default None, which queries all jobs
+    @param      fields  A field name, or list of field names, to return, default None, which returns the default fields
+    @param      filter  A filter string for the jobs query, e.g. 'jobId>=1000'
+
+    @return     a generator of job dicts
+    """
+
+    if not isinstance(jobids, list):
+        jobids = [jobids]
+
+    for jobid in jobids:
+        commandurl, params = _jobquery(
+            self,
+            jobid=jobid,
+            fields=fields,
+            filter=filter
+        )
+
+        yield from self._iterget(
+            commandurl,
+            params=params,
+            collection='jobs'
+        )
+
+
 def list_jobs(
         self,
         jobids: Union[str, None]=None
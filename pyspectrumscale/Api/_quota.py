@@ -2,29 +2,57 @@
 Methods for pyspectrumscale.Api that deal with quotas
 """
 import sys
+from collections import OrderedDict
 from typing import Union
-from ._utils import blocktoint, inodetoint, validgracestr
-
-
-def get_quota(
+from ._utils import blocktoint, fieldsparam, inodetoint, validgracestr
+
+# The setQuota limits, as the keyword arguments of preppost_quota
+QUOTALIMITS = [
+    'blocksoftlimit',
+    'blockhardlimit',
+    'blockgraceperiod',
+    'filessoftlimit',
+    'fileshardlimit',
+    'filesgraceperiod'
+]
+
+# The field of a quota reported by the API that each setQuota field is compared
+# with, and the factor that converts the reported value to the units of the
+# setQuota field, block limits are reported in KiB, grace periods are strings
+QUOTAFIELDS = {
+    'blockSoftLimit': ('blockQuota', 1024),
+    'blockHardLimit': ('blockLimit', 1024),
+    'filesSoftLimit': ('filesQuota', 1),
+    'filesHardLimit': ('filesLimit', 1),
+    'blockGracePeriod': ('blockGrace', None),
+    'filesGracePeriod': ('filesGrace', None)
+}
+
+
+def _quotaquery(
         self,
         filesystem: str,
         fileset: Union[str, None]=None,
         filter: Union[None, str]=None,
-        allfields: bool=False
+        allfields: bool=False,
+        fields: Union[str, list, None]=None
 ):
     """
-    @brief      List all quotas or return a specific quota for a fileset
+    @brief      Build the URL and parameters to query quotas
 
     @param      self        The object
     @param      filesystem  The filesystem name
-    @param      fileset The fileset to get quotas from, if none gets all quotas from the filesystem
+    @param      fileset     The fileset to get quotas from, if none gets all quotas from the filesystem
+    @param      filter      A filter string for the quota query
+    @param      allfields   If true, all fields are requested
+    @param      fields      A field name, or list of field names, to return, overrides allfields
 
-    @return     The request response as a Response.requests object
+    @return     a tuple of the command URL and a dict of parameters
     """
     params = {}
-    if allfields is not None:
-        params['fields'] = ':all:'
+    fields = fieldsparam(allfields, fields)
+    if fields is not None:
+        params['fields'] = fields
     if filter is not None:
             params['filter'] = filter
 
@@ -40,6 +68,182 @@ def get_quota(
             filesystem
         )
 
+    return commandurl, params
+
+
+def _quotadata(
+        fileset: Union[None, str]=None,
+        blocksoftlimit: Union[None, str, int]=None,
+        blockhardlimit: Union[None, str, int]=None,
+        blockgraceperiod: Union[None, str]=None,
+        filessoftlimit: Union[None, str, int]=None,
+        fileshardlimit: Union[None, str, int]=None,
+        filesgraceperiod: Union[None, str]=None,
+        quotatype: Union[None, str]="FILESET"
+):
+    """
+    @brief      Validate quota limits and build the data of a setQuota request
+
+    @param      fileset           The fileset
+    @param      blocksoftlimit    The blocksoftlimit
+    @param      blockhardlimit    The blockhardlimit
+    @param      blockgraceperiod  The blockgraceperiod
+    @param      filessoftlimit    The filessoftlimit
+    @param      fileshardlimit    The fileshardlimit
+    @param      filesgraceperiod  The filesgraceperiod
+    @param      quotatype         The quotatype
+
+    @return     a tuple of the request data dict and a list of the reasons the
+                limits are invalid, which is empty if they are valid
+    """
+    reasons = []
+
+    # Convert parameters to int, str() so an int 0 is read as a limit
+    blocksoftint = None
+    blockhardint = None
+    filessoftint = None
+    fileshardint = None
+    if blocksoftlimit is not None:
+        blocksoftint = blocktoint(str(blocksoftlimit))
+        if blocksoftint is None:
+            reasons.append("Soft block limit (%s) is not valid" % blocksoftlimit)
+    if blockhardlimit is not None:
+        blockhardint = blocktoint(str(blockhardlimit))
+        if blockhardint is None:
+            reasons.append("Hard block limit (%s) is not valid" % blockhardlimit)
+    if filessoftlimit is not None:
+        filessoftint = inodetoint(str(filessoftlimit))
+        if filessoftint is None:
+            reasons.append("Soft inode limit (%s) is not valid" % filessoftlimit)
+    if fileshardlimit is not None:
+        fileshardint = inodetoint(str(fileshardlimit))
+        if fileshardint is None:
+            reasons.append("Hard inode limit (%s) is not valid" % fileshardlimit)
+    if blockgraceperiod is not None and not validgracestr(blockgraceperiod):
+        reasons.append("Block grace period (%s) is not valid" % blockgraceperiod)
+    if filesgraceperiod is not None and not validgracestr(filesgraceperiod):
+        reasons.append("Inode grace period (%s) is not valid" % filesgraceperiod)
+
+    # Is soft block quota < hard block quota
+    # and they both aren't 0
+    if blocksoftint is not None:
+        if blockhardint is not None:
+            if blocksoftint != 0 and blockhardint != 0:
+                if blocksoftint >= blockhardint:
+                    reason = (
+                        "Soft block limit (%s) is not"
+                        " less than block hard limit (%s)" %
+                        (
+                            blocksoftlimit,
+                            blockhardlimit
+                        )
+                    )
+                    reasons.append(reason)
+
+    # Is soft inode quota < hard inode quota
+    # and they both aren't 0
+    if filessoftint is not None:
+        if fileshardint is not None:
+            if filessoftint != 0 and fileshardint != 0:
+                if filessoftint >= fileshardint:
+                    reason = (
+                        "Soft inode limit (%s) is not"
+                        " less than inode hard limit (%s)" %
+                        (
+                            filessoftlimit,
+                            fileshardlimit
+                        )
+                    )
+                    reasons.append(reason)
+
+    data = {
+        'operationType': 'setQuota',
+        'quotaType': quotatype,
+    }
+
+    if fileset is not None:
+        data['objectName'] = fileset
+
+    if blocksoftint is not None:
+        data['blockSoftLimit'] = blocksoftint
+
+    if blockhardint is not None:
+        data['blockHardLimit'] = blockhardint
+
+    if filessoftint is not None:
+        data['filesSoftLimit'] = filessoftint
+
+    if fileshardint is not None:
+        data['filesHardLimit'] = fileshardint
+
+    if filesgraceperiod is not None:
+        data['filesGracePeriod'] = filesgraceperiod
+
+    if blockgraceperiod is not None:
+        data['blockGracePeriod'] = blockgraceperiod
+
+    return data, reasons
+
+
+def _quotachanged(
+        current: type=dict,
+        data: type=dict
+):
+    """
+    @brief      Check if a setQuota request would change a quota
+
+    @param      current  The quota dict reported by the API
+    @param      data     The data of the setQuota request
+
+    @return     True if any limit in the request differs from the quota
+    """
+    for key, (field, factor) in QUOTAFIELDS.items():
+        if key not in data:
+            continue
+
+        value = current.get(field)
+        if value is None:
+            return True
+
+        if factor is None:
+            # Grace periods may be reported as e.g. '7 days'
+            if str(value).replace(' ', '').lower() != data[key].lower():
+                return True
+        elif int(value) * factor != data[key]:
+            return True
+
+    return False
+
+
+def get_quota(
+        self,
+        filesystem: str,
+        fileset: Union[str, None]=None,
+        filter: Union[None, str]=None,
+        allfields: bool=False,
+        fields: Union[str, list, None]=None
+):
+    """
+    @brief      List all quotas or return a specific quota for a fileset
+
+    @param      self        The object
+    @param      filesystem  The filesystem name
+    @param      fileset The fileset to get quotas from, if none gets all quotas from the filesystem
+    @param      filter      A filter string for the quota query
+    @param      allfields   If true, all fields are returned
+    @param      fields      A field name, or list of field names, to return, e.g. ['objectName', 'blockUsage'], overrides allfields
+
+    @return     The request response as a Response.requests object
+    """
+    commandurl, params = _quotaquery(
+        self,
+        filesystem=filesystem,
+        fileset=fileset,
+        filter=filter,
+        allfields=allfields,
+        fields=fields
+    )
+
     return self._get(
         commandurl,
         params=params
@@ -106,13 +310,16 @@ def quotas(
             allfields=allfields
         )
     elif isinstance(filesystems, list):
-        for fs in filesystems:
-            fsresponse = self.quotas(
+        fsresponses = self._fanout(
+            lambda fs: self.quotas(
                 filesystems=fs,
                 filesets=filesets,
                 filter=filter,
                 allfields=allfields
-            )
+            ),
+            filesystems
+        )
+        for fsresponse in fsresponses:
             if isinstance(fsresponse, list):
                 response += fsresponse
             else:
@@ -120,13 +327,16 @@ def quotas(
                     response.append(fsresponse)
     else:
         if isinstance(filesets, list):
-            for fs in filesets:
-                fsresponse = self.quota(
+            fsresponses = self._fanout(
+                lambda fs: self.quota(
                     filesystem=filesystems,
                     fileset=fs,
                     filter=filter,
                     allfields=allfields
-                )
+                ),
+                filesets
+            )
+            for fsresponse in fsresponses:
                 if isinstance(fsresponse, list):
                     response += fsresponse
                 else:
@@ -154,6 +364,53 @@ def quotas(
 
     return response
 
+def iter_quotas(
+        self,
+        filesystems: Union[str, list, None]=None,
+        filesets: Union[str, list, None]=None,
+        filter: Union[None, str]=None,
+        allfields: Union[bool, None]=None,
+        fields: Union[str, list, None]=None
+):
+    """
+    @brief      This method yields matching quotas one at a time, page by page as
+                they are returned by the API, without holding the full list in memory
+
+    @param      self         The object
+    @param      filesystems  The filesystem, or list of filesystems, default None, which queries all filesystems
+    @param      filesets     The fileset, or list of filesets, default None, which queries all quotas of the filesystem
+    @param      filter       A filter string for the quota query
+    @param      allfields    If true, all fields are requested
+    @param      fields       A field name, or list of field names, to return, overrides allfields
+
+    @return     a generator of quota dicts
+    """
+
+    if filesystems is None:
+        filesystems = self.list_filesystems()
+    elif not isinstance(filesystems, list):
+        filesystems = [filesystems]
+
+    if not isinstance(filesets, list):
+        filesets = [filesets]
+
+    for filesystem in filesystems:
+        for fileset in filesets:
+            commandurl, params = _quotaquery(
+                self,
+                filesystem=filesystem,
+                fileset=fileset,
+                filter=filter,
+                allfields=allfields,
+                fields=fields
+            )
+
+            yield from self._iterget(
+                commandurl,
+                params=params,
+                collection='quotas'
+            )
+
 ## WARNING: The following methods can wite to the Spectrum Scale filsystem
 ## These methods must make no changes if dryrun is true
 ##
@@ -169,7 +426,8 @@ def preppost_quota(
         filessoftlimit: Union[None, str]=None,
         fileshardlimit: Union[None, str]=None,
         filesgraceperiod: Union[None, str]=None,
-        quotatype: Union[None, str]="FILESET"
+        quotatype: Union[None, str]="FILESET",
+        filesetname: Union[None, str]=None
 ):
     """
     @brief      Creates a requests.PreparedRequest object to create a quota.
@@ -189,56 +447,33 @@ def preppost_quota(
     @param      fileshardlimit    The fileshardlimit
     @param      filesgraceperiod  The filesgraceperiod
     @param      quotatype         The quotatype
+    @param      filesetname       The fileset of a USR or GRP quota, default None, which sets it for the filesystem
 
     @return     { description_of_the_return_value }
     """
 
-    # Convert parameters to int
-    blocksoftint = blocktoint(blocksoftlimit)
-    blockhardint = blocktoint(blockhardlimit)
-    filessoftint = inodetoint(filessoftlimit)
-    fileshardint = inodetoint(fileshardlimit)
-
-    validquota = True
-    reasons = []
     prepresponse = None
+    data, reasons = _quotadata(
+        fileset=fileset,
+        blocksoftlimit=blocksoftlimit,
+        blockhardlimit=blockhardlimit,
+        blockgraceperiod=blockgraceperiod,
+        filessoftlimit=filessoftlimit,
+        fileshardlimit=fileshardlimit,
+        filesgraceperiod=filesgraceperiod,
+        quotatype=quotatype
+    )
 
-    # Is soft block quota < hard block quota
-    # and they both aren't 0
-    if blocksoftint is not None:
-        if blockhardint is not None:
-            if blocksoftint != 0 and blockhardint != 0:
-                if blocksoftint >= blockhardint:
-                    reason = (
-                        "Soft block limit (%s) is not"
-                        " less than block hard limit (%s)" %
-                        (
-                            blocksoftlimit,
-                            blockhardlimit
-                        )
-                    )
-                    validquota = False
-                    reasons.append(reason)
-
-    # Is soft block quota < hard block quota
-    # and they both aren't 0
-    if filessoftint is not None:
-        if fileshardint is not None:
-            if filessoftint != 0 and fileshardint != 0:
-                if filessoftint >= fileshardint:
-                    reason = (
-                        "Soft inode limit (%s) is not"
-                        " less than inode hard limit (%s)" %
-                        (
-                            filessoftlimit,
-                            fileshardlimit
-                        )
-                    )
-                    validquota = False
-                    reasons.append(reason)
-
-    if validquota:
-        if fileset is not None:
+    if not reasons:
+        if filesetname is not None and quotatype != "FILESET":
+            commandurl = (
+                "%s/filesystems/%s/filesets/%s/quotas" % (
+                    self._baseurl,
+                    filesystem,
+                    filesetname
+                )
+            )
+        elif fileset is not None:
             commandurl = (
                 "%s/filesystems/%s/quotas" % (
                     self._baseurl,
@@ -254,34 +489,6 @@ def preppost_quota(
                 )
             )
 
-        data = {
-            'operationType': 'setQuota',
-            'quotaType': quotatype,
-        }
-
-        if fileset is not None:
-            data['objectName'] = fileset
-
-        if blocksoftlimit is not None:
-            data['blockSoftLimit'] = blocksoftint
-
-        if blockhardlimit is not None:
-            data['blockHardLimit'] = blockhardint
-
-        if filessoftlimit is not None:
-            data['filesSoftLimit'] = filessoftint
-
-        if fileshardlimit is not None:
-            data['filesHardLimit'] = fileshardint
-
-        if filesgraceperiod is not None:
-            if validgracestr(filesgraceperiod):
-                data['filesGracePeriod'] = filesgraceperiod
-
-        if blockgraceperiod is not None:
-            if validgracestr(blockgraceperiod):
-                data['blockGracePeriod'] = blockgraceperiod
-
         prepresponse = self._preppost(
             commandurl=commandurl,
             data=data
@@ -295,3 +502,241 @@ def preppost_quota(
             )
 
     return prepresponse
+
+
+def _quotaindex(
+        self,
+        filesystem: type=str
+):
+    """
+    @brief      Index the current quotas of a filesystem, read from one listing
+
+    @param      self        The object
+    @param      filesystem  The filesystem
+
+    @return     a dict of (quotaType, objectName, filesetName) tuples to quota dicts,
+                see _quotakey
+    """
+    index = {}
+    # Only the fields that identify a quota and the limits a request can set are read
+    for quota in self.iter_quotas(
+            filesystems=filesystem,
+            fields=['quotaType', 'objectName', 'filesetName'] + [field for field, factor in QUOTAFIELDS.values()]
+    ):
+        index[
+            _quotakey(
+                quota.get('quotaType'),
+                quota.get('objectName'),
+                quota.get('filesetName')
+            )
+        ] = quota
+
+    return index
+
+
+def _quotakey(
+        quotatype: type=str,
+        objectname: type=str,
+        filesetname: Union[None, str]=None
+):
+    """
+    @brief      The key of a quota, a USR or GRP quota is set per fileset, so the same
+                user or group can have a quota in several filesets
+
+    @param      quotatype    The quotaType
+    @param      objectname   The objectName
+    @param      filesetname  The filesetName
+
+    @return     a tuple of the quotaType, objectName and filesetName, which is None for
+                FILESET quotas and USR or GRP quotas of the whole filesystem
+    """
+    if quotatype == "FILESET" or not filesetname:
+        filesetname = None
+
+    return quotatype, objectname, filesetname
+
+
+def reconcile_quotas(
+        self,
+        quotas: type=list
+):
+    """
+    @brief      Compare the desired quotas with the current quotas, and create the
+                preppost_quota requests of only the quotas that differ. All the
+                desired quotas are validated before any request is prepared, and the
+                current quotas of each filesystem are read once, concurrently.
+                Like preppost_quota, this makes NO CHECKS against usage.
+
+    @param      self    The object
+    @param      quotas  An iterable of desired quota dicts with the keys 'filesystem',
+                        'objectName', 'quotaType', default 'FILESET', 'filesetName', the
+                        fileset of a USR or GRP quota, default None, which is the whole
+                        filesystem, and any limits from QUOTALIMITS, e.g.
+                        {'filesystem': 'gpfs01', 'objectName': 'projects', 'blockhardlimit': '10T'}
+
+    @return     a dict of 'requests', an OrderedDict of (filesystem, quotaType,
+                objectName, filesetName) tuples to the requests of the quotas that differ,
+                'unchanged', a list of the tuples of quotas that already have the
+                limits, and 'invalid', a dict of tuples to the reasons their limits
+                are invalid. If any quotas are invalid no requests are prepared.
+    """
+    response = {
+        'requests': OrderedDict(),
+        'unchanged': [],
+        'invalid': OrderedDict()
+    }
+
+    # Validate everything up front
+    entries = OrderedDict()
+    for quota in quotas:
+        limits = dict(quota)
+        filesystem = limits.pop('filesystem', None)
+        objectname = limits.pop('objectName', None)
+        quotatype = limits.pop('quotaType', "FILESET")
+        key = (filesystem,) + _quotakey(quotatype, objectname, limits.pop('filesetName', None))
+
+        reasons = []
+        if filesystem is None or objectname is None:
+            reasons.append("A quota needs a filesystem and an objectName")
+
+        if key in entries or key in response['invalid']:
+            reasons.append("Quota for %s is given more than once" % objectname)
+
+        unknown = sorted(set(limits) - set(QUOTALIMITS))
+        if unknown:
+            reasons.append("Unknown quota limits: %s" % ", ".join(unknown))
+            limits = {}
+
+        data, datareasons = _quotadata(
+            fileset=objectname,
+            quotatype=quotatype,
+            **limits
+        )
+        reasons += datareasons
+
+        if reasons:
+            response['invalid'][key] = reasons
+            entries.pop(key, None)
+        else:
+            entries[key] = (limits, data)
+
+    if response['invalid']:
+        for key, reasons in response['invalid'].items():
+            for reason in reasons:
+                print(
+                    ("ERROR: %s: %s" % (key[2], reason)),
+                    file=sys.stderr
+                )
+        return response
+
+    filesystems = list(OrderedDict.fromkeys(key[0] for key in entries))
+    indexes = dict(
+        zip(
+            filesystems,
+            self._fanout(
+                lambda filesystem: _quotaindex(self, filesystem),
+                filesystems
+            )
+        )
+    )
+
+    for key, (limits, data) in entries.items():
+        filesystem, quotatype, objectname, filesetname = key
+        current = indexes[filesystem].get(key[1:])
+        if current is not None and not _quotachanged(current, data):
+            response['unchanged'].append(key)
+        else:
+            response['requests'][key] = self.preppost_quota(
+                filesystem=filesystem,
+                fileset=objectname,
+                quotatype=quotatype,
+                filesetname=filesetname,
+                **limits
+            )
+
+    return response
+
+
+def prepbulk_quota(
+        self,
+        filesystem: type=str,
+        quotas: type=list,
+        quotatype: Union[None, str]="FILESET"
+):
+    """
+    @brief      Creates the requests.PreparedRequest objects to set many quotas of a
+                filesystem, the quotas that would not change are skipped, see
+                reconcile_quotas
+
+    @param      self        The object
+    @param      filesystem  The filesystem
+    @param      quotas      An iterable of (fileset, limits) tuples, limits is a dict with
+                            keys from QUOTALIMITS, e.g. {'blockhardlimit': '10T'}
+    @param      quotatype   The quotatype
+
+    @return     a dict of 'requests', an OrderedDict of filesets to the requests of
+                the quotas that change, 'unchanged', a list of filesets whose quotas
+                already have the limits, and 'invalid', a dict of filesets to the
+                reasons their limits are invalid. If any limits are invalid no
+                requests are prepared.
+    """
+    reconciled = self.reconcile_quotas(
+        dict(
+            limits,
+            filesystem=filesystem,
+            objectName=fileset,
+            quotaType=quotatype
+        )
+        for fileset, limits in quotas
+    )
+
+    return {
+        'requests': OrderedDict(
+            (key[2], request) for key, request in reconciled['requests'].items()
+        ),
+        'unchanged': [key[2] for key in reconciled['unchanged']],
+        'invalid': OrderedDict(
+            (key[2], reasons) for key, reasons in reconciled['invalid'].items()
+        )
+    }
+
+
+def bulk_quota(
+        self,
+        filesystem: type=str,
+        quotas: type=list,
+        quotatype: Union[None, str]="FILESET",
+        jobqueue=None
+):
+    """
+    @brief      Set many quotas of a filesystem, only the quotas that change are
+                sent, concurrently up to max_inflight requests at a time
+
+    @param      self        The object
+    @param      filesystem  The filesystem
+    @param      quotas      An iterable of (fileset, limits) tuples, see prepbulk_quota
+    @param      quotatype   The quotatype
+    @param      jobqueue    A pyspectrumscale.JobQueue the requests are queued on instead
+                            of being sent, default None, which sends them
+
+    @return     the prepbulk_quota dict, with 'responses', a dict of filesets to the
+                response from send(), or from JobQueue.queuejob() if a jobqueue is given
+    """
+    response = self.prepbulk_quota(
+        filesystem=filesystem,
+        quotas=quotas,
+        quotatype=quotatype
+    )
+
+    filesets = list(response['requests'])
+    preprequests = list(response['requests'].values())
+
+    if jobqueue is not None:
+        responses = [jobqueue.queuejob(request) for request in preprequests]
+    else:
+        # Writes are only sent to the primary server of an ApiPool
+        responses = self._fanout(self.send, preprequests, self._max_inflight)
+
+    response['responses'] = dict(zip(filesets, responses))
+
+    return response
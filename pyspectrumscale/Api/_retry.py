@@ -0,0 +1,163 @@
+"""
+Client side rate limiting and retries for pyspectrumscale.Api
+
+Requests are spaced by a token bucket shared by all the threads of an Api,
+and a request the server answers with 429 Too Many Requests or 503 Service
+Unavailable, or whose connection fails, is sent again after an exponential
+backoff, or after the wait the server asks for in a Retry-After header.
+Requests that change Spectrum Scale are only sent again when the server
+cannot have acted on them.
+"""
+import email.utils
+import random
+import threading
+import time
+from typing import Union
+
+# Responses that ask the client to slow down and send the request again
+RETRYSTATUS = [429, 503]
+
+# Responses that mean the request was refused before the server acted on it
+REFUSEDSTATUS = [429]
+
+# Methods that can be sent again without changing the result
+IDEMPOTENT = ['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE']
+
+
+class TokenBucket:
+    """
+    A thread safe token bucket, each request takes a token, tokens are added
+    at a steady rate up to the burst size
+    """
+
+    def __init__(
+            self,
+            rate: Union[float, None]=None,
+            burst: int=1
+    ):
+        """
+        @brief      Initiator of the TokenBucket class
+
+        @param      self   The object
+        @param      rate   The tokens added per second, default None, which does not limit the rate
+        @param      burst  The most tokens the bucket holds
+        """
+        self._rate = rate
+        self._burst = max(1, burst)
+        self._tokens = float(self._burst)
+        self._last = time.monotonic()
+        # No tokens are handed out before this time, set when the server asks to wait
+        self._pausedto = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """
+        @brief      Take a token
+
+        @param      self  The object
+
+        @return     the seconds to wait before sending the request
+        """
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._pausedto)
+
+            if self._rate is None:
+                return start - now
+
+            self._tokens = min(
+                self._burst,
+                self._tokens + (now - self._last) * self._rate
+            )
+            self._last = now
+            self._tokens -= 1
+
+            # A negative balance is the tokens owed, the caller waits for them
+            wait = 0.0
+            if self._tokens < 0:
+                wait = -self._tokens / self._rate
+
+            return max(wait, start - now)
+
+    def pause(
+            self,
+            seconds: float
+    ):
+        """
+        @brief      Hand out no tokens for a while, all threads wait, not just the one that was told to
+
+        @param      self     The object
+        @param      seconds  The seconds to pause for
+        """
+        with self._lock:
+            self._pausedto = max(self._pausedto, time.monotonic() + seconds)
+
+
+def retryafter(
+        response: type=object
+):
+    """
+    @brief      Read the Retry-After header of a response
+
+    @param      response  The requests.Response
+
+    @return     the seconds to wait, or None if there is no valid header
+    """
+    value = response.headers.get('Retry-After')
+    if value is None:
+        return None
+
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if when is None:
+        return None
+
+    return max(0.0, when.timestamp() - time.time())
+
+
+def backoff(
+        attempt: int,
+        base: float,
+        cap: float
+):
+    """
+    @brief      The wait before sending a request again, exponential with full jitter
+                so threads that failed together do not retry together
+
+    @param      attempt  The number of the retry, starting at 0
+    @param      base     The wait before the first retry in seconds
+    @param      cap      The longest wait in seconds
+
+    @return     the seconds to wait
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+def retryable(
+        method: type=str,
+        status: Union[int, None]=None,
+        nonidempotent: bool=False
+):
+    """
+    @brief      Whether a failed request may be sent again
+
+    @param      method         The HTTP method of the request
+    @param      status         The status code of the response, None if the connection failed
+    @param      nonidempotent  If true, requests that change Spectrum Scale are sent again even if the server may have acted on them
+
+    @return     True if the request may be sent again
+    """
+    if status is not None and status not in RETRYSTATUS:
+        return False
+
+    if method.upper() in IDEMPOTENT or nonidempotent:
+        return True
+
+    return status in REFUSEDSTATUS
@@ -0,0 +1,27 @@
+"""
+Binary units for pyspectrumscale.Api, the multipliers of the unit suffixes
+of Spectrum Scale block and inode strings as plain ints
+"""
+
+# The binary prefixes
+KIBI = 2**10
+MEBI = 2**20
+GIBI = 2**30
+TEBI = 2**40
+PEBI = 2**50
+
+# The multiplier of each unit suffix
+BLOCKUNITS = {
+    '': 1,
+    'K': KIBI,
+    'M': MEBI,
+    'G': GIBI,
+    'T': TEBI,
+    'P': PEBI
+}
+INODEUNITS = {
+    '': 1,
+    'K': KIBI,
+    'M': MEBI,
+    'G': GIBI
+}
@@ -7,7 +7,8 @@ import requests
 import json
 import re
 import sys
-from quantities import kibi, mebi, gibi, tebi, pebi
+from typing import Union
+from ._units import BLOCKUNITS, INODEUNITS
 
 
 # This converts a file path into something safe
@@ -44,6 +45,39 @@ def jsonprepreq(
     return jsonprepreq
 
 
+def reqfingerprint(
+    preprequest: type=requests.PreparedRequest
+):
+    """
+    @brief      A content fingerprint of a prepared request, two requests with the
+                same method, URL and JSON body have the same fingerprint however
+                the keys of their bodies are ordered
+
+    @param      preprequest  The requests.PreparedRequest
+
+    @return     a hashable tuple of the method, URL and canonical body
+    """
+    body = preprequest.body
+    if isinstance(body, bytes):
+        body = body.decode('utf-8')
+
+    if body:
+        try:
+            body = json.dumps(
+                json.loads(body),
+                sort_keys=True,
+                separators=(',', ':')
+            )
+        except ValueError:
+            pass
+
+    return (
+        preprequest.method,
+        preprequest.url,
+        body
+    )
+
+
 def jsonresponse(
     response: type=requests.Response
 ):
@@ -65,15 +99,147 @@ def jsonresponse(
     return jsonresponse
 
 
+class PagedResponse(requests.Response):
+    """
+    A requests.Response that carries the already parsed JSON body,
+    used to return the merged content of a paged GET request without
+    serialising it back into the response content
+    """
+
+    def __init__(
+            self,
+            response: type=requests.Response,
+            content: type=dict
+    ):
+        """
+        @brief      Wrap the last requests.Response of a paged request
+
+        @param      self      The object
+        @param      response  The requests.Response of the last page
+        @param      content   The merged JSON content of all pages
+        """
+        super().__init__()
+        self.__dict__.update(response.__dict__)
+        self._json = content
+
+    def json(self, **kwargs):
+        """
+        @brief      Return the merged JSON content, no parsing is required
+
+        @param      self    The object
+        @param      kwargs  Ignored, accepted for compatibility with requests.Response
+
+        @return     the merged JSON content as a dict
+        """
+        return self._json
+
+
+def mergepage(
+        content: type=dict,
+        page: type=dict
+):
+    """
+    @brief      Merge the JSON content of a page into the accumulated content
+                of a paged request. Collections are extended in place so the
+                cost of merging is linear in the size of the page.
+
+    @param      content  The accumulated JSON content, updated in place
+    @param      page     The JSON content of the next page
+
+    @return     the updated content
+    """
+    # Only the last page's paging cursor is relevant
+    content.pop('paging', None)
+
+    for key, value in page.items():
+        if key in ['paging', 'status']:
+            content[key] = value
+        elif isinstance(value, list) and isinstance(content.get(key), list):
+            content[key].extend(value)
+        else:
+            content[key] = value
+
+    return content
+
+
+def nextpage(
+        baseaddress: type=str,
+        page: type=dict,
+        params: Union[dict, None]=None
+):
+    """
+    @brief      Build the request for the next page of a paged request from
+                the paging cursor of the current page
+
+    @param      baseaddress  The protocol, host and port of the API server
+    @param      page         The JSON content of the current page
+    @param      params       The parameters of the current page, its fields are kept if the cursor does not carry them
+
+    @return     a tuple of the command URL and a dict of parameters,
+                or (None, None) if there are no more pages
+    """
+    fields = (params or {}).get('fields')
+    commandurl = None
+    params = None
+
+    if isinstance(page, dict) and 'paging' in page:
+        paging = page['paging']
+        if 'lastId' in paging:
+            commandurl = (
+                baseaddress +
+                paging['baseUrl']
+            )
+
+            params = {
+                'lastId': paging['lastId']
+            }
+
+            if 'fields' in paging:
+                params['fields'] = paging['fields']
+            elif fields is not None:
+                params['fields'] = fields
+
+    return commandurl, params
+
+
+def fieldsparam(
+        allfields: Union[bool, None]=None,
+        fields: Union[str, list, tuple, None]=None
+):
+    """
+    @brief      Build the fields parameter of a query, which selects the fields the API returns
+
+    @param      allfields  If true, all fields are requested
+    @param      fields     A field name, or list of field names, e.g. ['filesetName', 'config.path'], overrides allfields
+
+    @return     the value of the fields parameter, or None for the default fields of the endpoint
+    """
+    if fields:
+        if isinstance(fields, str):
+            return fields
+        # Duplicates are dropped, the order is kept
+        return ','.join(dict.fromkeys(fields))
+
+    if allfields:
+        return ':all:'
+
+    return None
+
+
+# Validators of Scale quota strings, compiled once, the groups are
+# the number and the unit suffix, only a number with a suffix can have a fraction
+BLOCKSTR = re.compile(r"^(\d+(?:\.\d*)?(?=[KMGTP])|\d+)([KMGTP]?)$", re.ASCII)
+INODESTR = re.compile(r"^(\d+(?:\.\d*)?(?=[KMG])|\d+)([KMG]?)$", re.ASCII)
+GRACESTR = re.compile(r"^\d+\.?\d*(seconds|minutes|hours|days)$", re.ASCII)
+
+
 def validinodestr(
         inodestr: str
 ):
     """
     @brief      Checks that an Scale quota inode string is valid
     """
-
-    inode_validator = re.compile("^\d+\.?\d*[KGM]?$")
-    return inode_validator.match(str(inodestr))
+    return INODESTR.match(str(inodestr))
 
 
 def validblockstr(
@@ -82,8 +248,7 @@ def validblockstr(
     """
     @brief      Checks that an Scale quota block string is valid
     """
-    block_validator = re.compile("^\d+\.?\d*[KGMTP]?$")
-    return block_validator.match(str(blockstr))
+    return BLOCKSTR.match(str(blockstr))
 
 
 def validgracestr(
@@ -92,8 +257,33 @@ def validgracestr(
     """
     @brief      Checks that an Scale grace time period string is valid
     """
-    grace_validator = re.compile("^\d+\.?\d*(seconds|minutes|hours|days)$")
-    return grace_validator.match(str(gracestr))
+    return GRACESTR.match(str(gracestr))
+
+
+def _unittoint(
+        unitstr: str,
+        validator: type=re.Pattern,
+        units: type=dict
+):
+    """
+    @brief      Turn a number with a unit suffix into an int
+
+    @param      unitstr    The string
+    @param      validator  The compiled validator of the strings
+    @param      units      The dict of unit suffixes to multipliers
+
+    @return     the int value, or None if the string is not valid
+    """
+    match = validator.match(unitstr)
+    if match is None:
+        return None
+
+    number, suffix = match.groups()
+    if not suffix:
+        return int(number)
+
+    # Multiply as a float and round down, as the quantities units did
+    return int(float(number) * units[suffix])
 
 
 def blocktoint(
@@ -109,27 +299,9 @@ def blocktoint(
 
     result = None
 
-    # is block string valid
     if blockstr:
-        if validblockstr(blockstr):
-            # is it just a digit
-            if isinstance(blockstr, int):
-                result = blockstr
-            elif blockstr.isdigit():
-                result = int(blockstr)
-            elif blockstr[-1] in ['K', 'M', 'G', 'T']:
-                # Process
-                if blockstr[-1] == 'K':
-                    result = int(float(blockstr[:-1]) * kibi)
-                elif blockstr[-1] == 'M':
-                    result = int(float(blockstr[:-1]) * mebi)
-                elif blockstr[-1] == 'G':
-                    result = int(float(blockstr[:-1]) * gibi)
-                elif blockstr[-1] == 'T':
-                    result = int(float(blockstr[:-1]) * tebi)
-                elif blockstr[-1] == 'P':
-                    result = int(float(blockstr[:-1]) * pebi)
-        else:
+        result = _unittoint(str(blockstr), BLOCKSTR, BLOCKUNITS)
+        if result is None:
             print(
                 "ERROR: %s is not a valid block string for spectrumscale" %
                 blockstr,
@@ -151,23 +323,9 @@ def inodetoint(
     """
     result = None
 
-    # is block string valid
     if inodestr:
-        if validinodestr(inodestr):
-            # is it just a digit
-            if isinstance(inodestr, int):
-                result = inodestr
-            elif inodestr.isdigit():
-                result = int(inodestr)
-            elif inodestr[-1] in ['K', 'M', 'G']:
-                # Process
-                if inodestr[-1] == 'K':
-                    result = int(float(inodestr[:-1]) * kibi)
-                elif inodestr[-1] == 'M':
-                    result = int(float(inodestr[:-1]) * mebi)
-                elif inodestr[-1] == 'G':
-                    result = int(float(inodestr[:-1]) * gibi)
-        else:
+        result = _unittoint(str(inodestr), INODESTR, INODEUNITS)
+        if result is None:
             print(
                 "ERROR: %s is not a valid file/inode string for spectrumscale" %
                 inodestr,
@@ -177,6 +335,133 @@ def inodetoint(
     return result
 
 
+def _unitstoints(
+        unitstrs: type=list,
+        validator: type=re.Pattern,
+        units: type=dict
+):
+    """
+    @brief      Turn an array of numbers with unit suffixes into ints at once, the
+                strings are read a character column at a time for all the strings
+                together, so no string is parsed on its own
+
+    @param      unitstrs   An iterable or array of strings
+    @param      validator  The compiled validator of the strings
+    @param      units      The dict of unit suffixes to multipliers
+
+    @return     a numpy masked array of int64, invalid and empty strings, and values
+                too large for an int64, are masked
+    """
+    # NumPy is only needed here, so importing pyspectrumscale.Api does not load it
+    import numpy
+
+    # The powers of ten a number's fraction is divided by
+    powers = 10.0**numpy.arange(19)
+
+    if not isinstance(unitstrs, numpy.ndarray):
+        unitstrs = list(unitstrs)
+
+    strings = numpy.asarray(unitstrs).astype(str)
+    shape = strings.shape
+    strings = strings.ravel()
+    if strings.dtype.itemsize == 0:
+        strings = strings.astype('<U1')
+    count = strings.size
+    width = strings.dtype.itemsize // 4
+
+    # One row of character codes for each column of the strings
+    codes = numpy.ascontiguousarray(
+        strings.view(numpy.uint32).reshape(count, width).T
+    ).astype(numpy.int64)
+    lengths = (codes != 0).sum(axis=0)
+
+    # Read the unit suffix from the last character
+    last = codes[numpy.maximum(lengths - 1, 0), numpy.arange(count)]
+    multipliers = numpy.ones(count, dtype=numpy.int64)
+    suffixed = numpy.zeros(count, dtype=bool)
+    numberlengths = lengths.copy()
+    for suffix, multiplier in units.items():
+        if suffix:
+            matches = (last == ord(suffix)) & (lengths > 0)
+            multipliers[matches] = multiplier
+            suffixed |= matches
+            numberlengths[matches] -= 1
+
+    # Read all the digits of a number as one integer, and count the digits
+    # after the point, a number is digits with at most one point
+    valid = numberlengths > 0
+    digitcount = numpy.zeros(count, dtype=numpy.int64)
+    fractionlen = numpy.zeros(count, dtype=numpy.int64)
+    points = numpy.zeros(count, dtype=numpy.int64)
+    mantissas = numpy.zeros(count, dtype=numpy.int64)
+    for column in range(width):
+        innumber = column < numberlengths
+        digits = codes[column] - ord('0')
+        isdigit = innumber & (digits >= 0) & (digits <= 9)
+        ispoint = innumber & (codes[column] == ord('.'))
+        valid &= isdigit | ispoint | ~innumber
+        if column == 0:
+            valid &= isdigit
+
+        mantissas = numpy.where(isdigit, mantissas * 10 + digits, mantissas)
+        digitcount += isdigit
+        fractionlen += isdigit & (points > 0)
+        points += ispoint
+
+    # Only a number with a suffix can have a fraction
+    valid &= (points == 0) | ((points == 1) & suffixed)
+
+    # Multiply as a float and round down, as _unittoint does, a float is
+    # exact for numbers of up to 2**53 and powers of ten of up to 10**18
+    exact = valid & (digitcount <= 18) & (mantissas <= 2**53)
+    products = (
+        numpy.where(exact, mantissas, 0).astype(numpy.float64) /
+        powers[numpy.where(exact, fractionlen, 0)] *
+        multipliers
+    )
+    exact &= products < 2**63
+    values = numpy.where(exact, products, 0).astype(numpy.int64)
+
+    # Numbers too long to read exactly as a float are read one at a time,
+    # and values too large for an int64 are masked rather than wrapped
+    for index in numpy.flatnonzero(valid & ~exact):
+        value = _unittoint(str(strings[index]), validator, units)
+        if value <= 2**63 - 1:
+            values[index] = value
+        else:
+            valid[index] = False
+
+    return numpy.ma.masked_array(values, mask=~valid).reshape(shape)
+
+
+def blockstoints(
+        blockstrs: type=list
+):
+    """
+    @brief      Turn many block size strings into ints at once, as blocktoint does,
+                this needs NumPy, install with the 'numpy' extra
+
+    @param      blockstrs  An iterable or array of block size strings
+
+    @return     a numpy masked array of int64, invalid and empty strings are masked
+    """
+    return _unitstoints(blockstrs, BLOCKSTR, BLOCKUNITS)
+
+
+def inodestoints(
+        inodestrs: type=list
+):
+    """
+    @brief      Turn many inode strings into ints at once, as inodetoint does,
+                this needs NumPy, install with the 'numpy' extra
+
+    @param      inodestrs  An iterable or array of inode strings
+
+    @return     a numpy masked array of int64, invalid and empty strings are masked
+    """
+    return _unitstoints(inodestrs, INODESTR, INODEUNITS)
+
+
 def blockcompare(
         block1: str,
         block2: str
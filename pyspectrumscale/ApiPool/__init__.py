@@ -0,0 +1,305 @@
+"""
+Create an ApiPool that spreads the read requests of a pyspectrumscale.Api
+across several Spectrum Scale Management API servers of one cluster
+
+Writes sent with send(), and job polling, stay on the primary server, as jobs
+are tracked by the server they were submitted to. Each paged read is routed
+to one server, round robin or to the server with the fewest requests in flight,
+and a server that is unreachable, times out or is unavailable is skipped for
+a while and the request is retried on another server. Each server has its own
+max_inflight, rate limit and pause after a 429 Too Many Requests.
+"""
+import itertools
+import threading
+from collections import Counter
+from time import monotonic
+from typing import Union
+import requests
+from pyspectrumscale.Api import Api
+from pyspectrumscale.Api._cache import resource
+from pyspectrumscale.Api._retry import REFUSEDSTATUS
+
+# The ways read requests are routed to servers
+ROUTINGS = [
+    'roundrobin',
+    'leastoutstanding'
+]
+
+# Responses that mean a server is unavailable rather than that the request failed
+FAILOVERSTATUS = [502, 503, 504]
+
+# The endpoints that are only read from the primary server
+PINNED = ['jobs']
+
+
+class ApiPool(Api):
+    """
+    @brief     Class to connect to several Spectrum Scale Management API servers
+               of one cluster as a single pyspectrumscale.Api
+    """
+
+    def __init__(
+            self,
+            hosts: type=list,
+            username: type=str,
+            password: type=str,
+            primary: Union[str, None]=None,
+            routing: str='roundrobin',
+            node_timeout: Union[float, None]=None,
+            failover_wait: float=30.0,
+            **kwargs
+    ):
+        """
+        @brief      Initiator of the pyspectrumscale.ApiPool class
+
+        @param      self           The object
+        @param      hosts          The list of spectrum scale management servers
+        @param      username       The username used to connect to the spectrum scale management servers
+        @param      password       The password used to authenticate the username
+        @param      primary        The server writes and job polls are sent to, default None, which is the first host
+        @param      routing        How read requests are routed, 'roundrobin' or 'leastoutstanding'
+        @param      node_timeout   The seconds a read request waits for a server before trying another, default None, which waits
+        @param      failover_wait  The seconds a failed server is skipped for
+        @param      kwargs         Passed to the pyspectrumscale.Api of each server, e.g. port, verify_ssl, max_inflight
+        """
+        if routing not in ROUTINGS:
+            raise ValueError(
+                "routing must be one of %s, not %s" % (", ".join(ROUTINGS), routing)
+            )
+
+        if primary is None:
+            primary = hosts[0]
+
+        super().__init__(
+            host=primary,
+            username=username,
+            password=password,
+            **kwargs
+        )
+
+        # The other servers only serve reads, through this object's cache
+        kwargs['cache'] = False
+        self._nodes = [self] + [
+            Api(
+                host=host,
+                username=username,
+                password=password,
+                **kwargs
+            )
+            for host in hosts if host != primary
+        ]
+
+        # Reads are spread across the servers, so fan out to all of them at once
+        self._max_fanout = sum(node._max_inflight for node in self._nodes)
+
+        self._routing = routing
+        self._node_timeout = node_timeout
+        self._failover_wait = failover_wait
+
+        self._nodelock = threading.Lock()
+        self._roundrobin = itertools.count()
+        # The requests in flight, requests sent and failures of each server, by index
+        self._outstanding = Counter()
+        self._requests = Counter()
+        self._failures = Counter()
+        # The time until each failed server is skipped
+        self._downuntil = {}
+
+    def _choose(
+            self,
+            exclude: type=set
+    ):
+        """
+        @brief      Choose the server for a read request
+
+        @param      self     The object
+        @param      exclude  The indexes of servers that already failed this request
+
+        @return     the index of a server, or None if every server has been tried
+        """
+        with self._nodelock:
+            now = monotonic()
+            candidates = [
+                index for index in range(len(self._nodes))
+                if index not in exclude
+            ]
+            if not candidates:
+                return None
+
+            # Skip servers that failed recently, unless every server has
+            up = [
+                index for index in candidates
+                if self._downuntil.get(index, 0) <= now
+            ]
+            if up:
+                candidates = up
+
+            offset = next(self._roundrobin)
+            candidates = candidates[offset % len(candidates):] + candidates[:offset % len(candidates)]
+
+            if self._routing == 'leastoutstanding':
+                # min() keeps the first of equals, so ties are taken round robin
+                return min(candidates, key=lambda index: self._outstanding[index])
+
+            return candidates[0]
+
+    def _nodeget(
+            self,
+            index: int,
+            commandurl: type=str,
+            params: Union[None, dict]=None
+    ):
+        """
+        @brief      Send a GET request to a server
+
+        @param      self        The object
+        @param      index       The index of the server
+        @param      commandurl  The URL of the request on the primary server
+        @param      params      A dictionary of parameters
+
+        @return     a requests.Response object
+        """
+        node = self._nodes[index]
+        if commandurl.startswith(self._baseaddress):
+            commandurl = node._baseaddress + commandurl[len(self._baseaddress):]
+
+        with self._nodelock:
+            self._outstanding[index] += 1
+            self._requests[index] += 1
+
+        try:
+            return node._session.get(
+                url=commandurl,
+                params=params,
+                timeout=self._node_timeout
+            )
+        finally:
+            with self._nodelock:
+                self._outstanding[index] -= 1
+
+    def _failed(
+            self,
+            index: int
+    ):
+        """
+        @brief      Skip a server that failed for failover_wait seconds
+
+        @param      self   The object
+        @param      index  The index of the server
+        """
+        with self._nodelock:
+            self._failures[index] += 1
+            self._downuntil[index] = monotonic() + self._failover_wait
+
+    def _getpage(
+        self,
+        commandurl: type=str,
+        params: Union[None, dict]=None,
+        route: Union[int, None]=None
+    ):
+        """
+        @brief This sends the GET request for one page, the pages of a request are read
+               from one server, another server is tried if it fails
+
+        @param self This object
+        @param commandurl the URL for the request
+        @param params a dictionary of parameters
+        @param route the index of the server the previous page was read from, None for the first page
+
+        @return a tuple of the requests.Response and the index of the server it was read from
+        """
+        if resource(commandurl)[1] in PINNED:
+            return super()._getpage(commandurl, params, route)
+
+        tried = set()
+        index = route
+        if index is None:
+            index = self._choose(tried)
+
+        while True:
+            node = self._nodes[index]
+            try:
+                # A server that asks to slow down is waited for, one that is unavailable is failed over,
+                # each server has its own max_inflight, rate limit and pause after a 429
+                with node._inflight:
+                    response = node._withretry(
+                        'GET',
+                        lambda: self._nodeget(index, commandurl, params),
+                        retrystatus=REFUSEDSTATUS,
+                        retryerrors=False
+                    )
+                if response.status_code not in FAILOVERSTATUS:
+                    return response, index
+                error = None
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as exception:
+                response = None
+                error = exception
+
+            self._failed(index)
+            tried.add(index)
+            nextindex = self._choose(tried)
+            if nextindex is None:
+                # Every server failed, report the last failure
+                if error is not None:
+                    raise error
+                return response, index
+            index = nextindex
+
+    def nodestats(self):
+        """
+        @brief      The routing counters of each server
+
+        @param      self  The object
+
+        @return     a dict of hosts to dicts of the 'outstanding' requests, the 'requests'
+                    sent, the 'failures', whether the server is 'down', and the
+                    'connections' and 'retries' counters of the server
+        """
+        with self._nodelock:
+            now = monotonic()
+            stats = {
+                node._host: {
+                    'primary': index == 0,
+                    'outstanding': self._outstanding[index],
+                    'requests': self._requests[index],
+                    'failures': self._failures[index],
+                    'down': self._downuntil.get(index, 0) > now
+                }
+                for index, node in enumerate(self._nodes)
+            }
+
+        for node in self._nodes:
+            stats[node._host]['connections'] = Api.connectionstats(node)
+            stats[node._host]['retries'] = Api.retrystats(node)
+
+        return stats
+
+    def connectionstats(self):
+        """
+        @brief      Returns the connection reuse counts of the connection pools of all the servers
+
+        @param      self  The object
+
+        @return     a dict with the number of connections created by the pools,
+                    requests sent, and requests sent on a reused pooled connection
+        """
+        stats = Counter()
+        for node in self._nodes:
+            stats.update(Api.connectionstats(node))
+
+        return dict(stats)
+
+    def retrystats(self):
+        """
+        @brief      Returns the retry counters of all the servers
+
+        @param      self  The object
+
+        @return     a dict with the number of responses received, the requests 'retried' at least once,
+                    the 'retries' sent, and how many followed a 429 or 503, 'throttled', or a failed connection, 'errors'
+        """
+        stats = Counter()
+        for node in self._nodes:
+            stats.update(Api.retrystats(node))
+
+        return dict(stats)
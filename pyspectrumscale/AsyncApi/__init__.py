@@ -0,0 +1,871 @@
+"""
+Create an AsyncApi object that can communicate with the
+Spectrum Scale Management API from an asyncio event loop
+
+This requires the aiohttp module, install with the 'async' extra
+"""
+import asyncio
+import json
+import os
+import ssl
+from typing import Union
+import aiohttp
+import requests
+from pyspectrumscale.Api._utils import (
+    jsonprepreq,
+    mergepage,
+    nextpage,
+    PagedResponse
+)
+from pyspectrumscale.Api._retry import (
+    TokenBucket,
+    RETRYSTATUS,
+    backoff,
+    retryable,
+    retryafter
+)
+from pyspectrumscale.Api._filesystem import _filesystemquery
+from pyspectrumscale.Api._fileset import _filesetquery
+from pyspectrumscale.Api._acl import _aclquery
+from pyspectrumscale.Api._quota import _quotaquery
+from pyspectrumscale.Api._job import _jobquery
+
+
+class AsyncApi:
+    """
+    @brief     Class to connect to the Spectrum Scale Management API with asyncio,
+               the read and send methods of pyspectrumscale.Api are coroutines
+    """
+
+    # Prepared requests are built the same way as pyspectrumscale.Api
+    from pyspectrumscale.Api._fileset import preppost_fileset
+    from pyspectrumscale.Api._acl import prepput_acl
+    from pyspectrumscale.Api._quota import preppost_quota
+
+    def __init__(
+            self,
+            host: type=str,
+            username: type=str,
+            password: type=str,
+            port: int=443,
+            protocol: str='https',
+            verify_ssl: bool=True,
+            verify_method: Union[bool, str]=True,
+            verify_warnings: bool=True,
+            version: str='v2',
+            dryrun: bool=False,
+            max_inflight: int=100,
+            rate_limit: Union[float, None]=None,
+            rate_burst: int=1,
+            retries: int=0,
+            retry_backoff: float=0.5,
+            retry_backoff_max: float=60.0,
+            retry_nonidempotent: bool=False
+    ):
+        """
+        @brief      Initiator of the pyspectrumscale.AsyncApi class, the HTTP session
+                    is created on first use inside the running event loop
+
+        @param      self                The object
+        @param      host                The spectrum scale management server
+        @param      username            The username used to connect to the spectrum scale management server
+        @param      password            The password used to authenticate the username
+        @param      port                The port used to connect to the spectrum scale management server
+        @param      protocol            The protocol used to connect to the spectrum scale management server
+        @param      verify_ssl          If true the connection will verifiy SSL
+        @param      verify_method       If true this specifies the method used to verify SSL, a path is a CA bundle file or directory, as with requests
+        @param      verify_warnings     If false SSL verification warnings will be suppress
+        @param      version             The Spectrum Scale Management API version
+        @param      dryrun              If true, the API will not write changes to Spectrum Scale or GPFS
+        @param      max_inflight        The maximum number of concurrent requests
+        @param      rate_limit          The most requests sent per second, default None, which does not limit the rate
+        @param      rate_burst          The number of requests that can be sent at once before rate_limit applies
+        @param      retries             The number of times a request answered with 429 or 503, or whose connection failed, is sent again
+        @param      retry_backoff       The wait before the first retry in seconds, doubled for each retry, unless the server sends Retry-After
+        @param      retry_backoff_max   The longest backoff between retries in seconds
+        @param      retry_nonidempotent If true, POST requests are retried after a 503 or failed connection, when the server may have acted on them
+        """
+
+        self._host = host
+        self._username = username
+        self._password = password
+        self._port = port
+        self._protocol = protocol
+        self._verify_ssl = verify_ssl
+        self._verify_method = verify_method
+        self._verify_warnings = verify_warnings
+        self._version = version
+        self._dryrun = dryrun
+        self._max_inflight = max(1, max_inflight)
+
+        # Built now so a bad CA bundle fails here rather than on the first request
+        self._ssl = self._sslcontext()
+
+        # The bucket only hands out waits, so it is shared by coroutines without blocking the loop
+        self._ratelimit = TokenBucket(
+            rate=rate_limit,
+            burst=rate_burst
+        )
+        self._retries = max(0, retries)
+        self._retry_backoff = retry_backoff
+        self._retry_backoff_max = retry_backoff_max
+        self._retry_nonidempotent = retry_nonidempotent
+
+        self.warnings = []
+
+        if not self._verify_warnings:
+            reason = (
+                'Verifying TLS connection to %s disabled.' %
+                self._host
+            )
+            self.warnings.append(reason)
+
+        self._baseaddress = (
+            "%s://%s:%s" %
+            (
+                self._protocol,
+                self._host,
+                self._port
+            )
+        )
+
+        self._baseurl = (
+            "%s/scalemgmt/%s" %
+            (
+                self._baseaddress,
+                self._version
+            )
+        )
+
+        self._headers = {
+            'accept': 'application/json',
+            'content-type': 'application/json'
+        }
+
+        self._session = None
+        self._inflight = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def _sslcontext(self):
+        """
+        @brief      Map verify_ssl and verify_method to the ssl argument of aiohttp,
+                    the same way requests treats its verify argument
+
+        @param      self  The object
+
+        @return     False if verification is off, otherwise an ssl.SSLContext
+        """
+        if isinstance(self._verify_method, bool):
+            if not (self._verify_ssl and self._verify_method):
+                return False
+
+            return ssl.create_default_context()
+
+        if not isinstance(self._verify_method, str):
+            raise ValueError(
+                "verify_method must be a bool or the path of a CA bundle, not %r" %
+                (self._verify_method,)
+            )
+
+        if not self._verify_ssl:
+            return False
+
+        if os.path.isdir(self._verify_method):
+            return ssl.create_default_context(capath=self._verify_method)
+
+        return ssl.create_default_context(cafile=self._verify_method)
+
+    def _getsession(self):
+        """
+        @brief This returns the aiohttp session, creating it if required
+
+        @param self This object
+
+        @return an aiohttp.ClientSession object
+        """
+        if self._session is None:
+            self._inflight = asyncio.Semaphore(self._max_inflight)
+            self._session = aiohttp.ClientSession(
+                headers=self._headers,
+                auth=aiohttp.BasicAuth(
+                    self._username,
+                    self._password or ''
+                ),
+                connector=aiohttp.TCPConnector(
+                    limit=self._max_inflight,
+                    ssl=self._ssl
+                )
+            )
+
+        return self._session
+
+    async def close(self):
+        """
+        @brief      Close the HTTP session
+
+        @param      self  The object
+        """
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def _request(
+        self,
+        method: type=str,
+        commandurl: type=str,
+        params: Union[None, dict]=None,
+        data: Union[None, str, bytes]=None,
+        headers: Union[None, dict]=None
+    ):
+        """
+        @brief This sends a request within the rate limit, and sends it again if the
+               server asks to slow down or the connection fails, as long as the method
+               is safe to send again
+
+        @param self This object
+        @param method the HTTP method
+        @param commandurl the URL for the request
+        @param params a dictionary of parameters
+        @param data the body of the request
+        @param headers a dictionary of extra headers
+
+        @return a requests.Response object holding the response content, the last one if the retries ran out
+        """
+        attempt = 0
+        while True:
+            wait = self._ratelimit.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            try:
+                response = await self._sendonce(
+                    method,
+                    commandurl,
+                    params=params,
+                    data=data,
+                    headers=headers
+                )
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError):
+                if (
+                        attempt >= self._retries or
+                        not retryable(method, None, self._retry_nonidempotent)
+                ):
+                    raise
+
+                await asyncio.sleep(backoff(attempt, self._retry_backoff, self._retry_backoff_max))
+            else:
+                if (
+                        response.status_code not in RETRYSTATUS or
+                        attempt >= self._retries or
+                        not retryable(method, response.status_code, self._retry_nonidempotent)
+                ):
+                    return response
+
+                wait = retryafter(response)
+                if wait is None:
+                    wait = backoff(attempt, self._retry_backoff, self._retry_backoff_max)
+
+                # Every coroutine waits, as they are all sending to the same server
+                self._ratelimit.pause(wait)
+
+            attempt += 1
+
+    async def _sendonce(
+        self,
+        method: type=str,
+        commandurl: type=str,
+        params: Union[None, dict]=None,
+        data: Union[None, str, bytes]=None,
+        headers: Union[None, dict]=None
+    ):
+        """
+        @brief This sends a request and reads the whole response
+
+        @param self This object
+        @param method the HTTP method
+        @param commandurl the URL for the request
+        @param params a dictionary of parameters
+        @param data the body of the request
+        @param headers a dictionary of extra headers
+
+        @return a requests.Response object holding the response content
+        """
+        session = self._getsession()
+
+        if params:
+            params = {key: str(value) for key, value in params.items()}
+
+        async with self._inflight:
+            async with session.request(
+                method,
+                commandurl,
+                params=params,
+                data=data,
+                headers=headers
+            ) as clientresponse:
+                response = requests.Response()
+                response.status_code = clientresponse.status
+                response.reason = clientresponse.reason
+                response.url = str(clientresponse.url)
+                response.headers = requests.structures.CaseInsensitiveDict(
+                    clientresponse.headers
+                )
+                response.encoding = clientresponse.get_encoding()
+                response._content = await clientresponse.read()
+
+        return response
+
+    async def _getpages(
+        self,
+        commandurl: type=str,
+        params: Union[None, dict]=None
+    ):
+        """
+        @brief This iterates over the pages of a GET request, following the paging lastId cursor
+
+        @param self This object
+        @param commandurl the URL for the request
+        @param params a dictionary of parameters
+
+        @return an asynchronous generator of (requests.Response, dict) tuples, one for each page,
+                the dict is the parsed JSON content or None if it could not be parsed
+        """
+        while commandurl is not None:
+            response = await self._request(
+                'GET',
+                commandurl,
+                params=params
+            )
+
+            try:
+                page = response.json()
+            except ValueError:
+                page = None
+
+            yield response, page
+
+            commandurl = None
+            if response.ok:
+                commandurl, params = nextpage(
+                    self._baseaddress,
+                    page,
+                    params
+                )
+
+    async def _get(
+        self,
+        commandurl: type=str,
+        params: Union[None, dict]=None
+    ):
+        """
+        @brief This exposes a raw get method for the session, paged responses
+               are followed and merged into a single response
+
+        @param self This object
+        @param commandurl the URL for the request
+        @param params a dictionary of parameters
+
+        @return a requests.Response object, if the JSON content was parsed
+                it is a PagedResponse holding the merged content of all pages
+        """
+        response = None
+        content = None
+
+        async for response, page in self._getpages(
+            commandurl=commandurl,
+            params=params
+        ):
+            # Failed or non-JSON pages are returned as they are
+            if not response.ok or not isinstance(page, dict):
+                return response
+
+            if content is None:
+                content = page
+            else:
+                mergepage(content, page)
+
+        # The last page carries no cursor, so neither should the merged content
+        content.pop('paging', None)
+
+        return PagedResponse(response, content)
+
+    def _prepare(
+        self,
+        method: type=str,
+        commandurl: type=str,
+        data: type=dict
+    ):
+        """
+        @brief This creates a prepared request with the headers and authentication of this object
+
+        @param self This object
+        @param method the HTTP method
+        @param commandurl the URL for the request
+        @param data a dictionary of arguments and parameters
+
+        @return a requests.PreparedRequest object
+        """
+        request = requests.Request(
+            method,
+            url=commandurl,
+            headers=self._headers,
+            auth=requests.auth.HTTPBasicAuth(
+                self._username,
+                self._password
+            ),
+            data=json.dumps(data)
+        )
+
+        return request.prepare()
+
+    def _preppost(
+        self,
+        commandurl: type=str,
+        data: type=dict
+    ):
+        """
+        @brief This creates a prepared POST request
+
+        @param self This object
+        @param commandurl the URL for the request
+        @param data a dictionary of arguments and parameters
+
+        @return a requests.PreparedRequest object
+        """
+        return self._prepare('POST', commandurl, data)
+
+    def _prepput(
+        self,
+        commandurl: type=str,
+        data: type=dict
+    ):
+        """
+        @brief This creates a prepared PUT request
+
+        @param self This object
+        @param commandurl the URL for the request
+        @param data a dictionary of arguments and parameters
+
+        @return a requests.PreparedRequest object
+        """
+        return self._prepare('PUT', commandurl, data)
+
+    def clearwarnings(self):
+        """
+        @brief      Retrieve and clear the warning array
+
+        @param      self  The object
+
+        @return     the warnings array before it was cleared
+        """
+        warnings = self.warnings
+        self.warnings = []
+        return warnings
+
+    async def info(self):
+        """
+        @brief      Returns the response from the info command
+
+        @param      self  The object
+
+        @return     the requests.Response from the info request
+        """
+        commandurl = "%s/info" % self._baseurl
+        return await self._get(commandurl)
+
+    async def get_filesystem(
+            self,
+            filesystem: Union[str, None]=None,
+            fields: Union[str, list, None]=None
+    ):
+        """
+        @brief      List all filesystems or return a specific filesystem
+
+        @param      self        The object
+        @param      filesystem  The filesystem name, default None, which returns all filesystems
+        @param      fields      A field name, or list of field names, to return
+
+        @return     The request response as a Response.requests object
+        """
+        commandurl, params = _filesystemquery(
+            self,
+            filesystem=filesystem,
+            fields=fields
+        )
+
+        return await self._get(
+            commandurl,
+            params=params
+        )
+
+    async def get_fileset(
+            self,
+            filesystem: Union[str, None],
+            fileset: Union[str, None]=None,
+            allfields: Union[bool, None]=None,
+            fields: Union[str, list, None]=None
+    ):
+        """
+        @brief      List all filesets or return a specific fileset from a filesystem
+
+        @param      self        The object
+        @param      filesystem  The filesystem name
+        @param      fileset     The fileset name, default None, which returns all filesets
+        @param      fields      A field name, or list of field names, to return, overrides allfields
+
+        @return     The request response as a Response.requests object
+        """
+        commandurl, params = _filesetquery(
+            self,
+            filesystem=filesystem,
+            fileset=fileset,
+            allfields=allfields,
+            fields=fields
+        )
+
+        return await self._get(
+            commandurl,
+            params=params
+        )
+
+    async def get_acl(
+            self,
+            filesystem: Union[str, None],
+            path: Union[str, None],
+            allfields: bool=False,
+            fields: Union[str, list, None]=None
+    ):
+        """
+        @brief      Return the acl of a path
+
+        @param      self        The object
+        @param      filesystem  The filesystem name
+        @param      path        The path
+        @param      fields      A field name, or list of field names, to return, overrides allfields
+
+        @return     The request response as a Response.requests object
+        """
+        commandurl, params = _aclquery(
+            self,
+            filesystem=filesystem,
+            path=path,
+            allfields=allfields,
+            fields=fields
+        )
+
+        return await self._get(
+            commandurl,
+            params=params
+        )
+
+    async def get_quota(
+            self,
+            filesystem: str,
+            fileset: Union[str, None]=None,
+            filter: Union[None, str]=None,
+            allfields: bool=False,
+            fields: Union[str, list, None]=None
+    ):
+        """
+        @brief      List all quotas or return a specific quota for a fileset
+
+        @param      self        The object
+        @param      filesystem  The filesystem name
+        @param      fileset The fileset to get quotas from, if none gets all quotas from the filesystem
+        @param      fields      A field name, or list of field names, to return, overrides allfields
+
+        @return     The request response as a Response.requests object
+        """
+        commandurl, params = _quotaquery(
+            self,
+            filesystem=filesystem,
+            fileset=fileset,
+            filter=filter,
+            allfields=allfields,
+            fields=fields
+        )
+
+        return await self._get(
+            commandurl,
+            params=params
+        )
+
+    async def get_jobs(
+            self,
+            jobid: Union[str, None]=None,
+            fields: Union[str, list, None]=None,
+            filter: Union[None, str]=None
+    ):
+        """
+        @brief      Gets the job.
+
+        @param      self   The object
+        @param      jobid  The jobid
+        @param      fields  A field name, or list of field names, to return
+        @param      filter  A filter string for the jobs query, e.g. 'jobId>=1000'
+
+        @return     The request response as a Response.requests object
+        """
+        commandurl, params = _jobquery(
+            self,
+            jobid=jobid,
+            fields=fields,
+            filter=filter
+        )
+
+        return await self._get(
+            commandurl,
+            params=params
+        )
+
+    async def filesystem(
+            self,
+            filesystem: str
+    ):
+        """
+        @brief      List a specific filesystem as a JSON dict
+
+        @param      self        The object
+        @param      filesystem  The filesystem name
+
+        @return     Just the JSON content from the response as a dict
+        """
+        fs = None
+        fsresponse = await self.get_filesystem(filesystem=filesystem)
+        if fsresponse.ok:
+            fs = fsresponse.json()['filesystems'][0]
+
+        return fs
+
+    async def list_filesystems(self):
+        """
+        @brief      List the names of all filesystems
+
+        @param      self  The object
+
+        @return     a list of filesystem names
+        """
+        fslist = []
+        fsresponse = await self.get_filesystem()
+        if fsresponse.ok:
+            for fs in fsresponse.json()['filesystems']:
+                fslist.append(fs['name'])
+
+        return fslist
+
+    async def fileset(
+            self,
+            filesystem: str,
+            fileset: Union[str, None]=None,
+            allfields: Union[bool, None]=None,
+            acl: bool=False,
+            everything: bool=False
+    ):
+        """
+        @brief      This method returns a specifc fileset from a specific filesystem as JSON with the response stripped away.
+
+        @param      self        The object
+        @param      filesystem  The filesystem
+        @param      fileset     The fileset
+        @param      allfields   If not None, all fields are requested
+        @param      acl         If true, the acl of each fileset is added to its config
+        @param      everything  If true, all fields and the acl are requested
+
+        @return     a fileset dict, a list of fileset dicts, or None
+        """
+        if everything:
+            acl = True
+            allfields = True
+
+        response = None
+        fsresponse = await self.get_fileset(
+            filesystem=filesystem,
+            fileset=fileset,
+            allfields=allfields
+        )
+
+        if fsresponse.ok:
+            response = fsresponse.json()['filesets']
+
+            if acl:
+                fsacls = await asyncio.gather(
+                    *[
+                        self.acl(
+                            filesystem=fs['filesystemName'],
+                            path=fs['config']['path'],
+                            allfields=allfields
+                        )
+                        for fs in response
+                    ]
+                )
+                for fs, fsacl in zip(response, fsacls):
+                    if fsacl:
+                        fs['config']['acl'] = fsacl
+
+            # If it's a single element list, just return the element
+            if len(response) == 1:
+                response = response[0]
+
+        return response
+
+    async def quota(
+            self,
+            filesystem: str,
+            fileset: Union[str, None]=None,
+            filter: Union[None, str]=None,
+            allfields: bool=False
+    ):
+        """
+        @brief      List all quotas or return a specific quota for a fileset
+
+        @param      self        The object
+        @param      filesystem  The filesystem name
+        @param      fileset The fileset to get quotas from, if none gets all quotas from the filesystem
+
+        @return     a quota dict, a list of quota dicts, or None
+        """
+        response = None
+        quotaresponse = await self.get_quota(
+            filesystem=filesystem,
+            fileset=fileset,
+            filter=filter,
+            allfields=allfields
+        )
+
+        if quotaresponse.ok:
+            response = quotaresponse.json()['quotas']
+            if len(response) == 1:
+                response = response[0]
+
+        return response
+
+    async def acl(
+            self,
+            filesystem: Union[str, None],
+            path: Union[str, None]=None,
+            fileset: Union[str, None]=None,
+            allfields: bool=False
+    ):
+        """
+        @brief      Return the acl of a path or fileset, or the acls of
+                    all filesets in the filesystem
+
+        @param      self        The object
+        @param      filesystem  The filesystem
+        @param      path        The path
+        @param      fileset     The fileset
+
+        @return     an acl dict tagged with its path, a list of acl dicts, or None
+        """
+        acl = None
+
+        if fileset is not None:
+            fs = await self.fileset(
+                filesystem=filesystem,
+                fileset=fileset,
+                allfields=True
+            )
+            if fs is not None:
+                path = fs['config']['path']
+
+        if path is not None:
+            response = await self.get_acl(
+                filesystem=filesystem,
+                path=path,
+                allfields=allfields
+            )
+            if response.ok and 'acl' in response.json():
+                acl = response.json()['acl']
+                # tag the acl with the path
+                acl['path'] = path
+        elif fileset is None:
+            filesets = await self.fileset(
+                filesystem=filesystem,
+                allfields=True
+            )
+            if isinstance(filesets, dict):
+                filesets = [filesets]
+
+            acl = [
+                fsacl for fsacl in await asyncio.gather(
+                    *[
+                        self.acl(
+                            filesystem=filesystem,
+                            path=fs['config']['path'],
+                            allfields=allfields
+                        )
+                        for fs in filesets or []
+                    ]
+                )
+                if fsacl is not None
+            ]
+
+        if isinstance(acl, list):
+            if len(acl) == 1:
+                acl = acl[0]
+
+        return acl
+
+    async def job(
+            self,
+            jobid: str
+    ):
+        """
+        @brief      Return a job
+
+        @param      self   The object
+        @param      jobid  The jobid
+
+        @return     a job dict, or None
+        """
+        response = None
+
+        jobresponse = await self.get_jobs(jobid)
+
+        if jobresponse.ok:
+            response = jobresponse.json()['jobs']
+            if len(response) == 1:
+                response = response[0]
+
+        return response
+
+## WRITE METHODS: Methods beyond this point can update spectrumscale
+## these methods MUST make no changes if self._dryrun is True
+##
+
+    async def send(
+        self,
+        preprequest: type=requests.PreparedRequest
+    ):
+        """
+        @brief      Send a prepared request, unless this is a dry run
+
+        @param      self         The object
+        @param      preprequest  The requests.PreparedRequest
+
+        @return     a requests.Response, or the request as a dict if this is a dry run
+        """
+        response = None
+        if self._dryrun:
+            response = jsonprepreq(preprequest)
+            response['dryrun'] = True
+        else:
+            # The session provides the authentication
+            headers = {
+                key: value
+                for key, value in preprequest.headers.items()
+                if key.lower() not in ['authorization', 'content-length']
+            }
+            response = await self._request(
+                preprequest.method,
+                preprequest.url,
+                data=preprequest.body,
+                headers=headers
+            )
+
+        return response
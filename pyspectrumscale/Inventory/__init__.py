@@ -0,0 +1,547 @@
+"""
+Create an Inventory that keeps a persistent snapshot of the filesystems,
+filesets and quotas of a Spectrum Scale cluster in a local SQLite file
+
+Loading a snapshot needs no requests to the Spectrum Scale API. Refreshing
+a snapshot is incremental, only filesets that are new since the last refresh
+are fetched in full, and the usage and limits of all quotas are read from one
+listing of only those fields. The other fileset data is as old as the last full
+refresh, which is made when it is older than a maximum age, a day by default,
+or when asked for. A refresh that fails leaves the snapshot as it was.
+"""
+import json
+import sqlite3
+import time
+from typing import Union
+from pyspectrumscale.Api import Api
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS refreshed (
+        filesystem TEXT PRIMARY KEY,
+        fullrefresh REAL,
+        refresh REAL
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS filesystems (
+        name TEXT PRIMARY KEY,
+        data TEXT
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS filesets (
+        filesystem TEXT,
+        name TEXT,
+        data TEXT,
+        PRIMARY KEY (filesystem, name)
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS quotas (
+        filesystem TEXT,
+        fileset TEXT,
+        data TEXT
+    )
+    """,
+    """
+    CREATE INDEX IF NOT EXISTS quotas_fileset ON quotas (filesystem, fileset)
+    """
+]
+
+# The quota fields read by an incremental refresh, the fields that identify a
+# quota and its usage and limits, the other fields are kept from the last full refresh
+QUOTAREFRESHFIELDS = [
+    'quotaType',
+    'filesetName',
+    'objectName',
+    'blockUsage',
+    'blockQuota',
+    'blockLimit',
+    'blockInDoubt',
+    'blockGrace',
+    'filesUsage',
+    'filesQuota',
+    'filesLimit',
+    'filesInDoubt',
+    'filesGrace'
+]
+
+
+def _quotakey(
+        quota: type=dict
+):
+    """
+    @brief      The fields that identify a quota in a filesystem
+
+    @param      quota  The quota dict
+
+    @return     a tuple of the quota type, fileset name and object name
+    """
+    return (
+        quota.get('quotaType'),
+        quota.get('filesetName'),
+        quota.get('objectName')
+    )
+
+
+def _aslist(
+        response: Union[dict, list, None]
+):
+    """
+    @brief      Undo the single element unwrapping of the Api methods
+
+    @param      response  A dict, a list of dicts, or None
+
+    @return     a list of dicts
+    """
+    if response is None:
+        return []
+    if isinstance(response, list):
+        return response
+
+    return [response]
+
+
+def _dumps(
+        data: type=dict
+):
+    """
+    @brief      Compact JSON for storage
+
+    @param      data  The data
+
+    @return     a JSON string
+    """
+    return json.dumps(data, separators=(',', ':'), sort_keys=True)
+
+
+class Inventory:
+    """
+    A persistent snapshot of the filesystems, filesets and quotas
+    of a Spectrum Scale cluster
+    """
+
+    def __init__(
+        self,
+        scaleapi: type=Api,
+        path: str='pyspectrumscale.inventory.sqlite',
+        acl: bool=False
+    ):
+        """
+        @brief      Initiator of the Inventory class, opens or creates the snapshot
+
+        @param      self      The object
+        @param      scaleapi  The pyspectrumscale.Api used to refresh the snapshot
+        @param      path      The path of the SQLite snapshot file
+        @param      acl       If true, the fileset acls are stored in the fileset config
+        """
+        self._scaleapi = scaleapi
+        self._path = path
+        self._acl = acl
+
+        self._db = sqlite3.connect(self._path)
+        with self._db:
+            for statement in SCHEMA:
+                self._db.execute(statement)
+
+    def close(self):
+        """
+        @brief      Close the snapshot file
+
+        @param      self  The object
+        """
+        self._db.close()
+
+    def refreshed(
+            self,
+            filesystem: Union[str, None]=None
+    ):
+        """
+        @brief      When the snapshot was last refreshed
+
+        @param      self        The object
+        @param      filesystem  The filesystem name, default None, which returns all filesystems
+
+        @return     a dict of filesystem names to dicts of the 'fullrefresh' time, which
+                    the fileset data is as old as, and the 'refresh' time, which the fileset
+                    names and the quota usage and limits are as old as, in seconds since the epoch
+        """
+        query = "SELECT filesystem, fullrefresh, refresh FROM refreshed"
+        args = ()
+        if filesystem is not None:
+            query += " WHERE filesystem = ?"
+            args = (filesystem,)
+
+        return {
+            name: {
+                'fullrefresh': fullrefresh,
+                'refresh': refresh
+            }
+            for name, fullrefresh, refresh in self._db.execute(query, args)
+        }
+
+    def filesystems(self):
+        """
+        @brief      The filesystems in the snapshot
+
+        @param      self  The object
+
+        @return     a list of filesystem dicts
+        """
+        return [
+            json.loads(data)
+            for (data,) in self._db.execute(
+                "SELECT data FROM filesystems ORDER BY name"
+            )
+        ]
+
+    def filesets(
+            self,
+            filesystem: Union[str, None]=None
+    ):
+        """
+        @brief      The filesets in the snapshot
+
+        @param      self        The object
+        @param      filesystem  The filesystem name, default None, which returns filesets from all filesystems
+
+        @return     a list of fileset dicts
+        """
+        query = "SELECT data FROM filesets"
+        args = ()
+        if filesystem is not None:
+            query += " WHERE filesystem = ?"
+            args = (filesystem,)
+        query += " ORDER BY filesystem, name"
+
+        return [
+            json.loads(data)
+            for (data,) in self._db.execute(query, args)
+        ]
+
+    def quotas(
+            self,
+            filesystem: Union[str, None]=None
+    ):
+        """
+        @brief      The quotas in the snapshot
+
+        @param      self        The object
+        @param      filesystem  The filesystem name, default None, which returns quotas from all filesystems
+
+        @return     a list of quota dicts
+        """
+        query = "SELECT data FROM quotas"
+        args = ()
+        if filesystem is not None:
+            query += " WHERE filesystem = ?"
+            args = (filesystem,)
+        query += " ORDER BY rowid"
+
+        return [
+            json.loads(data)
+            for (data,) in self._db.execute(query, args)
+        ]
+
+    def refresh(
+            self,
+            filesystems: Union[str, list, None]=None,
+            maxage: Union[int, None]=86400,
+            full: bool=False
+    ):
+        """
+        @brief      Refresh the snapshot from the Spectrum Scale API. The names of the
+                    filesets are listed, filesets that were deleted are removed, new
+                    filesets are fetched, and the usage and limits of all quotas are
+                    read from one listing. The other data of filesets that were already
+                    in the snapshot is only read by a full refresh, it is as old as the
+                    'fullrefresh' time. A filesystem is refreshed in full if it has never
+                    been refreshed, if its last full refresh is older than maxage, or if
+                    full is true. If a request fails, the snapshot of the filesystem is
+                    left as it was.
+
+        @param      self         The object
+        @param      filesystems  The filesystem, or list of filesystems, default None, which refreshes all filesystems
+        @param      maxage       The maximum age in seconds of a full refresh, default one day, None never expires
+        @param      full         If true, all filesystems are refreshed in full
+
+        @return     a dict of filesystem names to dicts of the counts of 'added' and 'removed'
+                    filesets, whether the refresh was 'full', whether it was 'ok', and the
+                    time of the last 'fullrefresh'
+        """
+        response = {}
+        now = time.time()
+
+        if filesystems is None:
+            fsresponse = self._scaleapi.get_filesystem()
+            if not fsresponse.ok:
+                # Without the listing, no filesystem can be known to be removed
+                return response
+            names = [fs['name'] for fs in fsresponse.json().get('filesystems', [])]
+        elif isinstance(filesystems, list):
+            names = filesystems
+        else:
+            names = [filesystems]
+
+        fslist = [
+            fs for fs in _aslist(self._scaleapi.filesystems(names))
+            if fs is not None
+        ]
+
+        with self._db:
+            if filesystems is None:
+                self._db.execute(
+                    "DELETE FROM filesystems WHERE name NOT IN (%s)" % ', '.join('?' * len(names)),
+                    names
+                )
+            self._db.executemany(
+                "INSERT OR REPLACE INTO filesystems (name, data) VALUES (?, ?)",
+                [(fs['name'], _dumps(fs)) for fs in fslist]
+            )
+
+        loaded = set(fs['name'] for fs in fslist)
+        for name in names:
+            fullrefresh = full
+            refreshed = self.refreshed(name).get(name)
+            if not fullrefresh:
+                if refreshed is None or refreshed['fullrefresh'] is None:
+                    fullrefresh = True
+                elif maxage is not None and now - refreshed['fullrefresh'] > maxage:
+                    fullrefresh = True
+
+            if name not in loaded:
+                response[name] = self._failedrefresh(name, fullrefresh)
+            elif fullrefresh:
+                response[name] = self._fullrefresh(name, now)
+            else:
+                response[name] = self._incrementalrefresh(name, now)
+
+        return response
+
+    def _failedrefresh(
+            self,
+            filesystem: type=str,
+            full: bool=False
+    ):
+        """
+        @brief      The result of a refresh that failed, the snapshot is unchanged
+
+        @param      self        The object
+        @param      filesystem  The filesystem name
+        @param      full        If true, the refresh was a full refresh
+
+        @return     a dict of the counts of 'added' and 'removed' filesets
+        """
+        refreshed = self.refreshed(filesystem).get(filesystem, {})
+        return {
+            'full': full,
+            'ok': False,
+            'added': 0,
+            'removed': 0,
+            'fullrefresh': refreshed.get('fullrefresh')
+        }
+
+    def _fullrefresh(
+            self,
+            filesystem: type=str,
+            now: type=float
+    ):
+        """
+        @brief      Replace the filesets and quotas of a filesystem in the snapshot
+
+        @param      self        The object
+        @param      filesystem  The filesystem name
+        @param      now         The time of the refresh
+
+        @return     a dict of the counts of 'added' and 'removed' filesets
+        """
+        stored = self._storedfilesets(filesystem)
+
+        # fileset() is None if the listing failed, and a list or dict otherwise
+        filesets = self._scaleapi.fileset(
+            filesystem=filesystem,
+            allfields=True,
+            acl=self._acl
+        )
+        quotaresponse = self._scaleapi.get_quota(
+            filesystem=filesystem,
+            allfields=True
+        )
+        if filesets is None or not quotaresponse.ok:
+            return self._failedrefresh(filesystem, True)
+
+        filesets = _aslist(filesets)
+        quotas = quotaresponse.json().get('quotas', [])
+
+        with self._db:
+            self._db.execute("DELETE FROM filesets WHERE filesystem = ?", (filesystem,))
+            self._db.execute("DELETE FROM quotas WHERE filesystem = ?", (filesystem,))
+            self._storefilesets(filesystem, filesets)
+            self._storequotas(filesystem, quotas)
+            self._db.execute(
+                "INSERT OR REPLACE INTO refreshed (filesystem, fullrefresh, refresh) VALUES (?, ?, ?)",
+                (filesystem, now, now)
+            )
+
+        names = set(fs['filesetName'] for fs in filesets)
+        return {
+            'full': True,
+            'ok': True,
+            'added': len(names - stored),
+            'removed': len(stored - names),
+            'fullrefresh': now
+        }
+
+    def _incrementalrefresh(
+            self,
+            filesystem: type=str,
+            now: type=float
+    ):
+        """
+        @brief      Add new filesets and their quotas, remove deleted filesets,
+                    and update the usage and limits of all quotas
+
+        @param      self        The object
+        @param      filesystem  The filesystem name
+        @param      now         The time of the refresh
+
+        @return     a dict of the counts of 'added' and 'removed' filesets
+        """
+        stored = self._storedfilesets(filesystem)
+
+        # Only the names are needed to find added and removed filesets
+        fsresponse = self._scaleapi.get_fileset(
+            filesystem=filesystem,
+            fields=['filesetName']
+        )
+        quotaresponse = self._scaleapi.get_quota(
+            filesystem=filesystem,
+            fields=QUOTAREFRESHFIELDS
+        )
+        if not fsresponse.ok or not quotaresponse.ok:
+            return self._failedrefresh(filesystem, False)
+
+        names = set(fs['filesetName'] for fs in fsresponse.json().get('filesets', []))
+        added = sorted(names - stored)
+        removed = sorted(stored - names)
+
+        # New filesets, and their quotas, are fetched in full
+        filesets = self._scaleapi._fanout(
+            lambda name: self._scaleapi.fileset(
+                filesystem=filesystem,
+                fileset=name,
+                allfields=True,
+                acl=self._acl
+            ),
+            added
+        )
+        quotaresponses = self._scaleapi._fanout(
+            lambda name: self._scaleapi.get_quota(
+                filesystem=filesystem,
+                fileset=name,
+                allfields=True
+            ),
+            added
+        )
+        if (
+                any(fs is None for fs in filesets) or
+                not all(response.ok for response in quotaresponses)
+        ):
+            return self._failedrefresh(filesystem, False)
+
+        # The listed usage and limits are laid over the full quotas already known
+        fullquotas = {_quotakey(quota): quota for quota in self.quotas(filesystem)}
+        for response in quotaresponses:
+            for quota in response.json().get('quotas', []):
+                fullquotas[_quotakey(quota)] = quota
+
+        quotas = []
+        for quota in quotaresponse.json().get('quotas', []):
+            fullquota = fullquotas.get(_quotakey(quota))
+            if fullquota is not None:
+                fullquota = dict(fullquota)
+                fullquota.update(quota)
+                quota = fullquota
+            quotas.append(quota)
+
+        with self._db:
+            self._db.executemany(
+                "DELETE FROM filesets WHERE filesystem = ? AND name = ?",
+                [(filesystem, name) for name in removed + added]
+            )
+            self._db.execute("DELETE FROM quotas WHERE filesystem = ?", (filesystem,))
+            self._storefilesets(filesystem, filesets)
+            self._storequotas(filesystem, quotas)
+            self._db.execute(
+                "UPDATE refreshed SET refresh = ? WHERE filesystem = ?",
+                (now, filesystem)
+            )
+
+        return {
+            'full': False,
+            'ok': True,
+            'added': len(added),
+            'removed': len(removed),
+            'fullrefresh': self.refreshed(filesystem)[filesystem]['fullrefresh']
+        }
+
+    def _storedfilesets(
+            self,
+            filesystem: type=str
+    ):
+        """
+        @brief      The names of the filesets of a filesystem in the snapshot
+
+        @param      self        The object
+        @param      filesystem  The filesystem name
+
+        @return     a set of fileset names
+        """
+        return set(
+            name for (name,) in self._db.execute(
+                "SELECT name FROM filesets WHERE filesystem = ?",
+                (filesystem,)
+            )
+        )
+
+    def _storefilesets(
+            self,
+            filesystem: type=str,
+            filesets: type=list
+    ):
+        """
+        @brief      Store filesets in the snapshot, in the current transaction
+
+        @param      self        The object
+        @param      filesystem  The filesystem name
+        @param      filesets    A list of fileset dicts
+        """
+        self._db.executemany(
+            "INSERT OR REPLACE INTO filesets (filesystem, name, data) VALUES (?, ?, ?)",
+            [(filesystem, fs['filesetName'], _dumps(fs)) for fs in filesets]
+        )
+
+    def _storequotas(
+            self,
+            filesystem: type=str,
+            quotas: type=list
+    ):
+        """
+        @brief      Store quotas in the snapshot, in the current transaction
+
+        @param      self        The object
+        @param      filesystem  The filesystem name
+        @param      quotas      A list of quota dicts
+        """
+        self._db.executemany(
+            "INSERT INTO quotas (filesystem, fileset, data) VALUES (?, ?, ?)",
+            [
+                (
+                    filesystem,
+                    quota.get('filesetName') or quota.get('objectName'),
+                    _dumps(quota)
+                )
+                for quota in quotas
+            ]
+        )
@@ -1,13 +1,147 @@
 """
 Create a JobQueue that can manage and track requests sent to
 the Spectrum Scale API
+
+Jobs are scheduled from a dependency graph, a job is put on the ready
+queue when all the jobs it requires have finished, so each pass of the queue
+only submits ready jobs and polls jobs that are running on the server. Running
+jobs are refreshed together from one listing of the server's jobs.
 """
-from requests import PreparedRequest, Response
+import json
+import os.path
+import sys
+from collections import Counter, deque
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from requests import PreparedRequest, Request, Response
+from requests.exceptions import RequestException
 from typing import Union
 from uuid import uuid4 as uuid
-from time import sleep
+from random import uniform
+from time import monotonic, sleep, time
 from pyspectrumscale.Api import Api
-from pyspectrumscale.Api._utils import jsonprepreq, jsonresponse
+from pyspectrumscale.Api._utils import jsonprepreq, jsonresponse, reqfingerprint
+from pyspectrumscale.Api._cache import resource
+
+# The fields of a job that polling reads
+POLLFIELDS = ['jobId', 'status', 'result']
+
+
+def _journalrequest(
+        request: type=PreparedRequest
+):
+    """
+    @brief      A prepared request as a JSONable dict for the journal,
+                without the credentials in its headers
+
+    @param      request  The requests.PreparedRequest
+
+    @return     a dict of the method, url and body of the request
+    """
+    jsonrequest = jsonprepreq(request)
+    return {
+        'method': jsonrequest['method'],
+        'url': jsonrequest['url'],
+        'body': jsonrequest['body']
+    }
+
+
+def _requirelist(
+        requires: Union[str, list, set, tuple, None]
+):
+    """
+    @brief      The uuids of the jobs a job requires as a list without duplicates
+
+    @param      requires  A job uuid, a list, set or tuple of job uuids, or None
+
+    @return     a list of job uuids
+    """
+    if not requires:
+        return []
+    if isinstance(requires, str):
+        return [requires]
+
+    return list(dict.fromkeys(requires))
+
+
+class JobRecord(Mapping):
+    """
+    A job in a JobQueue, a slotted record that is read as a read-only dict
+    with the keys 'request', 'status', 'jobid', 'sendresponse', 'requires',
+    'runonfail', 'ok', and 'error' if the job failed, only the JobQueue that
+    holds it changes it, listjobs and job return copies of it as dicts
+    """
+
+    __slots__ = (
+        'request',
+        'status',
+        'jobid',
+        'sendresponse',
+        'requires',
+        'runonfail',
+        'ok',
+        'error'
+    )
+
+    def __init__(
+            self,
+            request: type=PreparedRequest,
+            status: type=str,
+            requires: tuple=(),
+            runonfail: bool=True
+    ):
+        """
+        @brief      Initiator of the JobRecord class
+
+        @param      self       The object
+        @param      request    The requests.PreparedRequest of the job
+        @param      status     The status of the job
+        @param      requires   A tuple of the uuids of the jobs this job requires
+        @param      runonfail  If true this job runs after a required job fails
+        """
+        self._set(
+            request=request,
+            status=status,
+            jobid=None,
+            sendresponse=None,
+            requires=requires,
+            runonfail=runonfail,
+            ok=True,
+            error=None
+        )
+
+    def _set(
+            self,
+            **values
+    ):
+        """
+        @brief      Change the fields of the record, for the JobQueue that holds it
+
+        @param      self    The object
+        @param      values  The new values, by field name
+        """
+        for key, value in values.items():
+            object.__setattr__(self, key, value)
+
+    def __setattr__(self, key, value):
+        raise AttributeError("JobRecord is read-only, cannot set %s" % key)
+
+    def __getitem__(self, key):
+        if key not in self.__slots__ or (key == 'error' and self.error is None):
+            raise KeyError(key)
+
+        return getattr(self, key)
+
+    def __iter__(self):
+        for key in self.__slots__:
+            if key != 'error' or self.error is not None:
+                yield key
+
+    def __len__(self):
+        return len(self.__slots__) - (self.error is None)
+
+    def __repr__(self):
+        return "JobRecord(%r)" % dict(self)
 
 
 class JobQueue:
@@ -16,106 +150,172 @@ class JobQueue:
     the Spectrum Scale API
     """
 
+    # Globals:
+    NEW = 'NEW'
+    EMPTY = 'EMPTY'
+    PENDING = 'PENDING'
+    SUBMITTED = 'SUBMITTED'
+    SUBMITFAILED = 'SUBMITFAILED'
+    REQUIREDFAILED = 'REQUIREDFAILED'
+    RUNNING = 'RUNNING'
+    COMPLETED = 'COMPLETED'
+    FAILED = 'FAILED'
+    NEWSTATES = frozenset([
+        NEW,
+        PENDING
+    ])
+    SUBMITTEDSTATES = frozenset([
+        SUBMITTED,
+        SUBMITFAILED,
+        RUNNING,
+        COMPLETED,
+        FAILED
+    ])
+    RUNNINGSTATES = frozenset([SUBMITTED, RUNNING])
+    COMPLETEDSTATES = frozenset([
+        EMPTY,
+        COMPLETED,
+        SUBMITFAILED,
+        FAILED,
+        REQUIREDFAILED
+    ])
+    SUCCESSSTATES = frozenset([COMPLETED])
+    FAILEDSTATES = frozenset([
+        SUBMITFAILED,
+        REQUIREDFAILED,
+        FAILED
+    ])
+
     def __init__(
         self,
-        scaleapi: type=Api
+        scaleapi: type=Api,
+        max_inflight: Union[int, None]=None,
+        endpoint_limits: Union[dict, None]=None,
+        submit_workers: int=1,
+        poll_initial: float=0.5,
+        poll_factor: float=2.0,
+        poll_max: float=30.0,
+        poll_jitter: float=0.1,
+        journal: Union[str, None]=None,
+        keep_sendresponse: bool=True
     ):
+        """
+        @brief      Initiator of the JobQueue class
+
+        @param      self               This JobQueue object
+        @param      scaleapi           The pyspectrumscale.Api used to submit and poll jobs
+        @param      max_inflight       The maximum number of jobs running on the server, default None, which is unlimited
+        @param      endpoint_limits    A dict of the maximum number of running jobs for an endpoint, e.g. {'filesets': 4, 'quotas': 16, 'acl': 16}
+        @param      submit_workers     The number of requests sent concurrently, 1 sends them serially
+        @param      poll_initial       The seconds before a submitted job is first polled
+        @param      poll_factor        The factor the poll interval of a running job grows by after each poll
+        @param      poll_max           The maximum seconds between polls of a running job
+        @param      poll_jitter        The fraction the poll interval is randomly varied by, so polls spread out
+        @param      journal            The path of a JSON lines file the job events are appended to, default None, which keeps no journal
+        @param      keep_sendresponse  If false, the response to a successful submission is not kept once its job id is read
+        """
+        if max_inflight is not None and max_inflight < 1:
+            raise ValueError("max_inflight must be at least 1, not %s" % max_inflight)
+
+        for endpoint, limit in (endpoint_limits or {}).items():
+            if limit < 1:
+                raise ValueError(
+                    "The limit of endpoint %s must be at least 1, not %s" % (endpoint, limit)
+                )
+
         self._scaleapi = scaleapi
         self._jobs = {}
+        self._keep_sendresponse = keep_sendresponse
+
+        self._max_inflight = max_inflight
+        self._endpoint_limits = dict(endpoint_limits or {})
+        self._submit_workers = max(1, submit_workers)
+        # The number of running jobs for each endpoint
+        self._endpointcounts = Counter()
+
+        self._poll_initial = poll_initial
+        self._poll_factor = poll_factor
+        self._poll_max = poll_max
+        self._poll_jitter = poll_jitter
+        # The time each running job is next polled, and its current poll interval
+        self._nextpoll = {}
+
+        self._journalpath = journal
+        self._journal = None
 
-        # Globals:
-        self.NEW = 'NEW'
-        self.EMPTY = 'EMPTY'
-        self.PENDING = 'PENDING'
-        self.SUBMITTED = 'SUBMITTED'
-        self.SUBMITFAILED = 'SUBMITFAILED'
-        self.REQUIREDFAILED = 'REQUIREDFAILED'
-        self.RUNNING = 'RUNNING'
-        self.COMPLETED = 'COMPLETED'
-        self.FAILED = 'FAILED'
-        self.NEWSTATES = [
-            self.NEW,
-            self.PENDING
-        ]
-        self.SUBMITTEDSTATES = [
-            self.SUBMITTED,
-            self.SUBMITFAILED,
-            self.RUNNING,
-            self.COMPLETED,
-            self.FAILED
-        ]
-        self.RUNNINGSTATES = [self.SUBMITTED, self.RUNNING]
-        self.COMPLETEDSTATES = [
-            self.EMPTY,
-            self.COMPLETED,
-            self.SUBMITFAILED,
-            self.FAILED,
-            self.REQUIREDFAILED
-        ]
-        self.SUCCESSSTATES = [self.COMPLETED]
-        self.FAILEDSTATES = [
-            self.SUBMITFAILED,
-            self.REQUIREDFAILED,
-            self.FAILED
-        ]
+        # The dependency graph, the uuids of the jobs waiting for each job
+        self._dependents = {}
+        # The number of unfinished jobs each pending job requires
+        self._unfinished = {}
+        # The length of the longest chain of jobs starting at each job,
+        # recomputed when jobs are queued
+        self._heights = None
+        # The uuids of jobs that can be submitted, in the order they became ready
+        self._ready = deque()
+        # The uuids of jobs running on the server
+        self._inflight = set()
+        # The uuid of the job queued for each request fingerprint
+        self._fingerprints = {}
 
     def listjobs(
             self,
             asjson: bool=False
     ):
+        """
+        @brief      The jobs in the queue
+
+        @param      self    This JobQueue object
+        @param      asjson  If true, the requests are returned as JSONable dicts
 
-        joblist = dict(self._jobs)
-        if asjson:
-            for jobuuid in joblist:
-                job = self.job(jobuuid, asjson=asjson)
-                joblist[jobuuid] = job
+        @return     a dict of copies of the jobs as dicts, keyed by uuid
+        """
+        joblist = {}
+        for jobuuid in self._jobs:
+            joblist[jobuuid] = self.job(jobuuid, asjson=asjson)
 
         return joblist
 
     def listjobuuids(
             self
     ):
-        idlist = []
-        for jobuuid in self.listjobs():
-            idlist.append(jobuuid)
-
-        return idlist
+        return list(self._jobs)
 
     def listjobids(
             self
     ):
         idlist = []
-        for jobuuid in self.listjobs():
-            idlist.append(self.job(jobuuid)['jobid'])
+        for jobuuid in self._jobs:
+            idlist.append(self._jobs[jobuuid].jobid)
 
         return idlist
 
     def job(
             self,
             jobuuid: str,
-            asjson: bool=False
+            asjson: bool=False,
+            refresh: bool=False
     ):
+        """
+        @brief      Return a copy of a job
+
+        @param      self     This JobQueue object
+        @param      jobuuid  The uuid of the job
+        @param      asjson   If true, the request is returned as a JSONable dict
+        @param      refresh  If true, the status of a running job is polled from the server first
+
+        @return     a dict describing the job, or None if there is no such job
+        """
         job = None
 
         if jobuuid in self._jobs:
+            if refresh and jobuuid in self._inflight:
+                self._poll([jobuuid])
+
             job = dict(self._jobs[jobuuid])
 
             if asjson:
                 job['request'] = jsonprepreq(job['request'])
 
-            # If we're asking about a job, update it's status
-            if job['status'] in self.RUNNINGSTATES and job['jobid']:
-                jobresponse = self._scaleapi.job(job['jobid'])
-                newstatus = jobresponse['status']
-                job['status'] = newstatus
-                self._jobs[jobuuid]['status'] = newstatus
-                if newstatus in self.FAILEDSTATES:
-                    errormsg = jobresponse['result']['stderr'][0]
-                    job['ok'] = False
-                    job['error'] = errormsg
-                    self._jobs[jobuuid]['ok'] = False
-                    self._jobs[jobuuid]['error'] = errormsg
-
         return job
 
     def jobstatus(
@@ -125,45 +325,31 @@ class JobQueue:
         """
         """
         response = {}
+
         if isinstance(jobuuids, list):
-            for jobuuid in jobuuids:
-                job = self.job(jobuuid)
-                if job is not None:
-                    jobstatus = {
-                        'ok': job['ok'],
-                        'status': job['status']
-                    }
-                    if 'error' in job:
-                        jobstatus['error'] = job['error']
-                    response[jobuuid] = jobstatus
+            pass
         elif jobuuids is not None:
-            job = self.job(jobuuids)
-            if job is not None:
+            jobuuids = [jobuuids]
+        else:
+            jobuuids = self.listjobuuids()
+
+        for jobuuid in jobuuids:
+            if jobuuid in self._jobs:
+                job = self._jobs[jobuuid]
                 jobstatus = {
-                    'ok': job['ok'],
-                    'status': job['status']
+                    'ok': job.ok,
+                    'status': job.status
                 }
-                if 'error' in job:
-                    jobstatus['error'] = job['error']
-                response[jobuuids] = jobstatus
-        else:
-            for jobuuid in self.listjobuuids():
-                job = self.job(jobuuid)
-                if job is not None:
-                    jobstatus = {
-                        'ok': job['ok'],
-                        'status': job['status']
-                    }
-                    if 'error' in job:
-                        jobstatus['error'] = job['error']
-                    response[jobuuid] = jobstatus
+                if job.error is not None:
+                    jobstatus['error'] = job.error
+                response[jobuuid] = jobstatus
 
         return response
 
     def queuejob(
             self,
             request: type=PreparedRequest,
-            requires: Union[str, None]=None,
+            requires: Union[str, list, set, tuple, None]=None,
             runonfail: bool=True
     ):
         """
@@ -171,8 +357,8 @@ class JobQueue:
 
         @param      self       This JobQueue object
         @param      request    A requests.PreparedRequest object to submit to the Spectrum Scale API
-        @param      requires   The uuid of a job that needs to finishe before this job runs
-        @param      runonfail  If true this job will run if a required job is COMPLETE or FAIELD, if false it will only run if a required job is COMPLETED
+        @param      requires   The uuid, or a list or set of uuids, of jobs that need to finish before this job runs
+        @param      runonfail  If true this job will run if the required jobs are COMPLETED or FAILED, if false it will only run if all required jobs are COMPLETED
 
         @return     { description_of_the_return_value }
         """
@@ -185,9 +371,9 @@ class JobQueue:
 
         # Has the request already been submitted
         duplicates = []
-        for jobuuid in self.listjobs():
-            if request == self.job(jobuuid)['request']:
-                duplicates.append(jobuuid)
+        fingerprint = reqfingerprint(request)
+        if fingerprint in self._fingerprints:
+            duplicates.append(self._fingerprints[fingerprint])
 
         if duplicates:
             for jobuuid in duplicates:
@@ -196,19 +382,214 @@ class JobQueue:
 
             response['uuid'] = duplicates[0]
         else:
+            requires = _requirelist(requires)
             jobuuid = str(uuid())
-            self._jobs[jobuuid] = {
-                'request': request,
-                'status': self.NEW,
-                'jobid': None,
-                'sendresponse': None,
-                'requires': requires,
-                'runonfail': runonfail,
-                'ok': True
-            }
+            self._jobs[jobuuid] = JobRecord(
+                request,
+                self.NEW,
+                tuple(requires),
+                runonfail
+            )
+            self._fingerprints[fingerprint] = jobuuid
             response['queued'] = True
             response['uuid'] = jobuuid
 
+            self._record(
+                'queue',
+                jobuuid,
+                request=_journalrequest(request),
+                requires=requires,
+                runonfail=runonfail
+            )
+            self._place(jobuuid)
+
+        return response
+
+    def _place(
+            self,
+            jobuuid: str
+    ):
+        """
+        @brief      Put a new job in the dependency graph, on the ready queue if
+                    all the jobs it requires have finished
+
+        @param      self     This JobQueue object
+        @param      jobuuid  The uuid of the job
+        """
+        job = self._jobs[jobuuid]
+        self._heights = None
+
+        unfinished = []
+        for requireuuid in job.requires:
+            if requireuuid not in self._jobs:
+                self._finish(
+                    jobuuid,
+                    self.REQUIREDFAILED,
+                    "Required job %s is not queued" % requireuuid
+                )
+                return
+
+            requirestatus = self._jobs[requireuuid].status
+            if requirestatus in self.FAILEDSTATES and not job.runonfail:
+                self._finish(
+                    jobuuid,
+                    self.REQUIREDFAILED,
+                    "Required job %s failed" % requireuuid
+                )
+                return
+
+            if requirestatus not in self.COMPLETEDSTATES:
+                unfinished.append(requireuuid)
+
+        if not unfinished:
+            self._ready.append(jobuuid)
+        else:
+            job._set(status=self.PENDING)
+            self._unfinished[jobuuid] = len(unfinished)
+            for requireuuid in unfinished:
+                self._dependents.setdefault(requireuuid, []).append(jobuuid)
+
+    def _record(
+            self,
+            event: str,
+            jobuuid: str,
+            **details
+    ):
+        """
+        @brief      Append an event to the journal, if there is one
+
+        @param      self     This JobQueue object
+        @param      event    The event, one of 'queue', 'sending', 'submit' or 'finish'
+        @param      jobuuid  The uuid of the job
+        @param      details  The details of the event
+        """
+        if self._journalpath is None:
+            return
+
+        if self._journal is None:
+            self._journal = open(self._journalpath, 'a')
+
+        details['event'] = event
+        details['uuid'] = jobuuid
+        details['time'] = time()
+        self._journal.write(json.dumps(details, sort_keys=True) + "\n")
+        self._journal.flush()
+
+    def closejournal(self):
+        """
+        @brief      Close the journal file, it is reopened by the next event
+
+        @param      self  This JobQueue object
+        """
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def resume(self):
+        """
+        @brief      Reload the jobs recorded in the journal into an empty queue. Finished
+                    jobs keep their final status, jobs that were submitted are polled on
+                    the next pass, and the other jobs are queued again. A job that was
+                    being sent when the journal ends may have been accepted by the server,
+                    so it is failed rather than sent twice. Nothing is sent by resuming.
+
+        @param      self  This JobQueue object
+
+        @return     a dict of the counts of 'jobs' reloaded, 'inflight' jobs to poll,
+                    'ready' jobs to submit and 'unknown' jobs that were being sent
+        """
+        if self._jobs:
+            raise RuntimeError(
+                "Only an empty JobQueue can be resumed, this one has %s jobs" % len(self._jobs)
+            )
+
+        response = {
+            'jobs': 0,
+            'inflight': 0,
+            'ready': 0,
+            'unknown': 0
+        }
+
+        if self._journalpath is None or not os.path.isfile(self._journalpath):
+            return response
+
+        # Replaying must not append to the journal it reads
+        journalpath = self._journalpath
+        self.closejournal()
+        self._journalpath = None
+
+        queued = []
+        # The jobs that were being sent, until their submission is recorded
+        sending = set()
+        with open(journalpath, 'r') as journal:
+            for line in journal:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    # A line cut short by a crash
+                    continue
+
+                jobuuid = event['uuid']
+                if event['event'] == 'queue':
+                    request = self._scaleapi._session.prepare_request(
+                        Request(
+                            event['request']['method'],
+                            url=event['request']['url'],
+                            data=json.dumps(event['request']['body'])
+                        )
+                    )
+                    self._jobs[jobuuid] = JobRecord(
+                        request,
+                        self.NEW,
+                        tuple(_requirelist(event['requires'])),
+                        event['runonfail']
+                    )
+                    self._fingerprints[reqfingerprint(request)] = jobuuid
+                    queued.append(jobuuid)
+                elif jobuuid not in self._jobs:
+                    continue
+                elif event['event'] == 'sending':
+                    sending.add(jobuuid)
+                elif event['event'] == 'submit':
+                    sending.discard(jobuuid)
+                    self._jobs[jobuuid]._set(
+                        status=self.SUBMITTED,
+                        jobid=event['jobid']
+                    )
+                    if self._keep_sendresponse:
+                        self._jobs[jobuuid]._set(sendresponse=event['sendresponse'])
+                elif event['event'] == 'finish':
+                    sending.discard(jobuuid)
+                    self._jobs[jobuuid]._set(status=sys.intern(event['status']))
+                    if event['status'] in self.FAILEDSTATES:
+                        self._jobs[jobuuid]._set(
+                            ok=False,
+                            error=event['error']
+                        )
+
+        self._journalpath = journalpath
+
+        for jobuuid in queued:
+            job = self._jobs[jobuuid]
+            if job.status in self.RUNNINGSTATES:
+                # Poll the outstanding jobs on the next pass
+                self._inflight.add(jobuuid)
+                self._endpointcounts[self._endpoint(jobuuid)] += 1
+                self._nextpoll[jobuuid] = (0, self._poll_initial)
+            elif jobuuid in sending:
+                response['unknown'] += 1
+                self._finish(
+                    jobuuid,
+                    self.SUBMITFAILED,
+                    "Submission is unknown, the job was being sent when the journal ended"
+                )
+            elif job.status not in self.COMPLETEDSTATES:
+                self._place(jobuuid)
+
+        response['jobs'] = len(queued)
+        response['inflight'] = len(self._inflight)
+        response['ready'] = len(self._ready)
+
         return response
 
     def status(self):
@@ -224,18 +605,17 @@ class JobQueue:
             'completecount': 0,
             'failreports': {}
         }
-        jobstatus = self.jobstatus()
-        status['jobcount'] = len(jobstatus)
+        status['jobcount'] = len(self._jobs)
         if status['jobcount'] > 0:
             status['status'] = self.NEW
 
-            for jobuuid, state in jobstatus.items():
-                if state['status'] in self.COMPLETEDSTATES:
+            for jobuuid, job in self._jobs.items():
+                if job.status in self.COMPLETEDSTATES:
                     status['completecount'] += 1
-                    if state['status'] in self.FAILEDSTATES:
+                    if job.status in self.FAILEDSTATES:
                         status['failcount'] += 1
-                        status['failreports'][jobuuid] = state['error']
-                elif state['status'] in self.RUNNINGSTATES:
+                        status['failreports'][jobuuid] = job.error
+                elif job.status in self.RUNNINGSTATES:
                     status['runningcount'] += 1
                 else:
                     status['newcount'] += 1
@@ -250,75 +630,475 @@ class JobQueue:
 
         return status
 
+    def _height(self):
+        """
+        @brief      The length of the longest chain of unfinished jobs starting at
+                    each job, a job can only require jobs queued before it, so the
+                    queue order is a topological order of the dependency graph
+
+        @param      self  This JobQueue object
+
+        @return     a dict of job uuids to chain lengths
+        """
+        if self._heights is None:
+            self._heights = {}
+            for jobuuid in reversed(list(self._jobs)):
+                self._heights[jobuuid] = 1 + max(
+                    [
+                        self._heights[dependent]
+                        for dependent in self._dependents.get(jobuuid, [])
+                    ],
+                    default=0
+                )
+
+        return self._heights
+
+    def plan(self):
+        """
+        @brief      Plan the unfinished jobs as topological waves, every job in a wave
+                    only requires jobs in earlier waves, so each wave can be submitted
+                    concurrently once the wave before it has finished
+
+        @param      self  This JobQueue object
+
+        @return     a dict of the 'waves' as lists of job uuids, the 'criticalpath'
+                    length, which is the least number of rounds that can finish the
+                    jobs, and the 'criticalpathjobs' of one longest chain
+        """
+        depth = {}
+        waves = []
+        for jobuuid, job in self._jobs.items():
+            if job.status in self.COMPLETEDSTATES:
+                continue
+
+            depth[jobuuid] = 1 + max(
+                [
+                    depth[requireuuid]
+                    for requireuuid in job.requires
+                    if requireuuid in depth
+                ],
+                default=-1
+            )
+            if depth[jobuuid] == len(waves):
+                waves.append([])
+            waves[depth[jobuuid]].append(jobuuid)
+
+        criticalpathjobs = []
+        if waves:
+            heights = self._height()
+            jobuuid = max(waves[0], key=lambda jobuuid: heights[jobuuid])
+            while jobuuid is not None:
+                criticalpathjobs.append(jobuuid)
+                jobuuid = max(
+                    self._dependents.get(jobuuid, []),
+                    key=lambda dependent: heights[dependent],
+                    default=None
+                )
+
+        return {
+            'waves': waves,
+            'criticalpath': len(waves),
+            'criticalpathjobs': criticalpathjobs
+        }
+
+    def _finish(
+            self,
+            jobuuid: str,
+            status: str,
+            error: Union[str, None]=None
+    ):
+        """
+        @brief      Set the final status of a job, and release the jobs that require it
+
+        @param      self     This JobQueue object
+        @param      jobuuid  The uuid of the job
+        @param      status   The final status of the job, one of COMPLETEDSTATES
+        @param      error    The error message if the job failed
+        """
+        job = self._jobs[jobuuid]
+        job._set(status=status)
+        if status in self.FAILEDSTATES:
+            job._set(
+                ok=False,
+                error=error
+            )
+
+        self._record(
+            'finish',
+            jobuuid,
+            status=status,
+            error=error
+        )
+
+        if jobuuid in self._inflight:
+            self._inflight.discard(jobuuid)
+            self._endpointcounts[self._endpoint(jobuuid)] -= 1
+            self._nextpoll.pop(jobuuid, None)
+
+        for dependent in self._dependents.pop(jobuuid, []):
+            self._release(jobuuid, dependent)
+
+    def _release(
+            self,
+            requireuuid: str,
+            jobuuid: str
+    ):
+        """
+        @brief      A job that another job requires has finished, queue the job
+                    as ready once all the jobs it requires have finished, or fail it
+                    if it may not run after a failure
+
+        @param      self         This JobQueue object
+        @param      requireuuid  The uuid of the finished job
+        @param      jobuuid      The uuid of the job that requires it
+        """
+        job = self._jobs[jobuuid]
+        if job.status in self.COMPLETEDSTATES:
+            # Already failed by another job it requires
+            return
+
+        if (
+                self._jobs[requireuuid].status in self.FAILEDSTATES and
+                not job.runonfail
+        ):
+            self._unfinished.pop(jobuuid, None)
+            self._finish(
+                jobuuid,
+                self.REQUIREDFAILED,
+                "Required job %s failed" % requireuuid
+            )
+            return
+
+        self._unfinished[jobuuid] -= 1
+        if not self._unfinished[jobuuid]:
+            del self._unfinished[jobuuid]
+            job._set(status=self.NEW)
+            self._ready.append(jobuuid)
+
+    def _poll(
+            self,
+            jobuuids: list
+    ):
+        """
+        @brief      Poll the server for the status of running jobs, more than one job
+                    is refreshed from a single listing of the server's jobs since the
+                    oldest of them, with only the fields polling reads
+
+        @param      self      This JobQueue object
+        @param      jobuuids  The uuids of the running jobs
+        """
+        if len(jobuuids) > 1:
+            tracked = {}
+            for jobuuid in jobuuids:
+                tracked[self._jobs[jobuuid].jobid] = jobuuid
+
+            try:
+                # Job ids only grow, so the listing starts at the oldest running job
+                for jobresponse in self._scaleapi.iter_jobs(
+                    filter="jobId>=%s" % min(tracked),
+                    fields=POLLFIELDS
+                ):
+                    jobuuid = tracked.pop(jobresponse['jobId'], None)
+                    if jobuuid is not None:
+                        self._update(jobuuid, jobresponse)
+                        # Stop paging once all the running jobs are found
+                        if not tracked:
+                            break
+            except RequestException:
+                # The jobs not found before a page failed are polled one at a time
+                pass
+
+            # Jobs missing from the listing are polled one at a time
+            jobuuids = list(tracked.values())
+
+        for jobuuid in jobuuids:
+            jobresponse = self._scaleapi.job(self._jobs[jobuuid].jobid)
+            if isinstance(jobresponse, dict):
+                self._update(jobuuid, jobresponse)
+
+    def _schedule(
+            self,
+            jobuuid: str,
+            interval: float
+    ):
+        """
+        @brief      Schedule the next poll of a running job
+
+        @param      self      This JobQueue object
+        @param      jobuuid   The uuid of the job
+        @param      interval  The poll interval in seconds, before jitter
+        """
+        jitter = uniform(-self._poll_jitter, self._poll_jitter)
+        self._nextpoll[jobuuid] = (
+            monotonic() + interval * (1 + jitter),
+            interval
+        )
+
+    def nextpoll(self):
+        """
+        @brief      The seconds until the next running job is due to be polled
+
+        @param      self  This JobQueue object
+
+        @return     the seconds until the next poll, 0 if one is due, or None if no jobs are running
+        """
+        if not self._nextpoll:
+            return None
+
+        nextpoll = min(polltime for polltime, interval in self._nextpoll.values())
+        return max(0, nextpoll - monotonic())
+
+    def _update(
+            self,
+            jobuuid: str,
+            jobresponse: type=dict
+    ):
+        """
+        @brief      Update a running job from the job reported by the server
+
+        @param      self         This JobQueue object
+        @param      jobuuid      The uuid of the job
+        @param      jobresponse  The job as a dict from the Spectrum Scale API
+        """
+        # Share one copy of each status string between all the jobs
+        newstatus = sys.intern(jobresponse['status'])
+        if newstatus in self.COMPLETEDSTATES:
+            errormsg = None
+            if newstatus in self.FAILEDSTATES:
+                errormsg = "Job %s failed" % jobresponse['jobId']
+                stderr = jobresponse.get('result', {}).get('stderr')
+                if stderr:
+                    errormsg = stderr[0]
+            self._finish(jobuuid, newstatus, errormsg)
+        else:
+            self._jobs[jobuuid]._set(status=newstatus)
+
 
 ## WARNING: The following methods can make requests that can make changes
 ## on the Spectrum Scale filesystem
 
+    def _endpoint(
+            self,
+            jobuuid: str
+    ):
+        """
+        @brief      The endpoint a job's request is sent to, e.g. 'filesets'
+
+        @param      self     This JobQueue object
+        @param      jobuuid  The uuid of the job
+
+        @return     the endpoint name, or None
+        """
+        return resource(self._jobs[jobuuid].request.url)[1]
+
+    def _takeready(self):
+        """
+        @brief      Take the ready jobs that can be submitted without going over the
+                    running job limits, the other ready jobs keep their place in the queue.
+                    When there are limits, the jobs with the longest chains of jobs
+                    waiting on them are taken first, so the critical path is not delayed.
+
+        @param      self  This JobQueue object
+
+        @return     a list of job uuids
+        """
+        batch = []
+        waiting = []
+        inflight = len(self._inflight)
+        counts = Counter(self._endpointcounts)
+
+        if (
+                len(self._ready) > 1 and
+                (self._max_inflight is not None or self._endpoint_limits)
+        ):
+            heights = self._height()
+            self._ready = deque(
+                sorted(self._ready, key=lambda jobuuid: -heights[jobuuid])
+            )
+
+        while self._ready:
+            if self._max_inflight is not None and inflight >= self._max_inflight:
+                break
+
+            jobuuid = self._ready.popleft()
+            endpoint = self._endpoint(jobuuid)
+            limit = self._endpoint_limits.get(endpoint)
+            if limit is not None and counts[endpoint] >= limit:
+                waiting.append(jobuuid)
+                continue
+
+            counts[endpoint] += 1
+            inflight += 1
+            batch.append(jobuuid)
+
+        self._ready.extendleft(reversed(waiting))
+
+        return batch
+
+    def _send(
+            self,
+            jobuuid: str
+    ):
+        """
+        @brief      Send the request of a ready job, this is safe to call from
+                    a worker thread as it does not change the queue. A failed
+                    request is returned rather than raised, so one failed send does
+                    not lose track of the other jobs of its batch.
+
+        @param      self     This JobQueue object
+        @param      jobuuid  The uuid of the job
+
+        @return     the response from pyspectrumscale.Api.send(), or the requests exception it raised
+        """
+        try:
+            return self._scaleapi.send(self._jobs[jobuuid].request)
+        except RequestException as exception:
+            return exception
+
+    def _submit(
+            self,
+            jobuuid: str,
+            sendresponse: Union[Response, dict, RequestException]
+    ):
+        """
+        @brief      Update a job from the response to sending its request
+
+        @param      self          This JobQueue object
+        @param      jobuuid       The uuid of the job
+        @param      sendresponse  The response from pyspectrumscale.Api.send(), or the requests exception it raised
+        """
+        job = self._jobs[jobuuid]
+        if isinstance(sendresponse, RequestException):
+            self._finish(
+                jobuuid,
+                self.SUBMITFAILED,
+                "Submission failed: %s" % sendresponse
+            )
+        elif isinstance(sendresponse, Response):
+            content = None
+            if sendresponse.ok:
+                try:
+                    content = sendresponse.json()
+                except ValueError:
+                    pass
+
+            if isinstance(content, dict):
+                job._set(
+                    sendresponse=content,
+                    status=self.SUBMITTED
+                )
+                if job.sendresponse.get('jobs'):
+                    job._set(jobid=job.sendresponse['jobs'][0]['jobId'])
+                    self._record(
+                        'submit',
+                        jobuuid,
+                        jobid=job.jobid,
+                        sendresponse=job.sendresponse
+                    )
+                    self._inflight.add(jobuuid)
+                    self._endpointcounts[self._endpoint(jobuuid)] += 1
+                    self._schedule(jobuuid, self._poll_initial)
+                else:
+                    # There is no server job to track
+                    self._finish(jobuuid, self.COMPLETED)
+
+                if not self._keep_sendresponse:
+                    job._set(sendresponse=None)
+            elif sendresponse.ok:
+                # The server may have accepted the request, but there is no job to track
+                job._set(sendresponse=jsonresponse(sendresponse))
+                self._finish(
+                    jobuuid,
+                    self.SUBMITFAILED,
+                    "Submission response was not JSON: %s %s" % (
+                        sendresponse.status_code,
+                        sendresponse.reason
+                    )
+                )
+            else:
+                job._set(sendresponse=jsonresponse(sendresponse))
+                self._finish(
+                    jobuuid,
+                    self.SUBMITFAILED,
+                    "Submission failed: %s %s" % (
+                        sendresponse.status_code,
+                        sendresponse.reason
+                    )
+                )
+        else:
+            # This is likely because of dryrun
+            job._set(sendresponse=sendresponse)
+
     def submitjobs(self):
         """
-        @brief      This is a single submission iteration of the JobQueue
+        @brief      This is a single submission iteration of the JobQueue,
+                    running jobs are polled once and ready jobs are submitted,
+                    concurrently if there is more than one submit worker
 
         @param      self  The JobQueue object
 
         @return     a list of dict responses from each of the jobs submitted
         """
 
+        # Jobs due shortly are polled with the jobs that are due,
+        # so they share a listing rather than being polled on their own
+        due = []
+        now = monotonic()
+        if any(self._nextpoll[jobuuid][0] <= now for jobuuid in self._inflight):
+            due = [
+                jobuuid for jobuuid in self._inflight
+                if self._nextpoll[jobuuid][0] <= now + self._poll_initial
+            ]
+        self._poll(due)
+
+        # Back off the jobs that are still running
+        for jobuuid in due:
+            if jobuuid in self._inflight:
+                self._schedule(
+                    jobuuid,
+                    min(
+                        self._nextpoll[jobuuid][1] * self._poll_factor,
+                        self._poll_max
+                    )
+                )
+
+        submitted = set()
+        batch = self._takeready()
+        while batch:
+            if not self._scaleapi._dryrun:
+                # Recorded before sending, so a resume never sends a request twice
+                for jobuuid in batch:
+                    self._record('sending', jobuuid)
+
+            if self._submit_workers > 1 and len(batch) > 1:
+                with ThreadPoolExecutor(
+                    max_workers=min(self._submit_workers, len(batch))
+                ) as executor:
+                    sendresponses = list(executor.map(self._send, batch))
+            else:
+                sendresponses = [self._send(jobuuid) for jobuuid in batch]
+
+            for jobuuid, sendresponse in zip(batch, sendresponses):
+                self._submit(jobuuid, sendresponse)
+                submitted.add(jobuuid)
+
+            # Jobs that finished on submission may have made more jobs ready
+            batch = self._takeready()
+
         response = {}
-        for jobuuid in self._jobs:
-            newsubmission = False
-            requireuuid = None
-            requirestatus = None
-            if self._jobs[jobuuid]['ok']:
-                if self._jobs[jobuuid]['status'] in self.NEWSTATES:
-                    requireuuid = self.job(jobuuid)['requires']
-                    if requireuuid:
-                        requiredjob = self.job(requireuuid)
-                        requirestatus = requiredjob['status']
-                        if requirestatus in self.COMPLETEDSTATES:
-                            if requirestatus in self.FAILEDSTATES:
-                                if self.job(jobuuid)['runonfail']:
-                                    newsubmission = True
-                                else:
-                                    self._jobs[jobuuid]['status'] = self.REQUIREDFAILED
-                                    self._jobs[jobuuid]['error'] = (
-                                        "Required job %s failed" %
-                                        self.job(jobuuid)['requires']
-                                    )
-                                    self._jobs[jobuuid]['ok'] = False
-                            else:
-                                newsubmission = True
-                        else:
-                            self._jobs[jobuuid]['status'] = self.PENDING
-                    else:
-                        newsubmission = True
-                elif self._jobs[jobuuid]['status'] in self.RUNNINGSTATES:
-                    # This will refresh the job status of a running job
-                    self.job(jobuuid)
-
-            if newsubmission:
-                sendresponse = self._scaleapi.send(self._jobs[jobuuid]['request'])
-                if isinstance(sendresponse, Response):
-                    # self._jobs[jobuuid]['sendresponse'] = sendresponse.json()
-                    if sendresponse.ok:
-                        self._jobs[jobuuid]['sendresponse'] = sendresponse.json()
-                        self._jobs[jobuuid]['status'] = self.SUBMITTED
-                        if 'jobs' in sendresponse.json():
-                            self._jobs[jobuuid]['jobid'] = sendresponse.json()['jobs'][0]['jobId']
-                    else:
-                        self._jobs[jobuuid]['sendresponse'] = jsonresponse(sendresponse)
-                        self._jobs[jobuuid]['status'] = self.SUBMITFAILED
-                        self._jobs[jobuuid]['ok'] = False
-                else:
-                    # This is likely because of dryrun
-                    self._jobs[jobuuid]['sendresponse'] = sendresponse
+        for jobuuid, job in self._jobs.items():
+            requirestatus = {}
+            for requireuuid in job.requires:
+                if requireuuid in self._jobs:
+                    requirestatus[requireuuid] = self._jobs[requireuuid].status
 
             response[jobuuid] = {
-                'status': self._jobs[jobuuid]['status'],
-                'ok': self._jobs[jobuuid]['ok'],
-                'jobid': self._jobs[jobuuid]['jobid'],
-                'requires': requireuuid,
+                'status': job.status,
+                'ok': job.ok,
+                'jobid': job.jobid,
+                'requires': list(job.requires),
                 'requirestatus': requirestatus,
-                'newsubmission': newsubmission
+                'newsubmission': jobuuid in submitted
             }
 
         return response
@@ -328,12 +1108,20 @@ class JobQueue:
         completelog: bool=False,
         wait: int=0,
         tick: bool=False,
-        tock: bool=False
+        tock: bool=False,
+        timeout: Union[float, None]=None
     ):
         """
-        @brief      { function_description }
+        @brief      Run the JobQueue until all jobs are completed. Between passes it
+                    sleeps until the next running job is due to be polled. A RuntimeError
+                    is raised if no job is running and the jobs left can not be submitted.
 
-        @param      self  The object
+        @param      self         The object
+        @param      completelog  If true, the responses of all passes are returned
+        @param      wait         The minimum seconds between passes
+        @param      tick         If true, print a character for each pass
+        @param      tock         If true, print the status and response of each pass
+        @param      timeout      The maximum seconds to run for, default None, which runs until all jobs are completed
 
         @return     { description_of_the_return_value }
         """
@@ -367,11 +1155,17 @@ class JobQueue:
                     flush=True
                 )
 
+            deadline = None
+            if timeout is not None:
+                deadline = monotonic() + timeout
+
             # Run until completed
-            while self.status()['status'] not in self.COMPLETEDSTATES:
+            status = self.status()
+            while status['status'] not in self.COMPLETEDSTATES:
                 submitresponse = self.submitjobs()
+                status = self.status()
                 if tock:
-                    print("%s/n" % self.status(), flush=True)
+                    print("%s/n" % status, flush=True)
                     print("%s/n" % submitresponse, flush=True)
                 if completelog:
                     response.append(submitresponse)
@@ -379,12 +1173,26 @@ class JobQueue:
                     response = submitresponse
                 if tick:
                     print(
-                        self.status()['status'][0],
+                        status['status'][0],
                         end="",
                         flush=True
                     )
-                if wait:
-                    sleep(wait)
+                if status['status'] not in self.COMPLETEDSTATES:
+                    nextpoll = self.nextpoll()
+                    if nextpoll is None:
+                        # Nothing is running, so no later pass can submit the jobs left
+                        raise RuntimeError(
+                            "%s jobs are not completed and none can be submitted" %
+                            (status['jobcount'] - status['completecount'])
+                        )
+                    delay = max(wait, nextpoll)
+                    if deadline is not None:
+                        remaining = deadline - monotonic()
+                        if remaining <= 0:
+                            break
+                        delay = min(delay, remaining)
+                    if delay:
+                        sleep(delay)
 
         if tick:
             print("!", flush=True)
@@ -3,8 +3,7 @@ A generic wrapper for the pyspectrumscale Api class
 """
 import json
 import sys
-from pyspectrumscale.Api import Api
-from pyspectrumscale.configuration import CONFIG
+from pyspectrumscale.configuration import load
 
 
 def main():
@@ -14,27 +13,69 @@ def main():
     @return     Returns a configured and ready to use pyspectrumscale.Api object
     """
 
-    if CONFIG['command'] == 'dumpconfig':
-        print(json.dumps(CONFIG, indent=2, sort_keys=True))
+    config = load()
+
+    if config['command'] == 'dumpconfig':
+        print(json.dumps(config, indent=2, sort_keys=True))
         sys.exit(0)
 
-    # Define API Session
-    scaleapi = Api(
-        host=CONFIG['scaleserver']['host'],
-        username=CONFIG['scaleserver']['user'],
-        password=CONFIG['scaleserver']['password'],
-        port=CONFIG['scaleserver']['port'],
-        verify_ssl=CONFIG['scaleserver']['verify_ssl'],
-        verify_method=CONFIG['scaleserver']['verify_method'],
-        verify_warnings=CONFIG['scaleserver']['verify_warnings'],
-        version=CONFIG['scaleserver']['version'],
-        dryrun=CONFIG['dryrun']
+    # Imported once needed, so --help and dumpconfig do not wait for it
+    from pyspectrumscale.Api import Api
+
+    # The options shared by a single server and a pool of servers
+    options = dict(
+        username=config['scaleserver']['user'],
+        password=config['scaleserver']['password'],
+        port=config['scaleserver']['port'],
+        verify_ssl=config['scaleserver']['verify_ssl'],
+        verify_method=config['scaleserver']['verify_method'],
+        verify_warnings=config['scaleserver']['verify_warnings'],
+        version=config['scaleserver']['version'],
+        dryrun=config['dryrun'],
+        max_inflight=config['scaleserver'].get('max_inflight', 1),
+        pool_connections=config['scaleserver'].get('pool_connections', 10),
+        pool_maxsize=config['scaleserver'].get('pool_maxsize'),
+        pool_block=config['scaleserver'].get('pool_block', False),
+        keepalive=config['scaleserver'].get('keepalive', True),
+        max_retries=config['scaleserver'].get('max_retries', 0),
+        cache=config['scaleserver'].get('cache', False),
+        cache_ttl=config['scaleserver'].get('cache_ttl'),
+        cache_size=config['scaleserver'].get('cache_size', 1024),
+        rate_limit=config['scaleserver'].get('rate_limit'),
+        rate_burst=config['scaleserver'].get('rate_burst', 1),
+        retries=config['scaleserver'].get('retries', 0),
+        retry_backoff=config['scaleserver'].get('retry_backoff', 0.5),
+        retry_backoff_max=config['scaleserver'].get('retry_backoff_max', 60.0),
+        retry_nonidempotent=config['scaleserver'].get('retry_nonidempotent', False)
     )
 
-    if CONFIG['command'] == 'connectiontest':
+    # Define API Session
+    if config['scaleserver'].get('hosts'):
+        from pyspectrumscale.ApiPool import ApiPool
+
+        hosts = config['scaleserver']['hosts']
+        primary = config['scaleserver']['host']
+        if primary not in hosts:
+            primary = None
+
+        scaleapi = ApiPool(
+            hosts=hosts,
+            primary=primary,
+            routing=config['scaleserver'].get('routing', 'roundrobin'),
+            node_timeout=config['scaleserver'].get('node_timeout'),
+            failover_wait=config['scaleserver'].get('failover_wait', 30.0),
+            **options
+        )
+    else:
+        scaleapi = Api(
+            host=config['scaleserver']['host'],
+            **options
+        )
+
+    if config['command'] == 'connectiontest':
         print(
             "Test connection to %s" %
-            CONFIG['scaleserver']['host']
+            config['scaleserver']['host']
         )
 
         response = scaleapi.info()
@@ -42,8 +83,8 @@ def main():
             print(
                 'Successfully connected to as %s on %s' %
                 (
-                    CONFIG['scaleserver']['user'],
-                    CONFIG['scaleserver']['host']
+                    config['scaleserver']['user'],
+                    config['scaleserver']['host']
                 )
             )
             result = response.json()
@@ -52,8 +93,8 @@ def main():
             print(
                 'Failed to get info as %s in to %s from %s, reason "%s: %s"' %
                 (
-                    CONFIG['scaleserver']['user'],
-                    CONFIG['scaleserver']['host'],
+                    config['scaleserver']['user'],
+                    config['scaleserver']['host'],
                     response.url,
                     response.status_code,
                     response.reason
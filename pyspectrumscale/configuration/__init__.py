@@ -1,19 +1,27 @@
 """
 Process command line arguments and/or load configuration file
 mostly used by the test scripts
+
+Nothing is parsed or read when this module is imported. The configuration is
+built by load(), or on first use of CONFIG, which is load() with the command
+line arguments of the process.
 """
 import argparse
+import copy
 import sys
 import os.path
 from typing import Union
-import yaml
 
 
-def do_args():
+def do_args(
+        argv: Union[list, None]=None
+):
     """
-    @brief      { function_description }
+    @brief      Parse the command line arguments
+
+    @param      argv  The list of arguments, default None, which parses sys.argv
 
-    @return     { description_of_the_return_value }
+    @return     an argparse.Namespace of the arguments
     """
     # Parse command line arguments and modify config
     parser = argparse.ArgumentParser(
@@ -180,11 +188,11 @@ def do_args():
         ]
     )
 
-    return parser.parse_args()
+    return parser.parse_args(argv)
+
 
-# Create the CONFIG to be imported elsewhere
-# Set defaults
-CONFIG = {
+# The configuration defaults
+DEFAULTS = {
     'scaleserver': {
         'host': 'scaleserver.example.org',
         'user': 'username',
@@ -193,60 +201,166 @@ CONFIG = {
         'version': 'v2',
         'verify_ssl': True,
         'verify_method': True,
-        'verify_warnings': True
+        'verify_warnings': True,
+        'max_inflight': 1,
+        'pool_connections': 10,
+        'pool_maxsize': None,
+        'pool_block': False,
+        'keepalive': True,
+        'max_retries': 0,
+        'cache': False,
+        'cache_ttl': None,
+        'cache_size': 1024,
+        'rate_limit': None,
+        'rate_burst': 1,
+        'retries': 0,
+        'retry_backoff': 0.5,
+        'retry_backoff_max': 60.0,
+        'retry_nonidempotent': False,
+        'hosts': None,
+        'routing': 'roundrobin',
+        'node_timeout': None,
+        'failover_wait': 30.0
     },
 }
 
 
-ARGS = do_args()
+# The parsed configuration files, keyed by path, with their modification times
+_FILECACHE = {}
 
-# Override configuration defaults with values from the config file
-if os.path.isfile(ARGS.file):
-    with open(ARGS.file, 'r') as configfile:
-        CONFIG.update(yaml.load(configfile))
+# The configuration of the process, built on first use of CONFIG
+_CONFIG = None
 
-# Override configuration loaded from file with command line arguments
-if ARGS.server:
-    CONFIG['scaleserver']['host'] = ARGS.server
 
-if ARGS.user:
-    CONFIG['scaleserver']['user'] = ARGS.user
+def readfile(
+        path: type=str
+):
+    """
+    @brief      Read a YAML configuration file, a file is only parsed again
+                when its modification time changes
 
-if ARGS.password:
-    CONFIG['scaleserver']['password'] = ARGS.password
+    @param      path  The path of the configuration file
 
-if ARGS.port:
-    CONFIG['scaleserver']['port'] = ARGS.port
+    @return     a copy of the parsed configuration, or None if there is no file
+    """
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
 
-if ARGS.version:
-    CONFIG['scaleserver']['version'] = ARGS.version
+    cached = _FILECACHE.get(path)
+    if cached is None or cached[0] != mtime:
+        import yaml
 
-# This one can be bool or str values
-if ARGS.verify_method is not None:
-    CONFIG['scaleserver']['verify_method'] = ARGS.verify_method
+        with open(path, 'r') as configfile:
+            cached = (mtime, yaml.safe_load(configfile) or {})
+        _FILECACHE[path] = cached
 
-if ARGS.verify_ssl is not None:
-    CONFIG['scaleserver']['verify_ssl'] = ARGS.verify_ssl
+    return copy.deepcopy(cached[1])
 
-if ARGS.verify_warnings is not None:
-    CONFIG['scaleserver']['verify_warnings'] = ARGS.verify_warnings
 
-# If there's no config file, write one
-if not os.path.isfile(ARGS.file):
-    print(
-        "The configuration file %s was missing,"
-        " wrote default configuration to file" %
-        ARGS.file
-    )
-    with open(ARGS.file, 'w') as configfile:
-        yaml.dump(CONFIG, configfile, default_flow_style=False)
-    sys.exit(0)
+def writefile(
+        path: type=str,
+        config: type=dict
+):
+    """
+    @brief      Write a YAML configuration file
+
+    @param      path    The path of the configuration file
+    @param      config  The configuration
+    """
+    import yaml
+
+    with open(path, 'w') as configfile:
+        yaml.dump(config, configfile, default_flow_style=False)
+
+
+def load(
+        argv: Union[list, None]=None,
+        writedefault: bool=True
+):
+    """
+    @brief      Build a configuration from the defaults, the configuration file
+                and the command line arguments, in increasing precedence
+
+    @param      argv          The list of arguments, default None, which parses sys.argv,
+                              pass [] to use only the defaults and the configuration file
+    @param      writedefault  If true and there is no configuration file, the defaults
+                              are written to it and the process exits, as the scripts expect
+
+    @return     a configuration dict
+    """
+    args = do_args(argv)
+    config = copy.deepcopy(DEFAULTS)
+
+    # Override configuration defaults with values from the config file
+    configfile = readfile(args.file)
+    if configfile is not None:
+        config.update(configfile)
+
+    # Override configuration loaded from file with command line arguments
+    if args.server:
+        config['scaleserver']['host'] = args.server
+
+    if args.user:
+        config['scaleserver']['user'] = args.user
+
+    if args.password:
+        config['scaleserver']['password'] = args.password
+
+    if args.port:
+        config['scaleserver']['port'] = args.port
+
+    if args.version:
+        config['scaleserver']['version'] = args.version
+
+    # This one can be bool or str values
+    if args.verify_method is not None:
+        config['scaleserver']['verify_method'] = args.verify_method
+
+    if args.verify_ssl is not None:
+        config['scaleserver']['verify_ssl'] = args.verify_ssl
+
+    if args.verify_warnings is not None:
+        config['scaleserver']['verify_warnings'] = args.verify_warnings
+
+    # If there's no config file, write one
+    if configfile is None and writedefault:
+        print(
+            "The configuration file %s was missing,"
+            " wrote default configuration to file" %
+            args.file
+        )
+        writefile(args.file, config)
+        sys.exit(0)
+
+    # Set state from command line
+    config['command'] = args.command
+    config['dryrun'] = args.dryrun
+    config['filesystem'] = args.filesystem
+    config['fileset'] = args.fileset
+    config['path'] = args.path
+    config['parent'] = args.parent
+    config['comment'] = args.comment
+
+    return config
+
+
+def __getattr__(
+        name: type=str
+):
+    """
+    @brief      Build CONFIG on first use, so importing this module has no side effects
+
+    @param      name  The name of the module attribute
+
+    @return     the configuration of the process for CONFIG
+    """
+    global _CONFIG
+
+    if name == 'CONFIG':
+        if _CONFIG is None:
+            _CONFIG = load()
+        return _CONFIG
 
-# Set state from command line
-CONFIG['command'] = ARGS.command
-CONFIG['dryrun'] = ARGS.dryrun
-CONFIG['filesystem'] = ARGS.filesystem
-CONFIG['fileset'] = ARGS.fileset
-CONFIG['path'] = ARGS.path
-CONFIG['parent'] = ARGS.parent
-CONFIG['comment'] = ARGS.comment
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
@@ -28,8 +28,14 @@ setuptools.setup(
         'PyYAML',
         'requests',
         'typing',
-        'urllib3',
-        'quantities',
-        'numpy'
-    ]
+        'urllib3'
+    ],
+    extras_require={
+        'async': [
+            'aiohttp'
+        ],
+        'numpy': [
+            'numpy'
+        ]
+    }
 )
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""
+A wrapper script to list filesystems and quotas through a pool of Spectrum
+Scale Management API servers, set with scaleserver hosts in the configuration,
+and show how the requests were routed
+"""
+import json
+import sys
+from pyspectrumscale.ApiPool import ApiPool
+from pyspectrumscale.configuration import CONFIG
+
+
+def main():
+    """
+    @brief      This provides a wrapper for the pyspectrumscale module
+
+    @return     { description_of_the_return_value }
+    """
+
+    if CONFIG['command'] == 'dumpconfig':
+        print(json.dumps(CONFIG, indent=2, sort_keys=True))
+        sys.exit(0)
+
+    # Define API session
+    scaleapi = ApiPool(
+        hosts=CONFIG['scaleserver'].get('hosts') or [CONFIG['scaleserver']['host']],
+        username=CONFIG['scaleserver']['user'],
+        password=CONFIG['scaleserver']['password'],
+        port=CONFIG['scaleserver']['port'],
+        verify_ssl=CONFIG['scaleserver']['verify_ssl'],
+        verify_method=CONFIG['scaleserver']['verify_method'],
+        verify_warnings=CONFIG['scaleserver']['verify_warnings'],
+        dryrun=CONFIG['dryrun'],
+        max_inflight=CONFIG['scaleserver'].get('max_inflight', 1),
+        routing=CONFIG['scaleserver'].get('routing', 'roundrobin'),
+        node_timeout=CONFIG['scaleserver'].get('node_timeout'),
+        failover_wait=CONFIG['scaleserver'].get('failover_wait', 30.0)
+    )
+
+    for filesystem in scaleapi.list_filesystems():
+        scaleapi.quotas(filesystem)
+
+    print(json.dumps(scaleapi.nodestats(), indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
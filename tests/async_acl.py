@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+"""
+A generic wrapper script to list acls with the asyncio client
+"""
+import asyncio
+import json
+import sys
+from pyspectrumscale.AsyncApi import AsyncApi
+from pyspectrumscale.configuration import CONFIG
+
+
+async def getacls():
+    """
+    @brief      Get the acls of all the filesets concurrently
+
+    @return     a list of acls
+    """
+
+    # Define API session
+    async with AsyncApi(
+            host=CONFIG['scaleserver']['host'],
+            username=CONFIG['scaleserver']['user'],
+            password=CONFIG['scaleserver']['password'],
+            port=CONFIG['scaleserver']['port'],
+            verify_ssl=CONFIG['scaleserver']['verify_ssl'],
+            verify_method=CONFIG['scaleserver']['verify_method'],
+            verify_warnings=CONFIG['scaleserver']['verify_warnings'],
+            dryrun=CONFIG['dryrun']
+    ) as scaleapi:
+        if CONFIG['fileset'] is not None:
+            acls = await asyncio.gather(
+                *[
+                    scaleapi.acl(
+                        filesystem=CONFIG['filesystem'][0],
+                        fileset=fileset
+                    )
+                    for fileset in CONFIG['fileset']
+                ]
+            )
+        else:
+            acls = await scaleapi.acl(
+                filesystem=CONFIG['filesystem'][0]
+            )
+
+    return acls
+
+
+def main():
+    """
+    @brief      This provides a wrapper for the pyspectrumscale module
+
+    @return     { description_of_the_return_value }
+    """
+
+    if CONFIG['command'] == 'dumpconfig':
+        print(json.dumps(CONFIG, indent=2, sort_keys=True))
+        sys.exit(0)
+
+    if not CONFIG['filesystem']:
+        sys.exit("Requires a filesystem specified with --filesystem")
+
+    if len(CONFIG['filesystem']) > 1:
+        sys.exit("Requires only one filesystem specified with --filesystem")
+
+    acls = asyncio.run(getacls())
+
+    print(json.dumps(acls, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+#!/usr/bin/env python
+"""
+A benchmark script for the asyncio client, it needs no Spectrum Scale server,
+a local server that lists synthetic quotas a page at a time, and answers the
+first requests with 429 Too Many Requests and Retry-After, is used instead
+
+It checks that the pages are merged with the field projection kept, that the
+throttled requests are retried, that a dry run send sends nothing, and that
+the SSL settings are mapped to what aiohttp expects.
+"""
+import asyncio
+import json
+import ssl
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Union
+from pyspectrumscale.AsyncApi import AsyncApi
+
+# The quotas the local server lists, a page at a time
+PAGESIZE = 100
+
+
+class PagingHandler(BaseHTTPRequestHandler):
+    """
+    A request handler that lists synthetic quotas, throttling the first requests
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def sendjson(
+            self,
+            code: int,
+            content: type=dict,
+            headers: Union[dict, None]=None
+    ):
+        """
+        @brief      Send a JSON response
+
+        @param      self     The object
+        @param      code     The status code
+        @param      content  The JSON content
+        @param      headers  A dictionary of extra headers
+        """
+        body = json.dumps(content).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.requests += 1
+            throttled = server.throttle > 0
+            if throttled:
+                server.throttle -= 1
+
+        if throttled:
+            self.sendjson(
+                429,
+                {'status': {'code': 429, 'message': 'Too Many Requests'}},
+                {'Retry-After': '0'}
+            )
+            return
+
+        url = urllib.parse.urlparse(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        first = int(query.get('lastId', -1)) + 1
+        last = min(first + PAGESIZE, server.count)
+        with server.lock:
+            server.fields.add(query.get('fields'))
+
+        quotas = [
+            {'quotaId': quotaid, 'objectName': 'fileset%d' % quotaid, 'blockUsage': quotaid}
+            for quotaid in range(first, last)
+        ]
+
+        content = {'quotas': quotas, 'status': {'code': 200}}
+        if last < server.count:
+            content['paging'] = {'baseUrl': url.path, 'lastId': last - 1}
+
+        self.sendjson(200, content)
+
+    def do_POST(self):
+        with self.server.lock:
+            self.server.posts += 1
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        self.sendjson(202, {'status': {'code': 202}, 'jobs': [{'jobId': 1}]})
+
+
+def localserver(
+        count: int,
+        throttle: int=0
+):
+    """
+    @brief      Start a local server
+
+    @param      count     The number of quotas it lists
+    @param      throttle  The number of requests it answers with 429 first
+
+    @return     a ThreadingHTTPServer
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), PagingHandler)
+    server.count = count
+    server.throttle = throttle
+    server.lock = threading.Lock()
+    server.requests = 0
+    server.posts = 0
+    server.fields = set()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+async def listing(
+        count: int,
+        throttle: int=0,
+        retries: int=0
+):
+    """
+    @brief      List the quotas of a filesystem from a local server
+
+    @param      count     The number of quotas
+    @param      throttle  The number of requests the server answers with 429 first
+    @param      retries   Passed to AsyncApi
+
+    @return     a tuple of the status code, the quotas listed, the requests the server was sent and the seconds taken
+    """
+    server = localserver(count, throttle)
+
+    async with AsyncApi(
+            host='127.0.0.1',
+            username='username',
+            password='password',
+            port=server.server_address[1],
+            protocol='http',
+            retries=retries
+    ) as scaleapi:
+        start = time.perf_counter()
+        response = await scaleapi.get_quota('gpfs01', fields=['objectName', 'blockUsage'])
+        elapsed = time.perf_counter() - start
+
+    server.shutdown()
+
+    quotas = []
+    if response.ok:
+        quotas = response.json()['quotas']
+        assert [quota['quotaId'] for quota in quotas] == list(range(count))
+        # Every page is asked for the same projection
+        assert server.fields == {'objectName,blockUsage'}
+
+    return response.status_code, len(quotas), server.requests, elapsed
+
+
+async def dryrunsend():
+    """
+    @brief      Send a prepared request with a dry run client, and without one
+
+    @return     a list of tuples of the result of send and the POST requests the server was sent
+    """
+    server = localserver(0)
+    results = []
+
+    for dryrun in [True, False]:
+        async with AsyncApi(
+                host='127.0.0.1',
+                username='username',
+                password='password',
+                port=server.server_address[1],
+                protocol='http',
+                dryrun=dryrun
+        ) as scaleapi:
+            preprequest = scaleapi._preppost(
+                scaleapi._baseurl + '/filesystems/gpfs01/filesets',
+                {'filesetName': 'fileset0'}
+            )
+            response = await scaleapi.send(preprequest)
+            results.append((response, server.posts))
+
+    server.shutdown()
+
+    return results
+
+
+def sslsettings():
+    """
+    @brief      Map SSL settings to the ssl argument of aiohttp
+
+    @return     a dict of the ssl argument, or the exception raised, by case
+    """
+    results = {}
+    for case, settings in [
+            ('default', {}),
+            ('verify_ssl off', {'verify_ssl': False}),
+            ('verify_method off', {'verify_method': False}),
+            ('missing CA bundle', {'verify_method': '/nonexistent/ca.pem'}),
+            ('unsupported', {'verify_method': 1})
+    ]:
+        try:
+            results[case] = AsyncApi(
+                host='127.0.0.1',
+                username='username',
+                password='password',
+                **settings
+            )._ssl
+        except (OSError, ValueError) as error:
+            results[case] = error
+
+    return results
+
+
+async def run(
+        counts: type=list
+):
+    """
+    @brief      Run each case for each count
+
+    @param      counts  The numbers of quotas
+    """
+    print(
+        "%28s %8s %8s %8s %8s" %
+        ('case', 'quotas', 'status', 'requests', 's')
+    )
+    for count in counts:
+        pages = -(-count // PAGESIZE)
+        for case, throttle, retries in [
+                ('paged', 0, 0),
+                ('throttled, no retries', 2, 0),
+                ('throttled, retries', 2, 3)
+        ]:
+            status, listed, requests, elapsed = await listing(count, throttle, retries)
+            if retries >= throttle:
+                assert status == 200 and listed == count
+                assert requests == pages + throttle
+            else:
+                assert status == 429
+            print(
+                "%28s %8d %8d %8d %8.3f" %
+                (case, listed, status, requests, elapsed)
+            )
+
+    (dryresponse, dryposts), (response, posts) = await dryrunsend()
+    # The dry run returns the request and sends nothing, the real send sends one POST
+    assert dryresponse['dryrun'] and dryresponse['method'] == 'POST' and dryposts == 0
+    assert response.status_code == 202 and posts == 1
+    print("%28s %8s" % ('dry run send', 'ok'))
+
+    results = sslsettings()
+    # Verification uses a context that checks certificates, never aiohttp's deprecated ssl=None
+    assert isinstance(results['default'], ssl.SSLContext)
+    assert results['default'].verify_mode == ssl.CERT_REQUIRED
+    assert results['verify_ssl off'] is False and results['verify_method off'] is False
+    assert isinstance(results['missing CA bundle'], FileNotFoundError)
+    assert isinstance(results['unsupported'], ValueError)
+    print("%28s %8s" % ('ssl settings', 'ok'))
+
+
+def main():
+    """
+    @brief      Run the asyncio client against a local server
+
+    @return     { description_of_the_return_value }
+    """
+
+    counts = [1000]
+    if len(sys.argv) > 1:
+        counts = [int(count) for count in sys.argv[1:]]
+
+    asyncio.run(run(counts))
+
+
+if __name__ == "__main__":
+    main()
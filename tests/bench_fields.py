@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+A benchmark script for field projection of quota listings, it needs no
+Spectrum Scale server, a local server that lists synthetic quotas and honours
+the fields parameter is used instead
+"""
+import json
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pyspectrumscale.Api import Api
+
+# The quotas the local server lists, a page at a time
+PAGESIZE = 1000
+
+
+def syntheticquota(
+        quotaid: int
+):
+    """
+    @brief      Create a synthetic quota with all the fields the API returns
+
+    @param      quotaid  The quota id
+
+    @return     a quota dict
+    """
+    return {
+        'quotaId': quotaid,
+        'filesystemName': 'gpfs01',
+        'filesetName': 'fileset%d' % quotaid,
+        'quotaType': 'FILESET',
+        'objectName': 'fileset%d' % quotaid,
+        'objectId': quotaid,
+        'blockUsage': 1048576 * quotaid,
+        'blockQuota': 10737418240,
+        'blockLimit': 21474836480,
+        'blockInDoubt': 0,
+        'blockGrace': 'none',
+        'filesUsage': 1000 + quotaid,
+        'filesQuota': 1000000,
+        'filesLimit': 2000000,
+        'filesInDoubt': 0,
+        'filesGrace': 'none',
+        'isDefaultQuota': False
+    }
+
+
+class QuotaHandler(BaseHTTPRequestHandler):
+    """
+    A request handler that lists synthetic quotas, with only the requested fields
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        url = urllib.parse.urlparse(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        first = int(query.get('lastId', -1)) + 1
+        last = min(first + PAGESIZE, self.server.count)
+        fields = query.get('fields')
+
+        quotas = [syntheticquota(i) for i in range(first, last)]
+        if fields and fields != ':all:':
+            names = fields.split(',')
+            quotas = [
+                {name: quota[name] for name in names if name in quota}
+                for quota in quotas
+            ]
+
+        content = {'quotas': quotas, 'status': {'code': 200}}
+        if last < self.server.count:
+            content['paging'] = {'baseUrl': url.path, 'lastId': last - 1}
+
+        body = json.dumps(content).encode()
+        self.server.sent += len(body)
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def listing(
+        count: int,
+        **kwargs
+):
+    """
+    @brief      List the quotas of a filesystem from a local server
+
+    @param      count   The number of quotas
+    @param      kwargs  Passed to get_quota
+
+    @return     a tuple of the bytes sent by the server and the seconds taken
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), QuotaHandler)
+    server.count = count
+    server.sent = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    scaleapi = Api(
+        host='127.0.0.1',
+        username='username',
+        password='password',
+        port=server.server_address[1],
+        protocol='http'
+    )
+
+    start = time.perf_counter()
+    response = scaleapi.get_quota('gpfs01', **kwargs)
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    assert len(response.json()['quotas']) == count
+    return server.sent, elapsed
+
+
+def main():
+    """
+    @brief      List all fields and a projection of the fields of an increasing number of quotas
+
+    @return     { description_of_the_return_value }
+    """
+
+    counts = [10000, 100000]
+    if len(sys.argv) > 1:
+        counts = [int(count) for count in sys.argv[1:]]
+
+    print(
+        "%10s %12s %12s %12s %12s" %
+        ('quotas', 'all (MB)', 'fields (MB)', 'all (s)', 'fields (s)')
+    )
+    for count in counts:
+        allsent, alltime = listing(count, allfields=True)
+        fieldsent, fieldtime = listing(count, fields=['objectName', 'blockUsage', 'filesUsage'])
+        print(
+            "%10d %12.2f %12.2f %12.3f %12.3f" %
+            (count, allsent / 2**20, fieldsent / 2**20, alltime, fieldtime)
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+A benchmark script for the start up time of the pyspectrumscale command line
+entry point and imports, it needs no Spectrum Scale server, each case is run
+in a new interpreter in a temporary directory with a default configuration file
+
+Given the path of a checkout of an earlier version, e.g. one made with
+git worktree add, each case is also timed with it, as a before and after
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Union
+
+# The cases timed, as arguments to the python interpreter
+CASES = [
+    ('python', ['-c', 'pass']),
+    ('import configuration', ['-c', 'import pyspectrumscale.configuration']),
+    ('import quantities', ['-c', 'import quantities']),
+    ('import Api', ['-c', 'import pyspectrumscale.Api']),
+    (
+        'import Api, no quantities',
+        ['-c', 'import sys, pyspectrumscale.Api; assert "quantities" not in sys.modules']
+    ),
+    (
+        'import Api, no numpy',
+        ['-c', 'import sys, pyspectrumscale.Api; assert "numpy" not in sys.modules']
+    ),
+    (
+        'import Api, blockstoints',
+        ['-c', 'from pyspectrumscale.Api._utils import blockstoints; blockstoints(["1G"])']
+    ),
+    ('import JobQueue', ['-c', 'import pyspectrumscale.JobQueue']),
+    ('--help', ['-m', 'pyspectrumscale', '--help']),
+    ('dumpconfig', ['-m', 'pyspectrumscale', 'dumpconfig'])
+]
+
+
+def timecase(
+        arguments: type=list,
+        directory: type=str,
+        repeat: int=5,
+        tree: Union[str, None]=None
+):
+    """
+    @brief      Time a new interpreter running a case
+
+    @param      arguments  The arguments to the python interpreter
+    @param      directory  The working directory
+    @param      repeat     The number of runs, the fastest is reported
+    @param      tree       The checkout pyspectrumscale is imported from, default None, which is this one
+
+    @return     the fastest wall time in seconds, or None if the case failed
+    """
+    environment = dict(os.environ)
+    environment['PYTHONPATH'] = os.pathsep.join(
+        [tree or os.getcwd()] + [path for path in [environment.get('PYTHONPATH')] if path]
+    )
+
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable] + arguments,
+            cwd=directory,
+            env=environment,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        if completed.returncode != 0:
+            return None
+        times.append(time.perf_counter() - start)
+
+    return min(times)
+
+
+def milliseconds(
+        seconds: Union[float, None]
+):
+    """
+    @brief      Format a time in milliseconds
+
+    @param      seconds  The time in seconds, or None if the case failed
+
+    @return     the formatted time, or 'failed'
+    """
+    if seconds is None:
+        return "%10s" % 'failed'
+
+    return "%10.1f" % (seconds * 1000)
+
+
+def main():
+    """
+    @brief      Time each case
+
+    @return     { description_of_the_return_value }
+    """
+
+    repeat = 5
+    if len(sys.argv) > 1:
+        repeat = int(sys.argv[1])
+
+    before = None
+    if len(sys.argv) > 2:
+        before = os.path.abspath(sys.argv[2])
+
+    with tempfile.TemporaryDirectory() as directory:
+        # The first run writes the default configuration file
+        subprocess.run(
+            [sys.executable, '-m', 'pyspectrumscale'],
+            cwd=directory,
+            env=dict(os.environ, PYTHONPATH=os.getcwd()),
+            stdout=subprocess.DEVNULL
+        )
+
+        if before is None:
+            print("%26s %10s" % ('case', 'ms'))
+        else:
+            print("%26s %10s %10s" % ('case', 'before ms', 'after ms'))
+
+        for name, arguments in CASES:
+            after = milliseconds(timecase(arguments, directory, repeat))
+            if before is None:
+                print("%26s %s" % (name, after))
+            else:
+                print(
+                    "%26s %s %s" %
+                    (
+                        name,
+                        milliseconds(timecase(arguments, directory, repeat, before)),
+                        after
+                    )
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+"""
+A benchmark script for the memory used by JobQueue job records, it needs no
+Spectrum Scale server, synthetic requests and send responses are used instead
+"""
+import sys
+import tracemalloc
+from requests import Request
+from pyspectrumscale.JobQueue import JobQueue, JobRecord
+
+
+def syntheticjobs(
+        count: int
+):
+    """
+    @brief      Create synthetic prepared requests and send responses
+
+    @param      count  The number of jobs
+
+    @return     a list of tuples of a requests.PreparedRequest and a send response dict
+    """
+    jobs = []
+    for i in range(count):
+        request = Request(
+            'POST',
+            url='https://scale.example.com:443/scalemgmt/v2/filesystems/gpfs01/filesets',
+            json={
+                'filesetName': 'fileset%d' % i,
+                'path': '/gpfs/gpfs01/fileset%d' % i,
+                'inodeSpace': 'new',
+                'maxNumInodes': '1M'
+            }
+        ).prepare()
+        sendresponse = {
+            'jobs': [
+                {
+                    'jobId': 1000000 + i,
+                    'status': 'RUNNING',
+                    'submitted': '2020-01-01 00:00:00,000',
+                    'completed': 'N/A',
+                    'runtime': 0,
+                    'request': {
+                        'type': 'POST',
+                        'url': '/scalemgmt/v2/filesystems/gpfs01/filesets',
+                        'data': '{"filesetName": "fileset%d"}' % i
+                    },
+                    'result': {},
+                    'pids': []
+                }
+            ],
+            'status': {
+                'code': 202,
+                'message': 'The request was accepted for processing.'
+            }
+        }
+        jobs.append((request, sendresponse))
+
+    return jobs
+
+
+def dictrecords(
+        jobs: list
+):
+    """
+    @brief      Build job records as dicts, as JobQueue used to
+
+    @param      jobs  The synthetic jobs
+
+    @return     a dict of job records
+    """
+    records = {}
+    for i, (request, sendresponse) in enumerate(jobs):
+        records[i] = {
+            'request': request,
+            'status': JobQueue.RUNNING,
+            'jobid': sendresponse['jobs'][0]['jobId'],
+            'sendresponse': sendresponse,
+            'requires': [],
+            'runonfail': True,
+            'ok': True
+        }
+
+    return records
+
+
+def slotrecords(
+        jobs: list,
+        keep_sendresponse: bool=True
+):
+    """
+    @brief      Build job records as JobRecords, as JobQueue does
+
+    @param      jobs               The synthetic jobs
+    @param      keep_sendresponse  If false, the send responses are not kept
+
+    @return     a dict of job records
+    """
+    records = {}
+    for i, (request, sendresponse) in enumerate(jobs):
+        record = JobRecord(request, JobQueue.RUNNING)
+        record._set(jobid=sendresponse['jobs'][0]['jobId'])
+        if keep_sendresponse:
+            record._set(sendresponse=sendresponse)
+        records[i] = record
+
+    return records
+
+
+def measure(
+        count: int,
+        build: type=callable
+):
+    """
+    @brief      Measure the memory held by the records of synthetic jobs,
+                the requests and send responses are created while tracing
+                so dropped send responses are not counted
+
+    @param      count  The number of jobs
+    @param      build  A function that builds the records from the jobs
+
+    @return     the traced memory in bytes
+    """
+    tracemalloc.start()
+    records = build(syntheticjobs(count))
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    assert len(records) == count
+    return size
+
+
+def main():
+    """
+    @brief      Measure the records for an increasing number of jobs
+
+    @return     { description_of_the_return_value }
+    """
+
+    counts = [1000, 10000, 100000]
+    if len(sys.argv) > 1:
+        counts = [int(count) for count in sys.argv[1:]]
+
+    print(
+        "%10s %12s %12s %12s %14s" %
+        ('jobs', 'dict (MB)', 'slots (MB)', 'trimmed (MB)', 'trimmed B/job')
+    )
+    for count in counts:
+        dictsize = measure(count, dictrecords)
+        slotsize = measure(count, slotrecords)
+        trimsize = measure(count, lambda jobs: slotrecords(jobs, False))
+
+        print(
+            "%10d %12.1f %12.1f %12.1f %14d" %
+            (
+                count,
+                dictsize / 2**20,
+                slotsize / 2**20,
+                trimsize / 2**20,
+                trimsize // count
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
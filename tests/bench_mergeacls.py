@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+"""
+A benchmark script for merging acls in Api.acls, it needs no Spectrum Scale
+server, synthetic acl records are used instead
+"""
+import sys
+import timeit
+from collections import OrderedDict
+from pyspectrumscale.Api._acl import _mergeacls
+
+# The largest number of records the old linear scan is timed with
+SCANLIMIT = 12500
+
+
+def syntheticacls(
+        count: int
+):
+    """
+    @brief      Create synthetic acl records, half of the paths are duplicated
+
+    @param      count  The number of acl records
+
+    @return     a list of acl dicts
+    """
+    return [
+        {
+            'type': 'NFSv4',
+            'entries': [],
+            'path': '/gpfs/fileset%d' % (i % (count // 2))
+        }
+        for i in range(count)
+    ]
+
+
+def scanmerge(
+        records: list
+):
+    """
+    @brief      Merge acls with a scan of the merged list, as Api.acls used to
+
+    @param      records  The acl records
+
+    @return     the merged list of acls
+    """
+    acls = []
+    for acl in records:
+        matches = next(
+            (item for item in acls if item['path'] == acl['path']),
+            None
+        )
+        if matches is None:
+            acls.append(acl)
+
+    return acls
+
+
+def indexmerge(
+        records: list
+):
+    """
+    @brief      Merge acls with the path keyed index used by Api.acls
+
+    @param      records  The acl records
+
+    @return     the merged list of acls
+    """
+    index = OrderedDict()
+    for acl in records:
+        _mergeacls(index, acl)
+
+    return list(index.values())
+
+
+def main():
+    """
+    @brief      Time both merges for an increasing number of records
+
+    @return     { description_of_the_return_value }
+    """
+
+    counts = [6250, 12500, 25000, 50000]
+    if len(sys.argv) > 1:
+        counts = [int(count) for count in sys.argv[1:]]
+
+    print("%10s %14s %14s %14s" % ('records', 'index (s)', 'us/record', 'scan (s)'))
+    for count in counts:
+        records = syntheticacls(count)
+        assert indexmerge(records) == records[:count // 2]
+
+        indextime = min(timeit.repeat(lambda: indexmerge(records), number=1, repeat=3))
+
+        scantime = '-'
+        if count <= SCANLIMIT:
+            scantime = '%.3f' % timeit.timeit(lambda: scanmerge(records), number=1)
+
+        print(
+            "%10d %14.4f %14.3f %14s" %
+            (
+                count,
+                indextime,
+                indextime / count * 1e6,
+                scantime
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
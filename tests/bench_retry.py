@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+"""
+A benchmark script for retries and rate limiting, it needs no Spectrum Scale
+server, a local server that answers 429 Too Many Requests with Retry-After
+when it is sent more than its rate is used instead
+"""
+import json
+import sys
+import threading
+import time
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Union
+from pyspectrumscale.Api import Api
+
+# The filesets the local server lists, a page at a time
+FILESETS = 100
+PAGESIZE = 10
+
+
+class ThrottlingHandler(BaseHTTPRequestHandler):
+    """
+    A request handler that lists filesets and throttles clients that send
+    more than the server rate
+    """
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, *args):
+        pass
+
+    def sendjson(
+            self,
+            code: int,
+            content: type=dict,
+            headers: Union[dict, None]=None
+    ):
+        """
+        @brief      Send a JSON response
+
+        @param      self     The object
+        @param      code     The status code
+        @param      content  The JSON content
+        @param      headers  A dictionary of extra headers
+        """
+        body = json.dumps(content).encode()
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            now = time.monotonic()
+            server.tokens = min(server.rate, server.tokens + (now - server.last) * server.rate)
+            server.last = now
+            throttled = server.tokens < 1
+            if throttled:
+                server.throttled += 1
+            else:
+                server.tokens -= 1
+                server.served += 1
+
+        if throttled:
+            self.sendjson(
+                429,
+                {'status': {'code': 429, 'message': 'Too Many Requests'}},
+                {'Retry-After': '1'}
+            )
+            return
+
+        url = urllib.parse.urlparse(self.path)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        first = int(query.get('lastId', -1)) + 1
+        last = min(first + PAGESIZE, FILESETS)
+        content = {
+            'filesets': [
+                {'filesetName': 'fileset%d' % i, 'filesystemName': 'gpfs01'}
+                for i in range(first, last)
+            ],
+            'status': {'code': 200}
+        }
+        if last < FILESETS:
+            content['paging'] = {
+                'baseUrl': url.path,
+                'lastId': last - 1,
+                'fields': query.get('fields', ':all:')
+            }
+        self.sendjson(200, content)
+
+
+def serve(
+        rate: float
+):
+    """
+    @brief      Start a local throttling server
+
+    @param      rate  The requests per second the server answers
+
+    @return     the http.server.ThreadingHTTPServer
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ThrottlingHandler)
+    server.lock = threading.Lock()
+    server.rate = rate
+    server.tokens = rate
+    server.last = time.monotonic()
+    server.served = 0
+    server.throttled = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def sweep(
+        rate: float,
+        sweeps: int,
+        **kwargs
+):
+    """
+    @brief      List the filesets of a filesystem several times concurrently
+
+    @param      rate    The requests per second the server answers
+    @param      sweeps  The number of listings
+    @param      kwargs  Passed to pyspectrumscale.Api
+
+    @return     a tuple of the complete listings, the 429 responses and the seconds taken
+    """
+    server = serve(rate)
+    scaleapi = Api(
+        host='127.0.0.1',
+        username='username',
+        password='password',
+        port=server.server_address[1],
+        protocol='http',
+        max_inflight=8,
+        **kwargs
+    )
+
+    start = time.perf_counter()
+    responses = scaleapi._fanout(
+        lambda i: scaleapi.get_fileset('gpfs01'),
+        range(sweeps)
+    )
+    elapsed = time.perf_counter() - start
+    server.shutdown()
+
+    complete = sum(
+        1 for response in responses
+        if response.ok and len(response.json()['filesets']) == FILESETS
+    )
+
+    return complete, server.throttled, elapsed
+
+
+def main():
+    """
+    @brief      Sweep a throttling server without retries, with retries, and with
+                retries under a client side rate limit
+
+    @return     { description_of_the_return_value }
+    """
+
+    rate = 50.0
+    if len(sys.argv) > 1:
+        rate = float(sys.argv[1])
+    sweeps = 16
+
+    cases = [
+        ('no retries', {}),
+        ('retries', {'retries': 10}),
+        ('retries, rate limit', {'retries': 10, 'rate_limit': rate, 'rate_burst': int(rate)})
+    ]
+
+    print("%24s %10s %10s %10s" % ('case', 'complete', '429s', 's'))
+    for name, kwargs in cases:
+        complete, throttled, elapsed = sweep(rate, sweeps, **kwargs)
+        print(
+            "%24s %7d/%-2d %10d %10.2f" %
+            (name, complete, sweeps, throttled, elapsed)
+        )
+
+
+if __name__ == "__main__":
+    main()
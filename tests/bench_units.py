@@ -0,0 +1,149 @@
+#!/usr/bin/env python
+"""
+A benchmark script for parsing block size strings, it needs no Spectrum Scale
+server, synthetic block size strings are used instead, and quantities, which the
+old parser used
+"""
+import contextlib
+import io
+import random
+import re
+import sys
+import timeit
+from quantities import kibi, mebi, gibi, tebi
+from pyspectrumscale.Api._utils import blocktoint, blockstoints, inodetoint, inodestoints
+
+# Strings whose results are pinned, as (string, result before the table driven
+# parser, result now), only the P suffix, which was valid but returned None,
+# has changed, numbers without a suffix can not have a fraction
+PINNEDBLOCKS = [
+    ('719.21T', 790779757812777, 790779757812777),
+    ('0.1T', 109951162777, 109951162777),
+    ('3.14159T', 3454214734704, 3454214734704),
+    ('1.5T', 1649267441664, 1649267441664),
+    ('1.5K', 1536, 1536),
+    ('1.5P', None, 1688849860263936),
+    ('2P', None, 2251799813685248),
+    ('0.001P', None, 1125899906842),
+    ('10.5', None, None),
+    ('1.', None, None)
+]
+PINNEDINODES = [
+    ('1.5K', 1536, 1536),
+    ('2G', 2147483648, 2147483648),
+    ('1.5', None, None),
+    ('1P', None, None)
+]
+
+
+def syntheticblocks(
+        count: int
+):
+    """
+    @brief      Create synthetic block size strings, as found in quota configs
+
+    @param      count  The number of strings
+
+    @return     a list of block size strings
+    """
+    generator = random.Random(count)
+    return [
+        generator.choice(
+            [
+                '%d' % generator.randint(0, 10**9),
+                '%d%s' % (generator.randint(1, 999), generator.choice('KMGT')),
+                '%.1f%s' % (generator.random() * 100, generator.choice('KMGT'))
+            ]
+        )
+        for i in range(count)
+    ]
+
+
+def oldblocktoint(
+        blockstr: str
+):
+    """
+    @brief      Parse a block size string as blocktoint used to, compiling the
+                validator on each call and walking the suffixes
+
+    @param      blockstr  The blockstr
+
+    @return     the int value of the blockstr
+    """
+    result = None
+    if blockstr:
+        if re.compile(r"^\d+\.?\d*[KGMTP]?$").match(str(blockstr)):
+            if isinstance(blockstr, int):
+                result = blockstr
+            elif blockstr.isdigit():
+                result = int(blockstr)
+            elif blockstr[-1] in ['K', 'M', 'G', 'T']:
+                if blockstr[-1] == 'K':
+                    result = int(float(blockstr[:-1]) * kibi)
+                elif blockstr[-1] == 'M':
+                    result = int(float(blockstr[:-1]) * mebi)
+                elif blockstr[-1] == 'G':
+                    result = int(float(blockstr[:-1]) * gibi)
+                elif blockstr[-1] == 'T':
+                    result = int(float(blockstr[:-1]) * tebi)
+
+    return result
+
+
+def checkpinned():
+    """
+    @brief      Check the pinned strings with the scalar and the array parsers
+    """
+    for parser, arrayparser, pinned in [
+            (blocktoint, blockstoints, PINNEDBLOCKS),
+            (inodetoint, inodestoints, PINNEDINODES)
+    ]:
+        strings = [string for string, old, new in pinned]
+        results = [new for string, old, new in pinned]
+        # The invalid strings are reported on stderr
+        with contextlib.redirect_stderr(io.StringIO()):
+            assert [parser(string) for string in strings] == results
+        assert arrayparser(strings).tolist() == results
+
+
+def main():
+    """
+    @brief      Time the old, table driven and vectorised parsers for an
+                increasing number of strings
+
+    @return     { description_of_the_return_value }
+    """
+
+    counts = [10000, 100000, 1000000]
+    if len(sys.argv) > 1:
+        counts = [int(count) for count in sys.argv[1:]]
+
+    checkpinned()
+
+    print(
+        "%10s %12s %12s %12s %12s" %
+        ('strings', 'old (s)', 'table (s)', 'numpy (s)', 'ns/string')
+    )
+    for count in counts:
+        blocks = syntheticblocks(count)
+        assert [blocktoint(block) for block in blocks] == blockstoints(blocks).tolist()
+        assert [blocktoint(block) for block in blocks] == [oldblocktoint(block) for block in blocks]
+
+        oldtime = min(timeit.repeat(lambda: [oldblocktoint(block) for block in blocks], number=1, repeat=3))
+        tabletime = min(timeit.repeat(lambda: [blocktoint(block) for block in blocks], number=1, repeat=3))
+        numpytime = min(timeit.repeat(lambda: blockstoints(blocks), number=1, repeat=3))
+
+        print(
+            "%10d %12.4f %12.4f %12.4f %12.1f" %
+            (
+                count,
+                oldtime,
+                tabletime,
+                numpytime,
+                numpytime / count * 1e9
+            )
+        )
+
+
+if __name__ == "__main__":
+    main()
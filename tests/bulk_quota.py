@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+"""
+A generic wrapper script to set the same quota on many filesets, quotas
+that already have the limits are skipped. Use --dry-run to only print
+the requests that would be sent.
+"""
+import json
+import sys
+from pyspectrumscale.Api import Api
+from pyspectrumscale.configuration import CONFIG
+
+# The limits set on each fileset
+LIMITS = {
+    'blocksoftlimit': '900G',
+    'blockhardlimit': '1T',
+    'filessoftlimit': '900K',
+    'fileshardlimit': '1M'
+}
+
+
+def main():
+    """
+    @brief      This provides a wrapper for the pyspectrumscale module
+
+    @return     { description_of_the_return_value }
+    """
+
+    if CONFIG['command'] == 'dumpconfig':
+        print(json.dumps(CONFIG, indent=2, sort_keys=True))
+        sys.exit(0)
+
+    if CONFIG['filesystem'] is None or len(CONFIG['filesystem']) != 1:
+        sys.exit("bulk_quota requires only one filesystem")
+
+    if CONFIG['fileset'] is None:
+        sys.exit("bulk_quota requires at least one fileset")
+
+    # Define API session
+    scaleapi = Api(
+        host=CONFIG['scaleserver']['host'],
+        username=CONFIG['scaleserver']['user'],
+        password=CONFIG['scaleserver']['password'],
+        port=CONFIG['scaleserver']['port'],
+        verify_ssl=CONFIG['scaleserver']['verify_ssl'],
+        verify_method=CONFIG['scaleserver']['verify_method'],
+        verify_warnings=CONFIG['scaleserver']['verify_warnings'],
+        dryrun=CONFIG['dryrun'],
+        max_inflight=CONFIG['scaleserver'].get('max_inflight', 1)
+    )
+
+    response = scaleapi.bulk_quota(
+        filesystem=CONFIG['filesystem'][0],
+        quotas=[(fileset, LIMITS) for fileset in CONFIG['fileset']]
+    )
+
+    print(json.dumps(response['unchanged'], indent=2, sort_keys=True))
+    print(json.dumps(response['invalid'], indent=2, sort_keys=True))
+    for fileset, sendresponse in response['responses'].items():
+        if CONFIG['dryrun']:
+            print(json.dumps({fileset: sendresponse}, indent=2, sort_keys=True))
+        else:
+            print(json.dumps({fileset: sendresponse.json()}, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python
+"""
+A generic wrapper script to refresh and summarise an inventory snapshot
+"""
+import json
+import sys
+from pyspectrumscale.Api import Api
+from pyspectrumscale.Inventory import Inventory
+from pyspectrumscale.configuration import CONFIG
+
+
+def main():
+    """
+    @brief      This provides a wrapper for the pyspectrumscale module
+
+    @return     { description_of_the_return_value }
+    """
+
+    if CONFIG['command'] == 'dumpconfig':
+        print(json.dumps(CONFIG, indent=2, sort_keys=True))
+        sys.exit(0)
+
+    # Define API session
+    scaleapi = Api(
+        host=CONFIG['scaleserver']['host'],
+        username=CONFIG['scaleserver']['user'],
+        password=CONFIG['scaleserver']['password'],
+        port=CONFIG['scaleserver']['port'],
+        verify_ssl=CONFIG['scaleserver']['verify_ssl'],
+        verify_method=CONFIG['scaleserver']['verify_method'],
+        verify_warnings=CONFIG['scaleserver']['verify_warnings'],
+        dryrun=CONFIG['dryrun']
+    )
+
+    inventory = Inventory(scaleapi)
+
+    # Refresh in full once a day, incrementally otherwise
+    response = inventory.refresh(
+        filesystems=CONFIG['filesystem'],
+        maxage=86400
+    )
+    print(json.dumps(response, indent=2, sort_keys=True))
+
+    summary = {
+        'filesystems': len(inventory.filesystems()),
+        'filesets': len(inventory.filesets()),
+        'quotas': len(inventory.quotas()),
+        'refreshed': inventory.refreshed()
+    }
+    print(json.dumps(summary, indent=2, sort_keys=True))
+
+    inventory.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+"""
+A generic wrapper script to stream available quotas, one JSON document per line
+"""
+import json
+import sys
+from pyspectrumscale.Api import Api
+from pyspectrumscale.configuration import CONFIG
+
+
+def main():
+    """
+    @brief      This provides a wrapper for the pyspectrumscale module
+
+    @return     { description_of_the_return_value }
+    """
+
+    if CONFIG['command'] == 'dumpconfig':
+        print(json.dumps(CONFIG, indent=2, sort_keys=True))
+        sys.exit(0)
+
+    # Define API session
+    scaleapi = Api(
+        host=CONFIG['scaleserver']['host'],
+        username=CONFIG['scaleserver']['user'],
+        password=CONFIG['scaleserver']['password'],
+        port=CONFIG['scaleserver']['port'],
+        verify_ssl=CONFIG['scaleserver']['verify_ssl'],
+        verify_method=CONFIG['scaleserver']['verify_method'],
+        verify_warnings=CONFIG['scaleserver']['verify_warnings'],
+        dryrun=CONFIG['dryrun']
+    )
+
+    for quota in scaleapi.iter_quotas(
+            filesystems=CONFIG['filesystem'],
+            filesets=CONFIG['fileset'],
+            allfields=True
+    ):
+        print(json.dumps(quota, sort_keys=True), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -155,6 +155,7 @@ def main():
 
 
     print(json.dumps(jobqueue.status(), indent=2, sort_keys=True))
+    print(json.dumps(jobqueue.plan(), indent=2, sort_keys=True))
     print('+++')
     runresponse = jobqueue.run(completelog=True, tick=True)
     print(json.dumps(runresponse, indent=2, sort_keys=True))
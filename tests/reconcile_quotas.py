@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+"""
+A generic wrapper script to reconcile quotas with a desired state, read as a
+JSON list of quota dicts on stdin, e.g.
+[{"filesystem": "gpfs01", "objectName": "projects", "blockhardlimit": "10T"}]
+Only the quotas that differ are sent. Use --dry-run to only print the
+requests that would be sent.
+"""
+import json
+import sys
+from pyspectrumscale.Api import Api
+from pyspectrumscale.configuration import CONFIG
+
+
+def main():
+    """
+    @brief      This provides a wrapper for the pyspectrumscale module
+
+    @return     { description_of_the_return_value }
+    """
+
+    if CONFIG['command'] == 'dumpconfig':
+        print(json.dumps(CONFIG, indent=2, sort_keys=True))
+        sys.exit(0)
+
+    # Define API session
+    scaleapi = Api(
+        host=CONFIG['scaleserver']['host'],
+        username=CONFIG['scaleserver']['user'],
+        password=CONFIG['scaleserver']['password'],
+        port=CONFIG['scaleserver']['port'],
+        verify_ssl=CONFIG['scaleserver']['verify_ssl'],
+        verify_method=CONFIG['scaleserver']['verify_method'],
+        verify_warnings=CONFIG['scaleserver']['verify_warnings'],
+        dryrun=CONFIG['dryrun'],
+        max_inflight=CONFIG['scaleserver'].get('max_inflight', 1)
+    )
+
+    reconciled = scaleapi.reconcile_quotas(json.load(sys.stdin))
+    if reconciled['invalid']:
+        sys.exit(1)
+
+    print(
+        "%d quotas unchanged, %d to send" %
+        (len(reconciled['unchanged']), len(reconciled['requests'])),
+        file=sys.stderr
+    )
+
+    keys = list(reconciled['requests'])
+    sendresponses = scaleapi._fanout(
+        scaleapi.send,
+        list(reconciled['requests'].values())
+    )
+    for key, sendresponse in zip(keys, sendresponses):
+        # The filesetName of a key is None unless it is a USR or GRP quota of a fileset
+        name = '/'.join(part for part in key if part is not None)
+        if CONFIG['dryrun']:
+            print(json.dumps({name: sendresponse}, indent=2, sort_keys=True))
+        else:
+            print(json.dumps({name: sendresponse.json()}, indent=2, sort_keys=True))
+
+
+if __name__ == "__main__":
+    main()